@@ -0,0 +1,153 @@
+"""Image asset pipeline shared by the pygame front ends.
+
+Source images are scaled (and flipped, where a variant needs it) once, packed
+into a single atlas PNG and saved under ATLAS_DIR together with a JSON index.
+The index records a key built from every source's path, mtime, size, scale
+and flip, so editing or replacing an image rebuilds the atlas on the next
+start, while an unchanged set of sources is read back as one PNG.
+
+At load time the atlas is converted to the display format once and each
+image is served as a sub-surface of it. Opaque images (alpha=False) get
+their own convert()ed copy instead, because opaque blits are cheaper than
+per-pixel-alpha ones. pygame.display.set_mode must have been called first.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import pygame
+
+ATLAS_DIR = 'cache'
+ATLAS_VERSION = 1
+# Transparent gap between packed images so smoothing never bleeds across them
+ATLAS_PADDING = 1
+ATLAS_MIN_WIDTH = 1024
+
+AssetSpec = namedtuple('AssetSpec', ['key', 'path', 'scale', 'flip_x', 'alpha'],
+                       defaults=(1, False, True))
+
+
+def atlas_key(specs):
+    """Fingerprint the sources of an atlas; any change to a file or spec changes it"""
+    digest = hashlib.sha1(f"v{ATLAS_VERSION}".encode())
+    for spec in specs:
+        try:
+            stat = os.stat(spec.path)
+            source = f"{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            source = "missing"
+        digest.update(f"|{spec.key}:{spec.path}:{source}:{spec.scale}:{spec.flip_x}".encode())
+    return digest.hexdigest()
+
+
+def prepare_image(spec):
+    """Load one source at its final scale and orientation, or None if it can't be read"""
+    if not os.path.exists(spec.path):
+        return None
+    try:
+        image = pygame.image.load(spec.path)
+    except pygame.error:
+        return None
+    if spec.scale != 1:
+        image = pygame.transform.scale(image, (int(image.get_width() * spec.scale),
+                                               int(image.get_height() * spec.scale)))
+    if spec.flip_x:
+        image = pygame.transform.flip(image, True, False)
+    return image
+
+
+def pack(sizes):
+    """Shelf-pack (w, h) sizes tallest first; return the atlas size and a position per size"""
+    width = max([ATLAS_MIN_WIDTH] + [w + ATLAS_PADDING for w, h in sizes])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[i]
+        if x + w > width:
+            x = 0
+            y += shelf_height + ATLAS_PADDING
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w + ATLAS_PADDING
+        shelf_height = max(shelf_height, h)
+    return (width, max(1, y + shelf_height)), positions
+
+
+def build_atlas(specs):
+    """Return (atlas surface, {key: (x, y, w, h)}) for the sources that could be loaded"""
+    images = {}
+    for spec in specs:
+        image = prepare_image(spec)
+        if image is not None:
+            images[spec.key] = image
+    keys = list(images)
+    size, positions = pack([images[key].get_size() for key in keys])
+    atlas = pygame.Surface(size, pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    rects = {}
+    for key, (x, y) in zip(keys, positions):
+        atlas.blit(images[key], (x, y))
+        rects[key] = (x, y, *images[key].get_size())
+    return atlas, rects
+
+
+def save_atlas(path, atlas, rects, key):
+    """Write the atlas PNG and its index atomically; the index goes last so it never points at a partial PNG"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_image = f"{path}.{os.getpid()}.tmp.png"
+    pygame.image.save(atlas, temp_image)
+    os.replace(temp_image, path + '.png')
+    temp_index = f"{path}.{os.getpid()}.tmp.json"
+    with open(temp_index, 'w') as f:
+        json.dump({'key': key, 'rects': rects}, f)
+    os.replace(temp_index, path + '.json')
+
+
+def read_atlas(path, key):
+    """Return (atlas surface, rects) from disk, or None if missing, stale or unreadable"""
+    try:
+        with open(path + '.json') as f:
+            index = json.load(f)
+        if index.get('key') != key:
+            return None
+        return pygame.image.load(path + '.png'), index['rects']
+    except (OSError, ValueError, KeyError, pygame.error):
+        return None
+
+
+def load_atlas(name, specs, directory=ATLAS_DIR):
+    """Return {key: display-format surface} for every spec whose source could be loaded
+
+    Sources that are missing or unreadable are left out so the caller can
+    substitute its own placeholder.
+    """
+    path = os.path.join(directory, name)
+    key = atlas_key(specs)
+    cached = read_atlas(path, key)
+    if cached is None:
+        atlas, rects = build_atlas(specs)
+        if rects and pygame.image.get_extended():
+            try:
+                save_atlas(path, atlas, rects, key)
+            except (OSError, pygame.error):
+                pass  # A read-only disk only costs the cache
+    else:
+        atlas, rects = cached
+
+    atlas = atlas.convert_alpha()
+    images = {}
+    for spec in specs:
+        rect = rects.get(spec.key)
+        if rect is None:
+            continue
+        image = atlas.subsurface(rect)
+        images[spec.key] = image if spec.alpha else image.convert()
+    return images
+
+
+def convert_image(image, alpha=True):
+    """Convert a surface built at runtime to the display format"""
+    return image.convert_alpha() if alpha else image.convert()
@@ -0,0 +1,310 @@
+"""Reproducible benchmarks for scoring, simulation, physics and rendering.
+
+Every workload uses fixed seeds and runs headless on the SDL dummy video
+driver, so two runs on the same machine do the same work. Each benchmark is
+warmed up once, then timed --repeat times. The best time is reported as
+time per operation and operations per second.
+
+Results are written as JSON together with the environment they were measured
+in. They are compared against a baseline file, and any benchmark whose time
+per operation grew by more than --threshold fails the run (exit status 1).
+
+    python benchmarks.py --save-baseline        # record this machine's baseline
+    python benchmarks.py                        # compare against it
+    python benchmarks.py --only pika_physics_steps,draw_game --repeat 10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from itertools import product
+
+BASELINE_PATH = 'bench_baseline.json'
+DEFAULT_THRESHOLD = 0.10
+
+
+def bench_score_all_rolls():
+    """ScoreCard.calculate_possible_score for every category of all 7776 rolls"""
+    from yacht_rules import CATEGORY_NAMES, ScoreCard
+    card = ScoreCard()
+    rolls = [list(dice) for dice in product(range(1, 7), repeat=5)]
+
+    def run():
+        for dice in rolls:
+            for category in CATEGORY_NAMES:
+                card.calculate_possible_score(category, dice)
+    return run, len(rolls) * len(CATEGORY_NAMES), 'score'
+
+
+def bench_random_games():
+    """Complete two-player games with random moves on the headless engine"""
+    from yacht_engine import YachtEngine, play_random_game
+    games = 200
+
+    def run():
+        rng = random.Random(0)
+        for _ in range(games):
+            play_random_game(YachtEngine(2, rng))
+    return run, games, 'game'
+
+
+def bench_optimal_games():
+    """Complete two-player games with both players following the solver table"""
+    from yacht_engine import YachtEngine
+    from yacht_tournament import OptimalPolicy, play_game
+    games = 50
+    policy = OptimalPolicy(random.Random(0))
+
+    def run():
+        rng = random.Random(0)
+        for _ in range(games):
+            play_game(YachtEngine(2, rng), (policy, policy))
+    return run, games, 'game'
+
+
+def bench_pika_physics_steps():
+    """PikaPhysics.step (both Pikachus and the ball) with random inputs"""
+    from pika_physics import PikaPhysics
+    steps = 20000
+    rng = random.Random(0)
+    inputs = [(rng.randrange(8), rng.randrange(8)) for _ in range(steps)]
+
+    def run():
+        physics = PikaPhysics(seed=0)
+        for inputs1, inputs2 in inputs:
+            if not physics.game_active:
+                physics.reset(0)
+            physics.step(inputs1, inputs2)
+    return run, steps, 'step'
+
+
+def bench_pika_cpu_inputs():
+    """CpuPlayer.inputs for both players of a CPU-vs-CPU match, including the physics step"""
+    from pika_cpu import CpuPlayer
+    from pika_physics import PikaPhysics
+    steps = 20000
+
+    def run():
+        physics = PikaPhysics(seed=0)
+        cpu1 = CpuPlayer(1, 'normal', seed=1)
+        cpu2 = CpuPlayer(2, 'hard', seed=2)
+        for _ in range(steps):
+            if not physics.game_active:
+                physics.reset(0)
+            physics.step(cpu1.inputs(physics), cpu2.inputs(physics))
+    return run, steps, 'step'
+
+
+def _yacht_game_in_progress():
+    import yacht_game
+    yacht_game.init_display()
+    yacht_game.save_games = False
+    game = yacht_game.YachtGame()
+    game.initialize_game(4)
+    game.engine.rng.seed(0)
+    # A few turns in, so the scoreboard has both filled and empty cells
+    for _ in range(12):
+        game.play_ai_step()
+        for die in game.dice:
+            die.value = die.final_value
+            die.rolling = False
+    game.roll_dice()
+    for die in game.dice:
+        die.value = die.final_value
+        die.rolling = False
+    game.refresh_odds()
+    return yacht_game, game
+
+
+def bench_draw_game():
+    """A full-screen draw_game frame of a four-player game"""
+    yacht_game, game = _yacht_game_in_progress()
+    frames = 200
+
+    def run():
+        for _ in range(frames):
+            yacht_game.draw_game(yacht_game.screen, game)
+    return run, frames, 'frame'
+
+
+def bench_draw_scoreboard():
+    """A full-screen draw_scoreboard frame of a four-player game"""
+    yacht_game, game = _yacht_game_in_progress()
+    frames = 200
+
+    def run():
+        for _ in range(frames):
+            yacht_game.draw_scoreboard(yacht_game.screen, game)
+    return run, frames, 'frame'
+
+
+def bench_pika_draw_scene():
+    """A full pika frame mid-rally, including the combo text and glow"""
+    import pika
+    pika.init_display()
+    match = pika.create_match(seed=0)
+    pika.bind_sprites(match)
+    match.ball.consecutive_hits = 5
+    frames = 200
+
+    def run():
+        for _ in range(frames):
+            pika.draw_scene(match, 0.5)
+    return run, frames, 'frame'
+
+
+# Rendering benchmarks come last: pika's window replaces Yacht's
+BENCHMARKS = (
+    ('score_all_rolls', bench_score_all_rolls),
+    ('yacht_random_games', bench_random_games),
+    ('yacht_optimal_games', bench_optimal_games),
+    ('pika_physics_steps', bench_pika_physics_steps),
+    ('pika_cpu_inputs', bench_pika_cpu_inputs),
+    ('draw_game', bench_draw_game),
+    ('draw_scoreboard', bench_draw_scoreboard),
+    ('pika_draw_scene', bench_pika_draw_scene),
+)
+
+
+def environment():
+    """Describe the machine and library versions the results were measured with"""
+    info = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'sdl_videodriver': os.environ.get('SDL_VIDEODRIVER'),
+    }
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:
+        pass
+    try:
+        import pygame
+        info['pygame'] = pygame.version.ver
+        info['sdl'] = '.'.join(map(str, pygame.get_sdl_version()))
+    except ImportError:
+        pass
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                        text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def run_benchmark(setup, repeat):
+    run, ops, unit = setup()
+    run()  # Warm-up: imports, caches, lazily built tables
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        'description': setup.__doc__,
+        'ops': ops,
+        'unit': unit,
+        'best_s': best,
+        'median_s': statistics.median(times),
+        'per_op_us': best / ops * 1e6,
+        'ops_per_s': ops / best,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return {name: (baseline us/op, current us/op, relative change, status)}"""
+    changes = {}
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        change = result['per_op_us'] / base['per_op_us'] - 1
+        if change > threshold:
+            status = 'REGRESSION'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        changes[name] = (base['per_op_us'], result['per_op_us'], change, status)
+    return changes
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring, physics and rendering benchmarks")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument('--only', help="comma-separated benchmark names")
+    parser.add_argument('--output', help="write results (with environment metadata) to this JSON file")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown per benchmark before it counts as a regression")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+    # Rendering benchmarks open a window; keep it off-screen unless asked otherwise
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+    if args.list:
+        for name, setup in BENCHMARKS:
+            print(f"{name:<22}{setup.__doc__}")
+        return 0
+
+    selected = BENCHMARKS
+    if args.only:
+        names = args.only.split(',')
+        unknown = set(names) - {name for name, _ in BENCHMARKS}
+        if unknown:
+            parser.error(f"unknown benchmark: {', '.join(sorted(unknown))}")
+        selected = [(name, setup) for name, setup in BENCHMARKS if name in names]
+
+    results = {}
+    for name, setup in selected:
+        results[name] = result = run_benchmark(setup, args.repeat)
+        print(f"{name:<22}{result['per_op_us']:>12.2f} us/{result['unit']:<6}"
+              f"{result['ops_per_s']:>14,.0f} {result['unit']}/s", flush=True)
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+
+    if args.output:
+        write_json(args.output, report)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    changes = compare(results, baseline, args.threshold)
+    base_env = baseline.get('environment', {})
+    print(f"\nAgainst {args.baseline} ({base_env.get('time', '?')}, commit {base_env.get('commit', '?')}), "
+          f"threshold {args.threshold:.0%}:")
+    for name, (before, after, change, status) in changes.items():
+        print(f"{name:<22}{before:>12.2f} ->{after:>10.2f} us  {change:>+7.1%}  {status}")
+    regressions = [name for name, change in changes.items() if change[3] == 'REGRESSION']
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Per-frame phase timing for the pygame main loops.
+
+A main loop calls begin_frame() at the top of each frame, lap(phase) after
+each piece of work (events, update, a draw function, display flip, clock
+sleep) and end_frame() at the bottom. Each phase keeps its last `capacity`
+frames in a fixed-size ring buffer, so memory stays constant however long
+the game runs. summary() turns those into p50/p95/p99/max, and export()
+writes them as JSON Lines or CSV. Callables in `info` add their own lines
+below the timings in the overlay.
+
+Time spent waiting (the clock.tick sleep, or blocking for input) is recorded
+but left out of a frame's busy time, which is what is compared against the
+frame budget to count overruns.
+
+When disabled, every call returns after a single attribute check.
+"""
+import csv
+import json
+import os
+import time
+from array import array
+
+DEFAULT_CAPACITY = 600  # Ten seconds at 60 FPS
+WAIT_PHASES = frozenset(('sleep', 'idle'))
+PERCENTILES = (50, 95, 99)
+# Frames between refreshes of the on-screen overlay text
+OVERLAY_REFRESH = 30
+OVERLAY_POSITION = (4, 4)
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-p * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+class FrameProfiler:
+    def __init__(self, capacity=DEFAULT_CAPACITY, budget_ms=1000 / 60, enabled=False):
+        self.capacity = capacity
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self.show_overlay = False
+        self.info = []  # Callables returning extra overlay lines (cache sizes and the like)
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.busy = array('d', bytes(8 * self.capacity))
+        self.frames = 0
+        self.overruns = 0
+        self._current = {}
+        self._last = time.perf_counter()
+        self._overlay = None
+        self._overlay_font = None
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; showing it also turns timing on"""
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay and not self.enabled:
+            self.enabled = True
+            self._current.clear()
+            self._last = time.perf_counter()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._current.clear()
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        current = self._current
+        current[phase] = current.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        slot = self.frames % self.capacity
+        current = self._current
+        for phase, values in self.phases.items():
+            values[slot] = current.get(phase, 0.0)
+        for phase, value in current.items():
+            if phase not in self.phases:
+                values = self.phases[phase] = array('d', bytes(8 * self.capacity))
+                values[slot] = value
+        busy = sum(value for phase, value in current.items() if phase not in WAIT_PHASES)
+        self.busy[slot] = busy
+        if busy > self.budget_ms:
+            self.overruns += 1
+        self.frames += 1
+        current.clear()
+
+    def window(self):
+        """Number of frames currently held in the ring buffers"""
+        return min(self.frames, self.capacity)
+
+    def summary(self):
+        count = self.window()
+        series = dict(self.phases)
+        series['busy'] = self.busy
+        phases = {}
+        for phase, values in series.items():
+            ordered = sorted(values[:count])
+            stats = {f"p{p}": percentile(ordered, p) for p in PERCENTILES}
+            stats['max'] = ordered[-1] if ordered else 0.0
+            phases[phase] = stats
+        return {
+            'frames': self.frames,
+            'window': count,
+            'budget_ms': self.budget_ms,
+            'overruns': self.overruns,
+            'phases': phases,
+        }
+
+    def rows(self):
+        """Yield one dict per retained frame, oldest first"""
+        names = sorted(self.phases)
+        for frame in range(self.frames - self.window(), self.frames):
+            slot = frame % self.capacity
+            row = {'frame': frame, 'busy_ms': self.busy[slot],
+                   'over_budget': self.busy[slot] > self.budget_ms}
+            for name in names:
+                row[name] = self.phases[name][slot]
+            yield row
+
+    def export(self, path):
+        """Write the retained frames to path as CSV (.csv) or JSON Lines (anything else)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rows = self.rows()
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                fields = ['frame', 'busy_ms', 'over_budget'] + sorted(self.phases)
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+        return path
+
+    def summary_lines(self):
+        summary = self.summary()
+        lines = [f"frames {summary['frames']}  over {summary['budget_ms']:.1f} ms: {summary['overruns']}",
+                 f"{'phase':<16}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for phase, stats in sorted(summary['phases'].items(), key=lambda item: -item[1]['p95']):
+            lines.append(f"{phase:<16}{stats['p50']:>7.2f}{stats['p95']:>7.2f}{stats['p99']:>7.2f}")
+        lines.extend(info() for info in self.info)
+        return lines
+
+    def overlay_rect(self):
+        """Screen area the overlay covered last time it was drawn"""
+        import pygame
+        if self._overlay is None:
+            return pygame.Rect(OVERLAY_POSITION, (0, 0))
+        return self._overlay.get_rect(topleft=OVERLAY_POSITION)
+
+    def draw_overlay(self, surface):
+        """Draw the summary table in the top-left corner; returns the rect drawn, or None"""
+        if not self.show_overlay:
+            return None
+        import pygame
+        if self._overlay is None or self.frames % OVERLAY_REFRESH == 0:
+            if self._overlay_font is None:
+                self._overlay_font = pygame.font.SysFont('monospace', 14)
+            font = self._overlay_font
+            lines = [font.render(line, True, (255, 255, 255)) for line in self.summary_lines()]
+            height = font.get_linesize()
+            overlay = pygame.Surface((max(line.get_width() for line in lines) + 12,
+                                      height * len(lines) + 12), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 170))
+            for i, line in enumerate(lines):
+                overlay.blit(line, (6, 6 + i * height))
+            self._overlay = overlay
+        return surface.blit(self._overlay, OVERLAY_POSITION)
@@ -1,15 +1,24 @@
 import pygame
 import sys
+import argparse
 import random
 import os
+import time
+from collections import OrderedDict
+from pika_physics import (WIDTH, HEIGHT, FPS, TICK, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP,
+                          PikaPhysics)
+from pika_replay import ReplayPlayer, ReplayWriter, new_replay_path
+from text_cache import render_text
+from assets import AssetSpec, convert_image, load_atlas
+from frame_profiler import FrameProfiler
+from pika_cpu import DIFFICULTIES, CpuPlayer
+from pika_net import LossyTransport, RollbackSession, host, join, parse_address
 
-# 게임 초기화
-pygame.init()
-
-# 화면 설정
-WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("피카추 배구")
+# 화면, 폰트, 이미지, 스프라이트는 init_display()에서 만들어짐
+# (import만으로는 창을 열지 않으므로 물리나 리플레이 코드를 창 없이 불러올 수 있음)
+screen = None
+clock = None
+font = None
 
 # 색상 정의
 WHITE = (255, 255, 255)
@@ -19,16 +28,6 @@ BLUE = (0, 0, 255)
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 
-# 프레임 설정
-clock = pygame.time.Clock()
-FPS = 60
-
-# 중력 설정
-GRAVITY = 0.6  # 중력 약간 감소하여 공중에 더 오래 머물게 함
-
-# 게임 상수
-BOUNCE_SOUND_COOLDOWN = 10  # 소리가 너무 자주 나지 않게
-
 # 이미지 로드 함수
 def load_image(name, scale=1):
     """이미지를 로드하고 크기를 조정하는 함수"""
@@ -75,433 +74,422 @@ def load_image(name, scale=1):
     
     return surf
 
-# 게임 리소스 로드
-# 리소스가 없으면 기본 도형으로 대체됩니다
-try:
-    os.makedirs("assets", exist_ok=True)
-except:
-    pass
+# 최종 크기로 줄인 이미지를 아틀라스 캐시에 모아 두고, 화면 픽셀 형식으로 변환해서 사용
+# 2번 피카추는 미리 좌우 반전해 둠
+ASSET_SPECS = (
+    AssetSpec('pikachu1', "assets/pikachu1.png", 0.2),
+    AssetSpec('pikachu2', "assets/pikachu2.png", 0.2, flip_x=True),
+    AssetSpec('ball', "assets/ball.png", 0.1),
+    AssetSpec('background', "assets/background.png", 1, alpha=False),
+    AssetSpec('net', "assets/net.png", 0.5),
+)
 
-pikachu1_img = load_image("assets/pikachu1.png", 0.2)
-pikachu2_img = load_image("assets/pikachu2.png", 0.2)
-ball_img = load_image("assets/ball.png", 0.1)
-background_img = load_image("assets/background.png", 1)
-net_img = load_image("assets/net.png", 0.5)
+def load_images():
+    """아틀라스에서 이미지를 가져오고, 없는 이미지는 load_image의 대체 도형으로 채우는 함수"""
+    images = load_atlas('pika', ASSET_SPECS)
+    for spec in ASSET_SPECS:
+        if spec.key not in images:
+            image = load_image(spec.path, spec.scale)
+            if spec.flip_x:
+                image = pygame.transform.flip(image, True, False)
+            images[spec.key] = convert_image(image, spec.alpha)
+    return images
 
-# 피카추 클래스
+images = None
+pikachu1_img = pikachu2_img = ball_img = background_img = net_img = None
+
+# 피카추 스프라이트 - 물리 상태(PikachuState)를 그리기만 함
 class Pikachu(pygame.sprite.Sprite):
-    def __init__(self, x, y, player_num):
+    def __init__(self, state):
         super().__init__()
-        self.player_num = player_num
-        if player_num == 1:
+        self.state = state
+        if state.player_num == 1:
             self.image = pikachu1_img
         else:
             self.image = pikachu2_img
-            self.image = pygame.transform.flip(self.image, True, False)
-        
         self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.vel_y = 0
-        self.vel_x = 0
-        self.jump = False
-        self.score = 0
     
-    def update(self):
-        # 키 입력 처리
-        keys = pygame.key.get_pressed()
-        
-        # 플레이어 1 (왼쪽) 조작
-        if self.player_num == 1:
-            if keys[pygame.K_a]:
-                self.vel_x = -7  # 속도 증가
-            elif keys[pygame.K_d]:
-                self.vel_x = 7  # 속도 증가
-            else:
-                # 점차 속도 감소
-                if abs(self.vel_x) > 0.5:
-                    self.vel_x *= 0.9
-                else:
-                    self.vel_x = 0
-                
-            # 점프 (공중에서도 일정 시간마다 추가 점프 가능)
-            if keys[pygame.K_w]:
-                if not self.jump:
-                    self.vel_y = -15
-                    self.jump = True
-                # 이미 점프 중일 때 작은 부스트 (공중에서 추가 조작)
-                elif self.vel_y > 0 and self.rect.bottom < HEIGHT - 50:
-                    self.vel_y -= 0.4  # 낙하 속도 감소
-        
-        # 플레이어 2 (오른쪽) 조작
-        else:
-            if keys[pygame.K_LEFT]:
-                self.vel_x = -7  # 속도 증가
-            elif keys[pygame.K_RIGHT]:
-                self.vel_x = 7  # 속도 증가
-            else:
-                # 점차 속도 감소
-                if abs(self.vel_x) > 0.5:
-                    self.vel_x *= 0.9
-                else:
-                    self.vel_x = 0
-                
-            # 점프 (공중에서도 일정 시간마다 추가 점프 가능)
-            if keys[pygame.K_UP]:
-                if not self.jump:
-                    self.vel_y = -15
-                    self.jump = True
-                # 이미 점프 중일 때 작은 부스트 (공중에서 추가 조작)
-                elif self.vel_y > 0 and self.rect.bottom < HEIGHT - 50:
-                    self.vel_y -= 0.4  # 낙하 속도 감소
-        
-        # 점프 키를 계속 누르지 않으면 빨리 낙하
-        if self.player_num == 1 and not keys[pygame.K_w] and self.vel_y < 0:
-            self.vel_y *= 0.9  # 상승 중 점프 키를 놓으면 빨리 떨어짐
-        elif self.player_num == 2 and not keys[pygame.K_UP] and self.vel_y < 0:
-            self.vel_y *= 0.9  # 상승 중 점프 키를 놓으면 빨리 떨어짐
-        
-        # 중력 적용
-        self.vel_y += GRAVITY
-        
-        # 공중에서 최대 낙하 속도 제한
-        if self.vel_y > 12:
-            self.vel_y = 12
-        
-        # 위치 업데이트
-        self.rect.x += self.vel_x
-        self.rect.y += self.vel_y
-        
-        # 바닥 충돌 확인
-        if self.rect.bottom >= HEIGHT - 50:
-            self.rect.bottom = HEIGHT - 50
-            self.vel_y = 0
-            self.jump = False
-        
-        # 좌우 경계 확인
-        if self.player_num == 1:
-            # 플레이어 1은 코트 왼쪽 절반에만 있을 수 있음
-            if self.rect.left <= 0:
-                self.rect.left = 0
-            if self.rect.right >= WIDTH // 2 - 10:
-                self.rect.right = WIDTH // 2 - 10
-        else:
-            # 플레이어 2는 코트 오른쪽 절반에만 있을 수 있음
-            if self.rect.left <= WIDTH // 2 + 10:
-                self.rect.left = WIDTH // 2 + 10
-            if self.rect.right >= WIDTH:
-                self.rect.right = WIDTH
+    def sync(self, alpha):
+        """물리 틱 사이를 보간한 위치로 스프라이트를 옮기는 함수"""
+        x, y = self.state.interpolate(alpha)
+        self.rect.topleft = (round(x), round(y))
 
-# 볼 클래스
+# 볼 스프라이트 - 물리 상태(BallState)를 그리기만 함
 class Ball(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, state):
         super().__init__()
+        self.state = state
         self.image = ball_img
         self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.vel_x = random.choice([-3, 3])
-        self.vel_y = -5
-        self.last_hit_by = 0  # 마지막으로 공을 친 플레이어
-        self.consecutive_hits = 0  # 연속 히트 카운트
-        self.sound_cooldown = 0  # 소리 쿨다운
     
-    def update(self, pikachu1, pikachu2, net_rect):
-        # 소리 쿨다운 감소
-        if self.sound_cooldown > 0:
-            self.sound_cooldown -= 1
-            
-        # 중력 적용 - 속도 제한 추가
-        self.vel_y += GRAVITY * 0.5
-        
-        # 공중에서 최대 속도 제한
-        if self.vel_y > 14:
-            self.vel_y = 14
-        if abs(self.vel_x) > 12:
-            self.vel_x = 12 * (1 if self.vel_x > 0 else -1)
-        
-        # 위치 업데이트
-        self.rect.x += self.vel_x
-        self.rect.y += self.vel_y
-        
-        # 바닥 충돌
-        if self.rect.bottom >= HEIGHT - 50:
-            # 득점 처리
-            if self.rect.centerx < WIDTH // 2:
-                pikachu2.score += 1
-                self.reset(2)  # 플레이어 2가 득점하여 서브권 획득
-            else:
-                pikachu1.score += 1
-                self.reset(1)  # 플레이어 1이 득점하여 서브권 획득
-            
-            # 연속 히트 카운트 리셋
-            self.consecutive_hits = 0
-        
-        # 천장 충돌 - 튕김 감소
-        if self.rect.top <= 0:
-            self.rect.top = 0
-            self.vel_y = abs(self.vel_y) * 0.8
-            
-            # 소리 처리 (나중에 추가)
-            if self.sound_cooldown == 0:
-                self.sound_cooldown = BOUNCE_SOUND_COOLDOWN
-        
-        # 좌우 벽 충돌 - 튕김 감소
-        if self.rect.left <= 0:
-            self.rect.left = 0
-            self.vel_x = abs(self.vel_x) * 0.9
-            
-            # 소리 처리 (나중에 추가)
-            if self.sound_cooldown == 0:
-                self.sound_cooldown = BOUNCE_SOUND_COOLDOWN
-        
-        if self.rect.right >= WIDTH:
-            self.rect.right = WIDTH
-            self.vel_x = -abs(self.vel_x) * 0.9
-            
-            # 소리 처리 (나중에 추가)
-            if self.sound_cooldown == 0:
-                self.sound_cooldown = BOUNCE_SOUND_COOLDOWN
-        
-        # 네트 충돌
-        if self.rect.colliderect(net_rect):
-            # 왼쪽에서 오른쪽으로 가는 경우
-            if self.vel_x > 0 and self.rect.centerx < net_rect.centerx:
-                self.rect.right = net_rect.left
-                self.vel_x = -abs(self.vel_x) * 0.9
-            # 오른쪽에서 왼쪽으로 가는 경우
-            elif self.vel_x < 0 and self.rect.centerx > net_rect.centerx:
-                self.rect.left = net_rect.right
-                self.vel_x = abs(self.vel_x) * 0.9
-            # 위에서 아래로 가는 경우
-            elif self.vel_y > 0 and self.rect.centery < net_rect.top:
-                self.rect.bottom = net_rect.top
-                self.vel_y = -abs(self.vel_y) * 0.7  # 반발력 감소
-            # 아래에서 위로 가는 경우 (거의 발생하지 않음)
-            elif self.vel_y < 0 and self.rect.centery > net_rect.bottom:
-                self.rect.top = net_rect.bottom
-                self.vel_y = abs(self.vel_y) * 0.7  # 반발력 감소
-                
-            # 소리 처리 (나중에 추가)
-            if self.sound_cooldown == 0:
-                self.sound_cooldown = BOUNCE_SOUND_COOLDOWN
-        
-        # 피카추와 충돌
-        if pygame.sprite.collide_rect(self, pikachu1):
-            self.handle_pikachu_collision(pikachu1)
-            
-            # 연속 히트 시스템 - 공이 더 빨라지고 더 높이 튀게 됨
-            if self.last_hit_by == 1:
-                self.consecutive_hits += 1
-            else:
-                self.consecutive_hits = 1
-                
-            self.last_hit_by = 1
-        
-        if pygame.sprite.collide_rect(self, pikachu2):
-            self.handle_pikachu_collision(pikachu2)
-            
-            # 연속 히트 시스템 - 공이 더 빨라지고 더 높이 튀게 됨
-            if self.last_hit_by == 2:
-                self.consecutive_hits += 1
-            else:
-                self.consecutive_hits = 1
-                
-            self.last_hit_by = 2
-            
-        # 연속 히트에 따른 속도 보너스 (최대 3회)
-        bonus = min(self.consecutive_hits, 3) * 0.2
-        if self.consecutive_hits > 1:
-            # 속도 증가 (최대 제한 내에서)
-            max_x_vel = 12 * (1 + bonus)
-            if abs(self.vel_x) > max_x_vel:
-                self.vel_x = max_x_vel * (1 if self.vel_x > 0 else -1)
-                
-            # 점프 높이 증가 (최대 제한 내에서)
-            if self.vel_y < 0:  # 올라가는 중일 때만
-                self.vel_y *= (1 + bonus * 0.3)  # 높이 약간 증가
+    def sync(self, alpha):
+        """물리 틱 사이를 보간한 위치로 스프라이트를 옮기는 함수"""
+        x, y = self.state.interpolate(alpha)
+        self.rect.topleft = (round(x), round(y))
+
+def read_inputs(keys, player_num):
+    """키보드 상태를 한 플레이어의 입력 비트필드로 바꾸는 함수"""
+    if player_num == 1:
+        left, right, jump = pygame.K_a, pygame.K_d, pygame.K_w
+    else:
+        left, right, jump = pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP
+    inputs = 0
+    if keys[left]:
+        inputs |= INPUT_LEFT
+    if keys[right]:
+        inputs |= INPUT_RIGHT
+    if keys[jump]:
+        inputs |= INPUT_JUMP
+    return inputs
+
+def create_match(seed=None):
+    """스프라이트 크기에 맞춘 경기를 만드는 함수 (init_display 이후에 호출)"""
+    return PikaPhysics(seed, pikachu_size=pikachu1_img.get_size(), ball_size=ball_img.get_size())
+
+def create_sprites(match):
+    """경기 상태를 그리는 (피카추1, 피카추2, 공) 스프라이트를 만드는 함수"""
+    return Pikachu(match.pikachu1), Pikachu(match.pikachu2), Ball(match.ball)
+
+# 게임 요소 (init_display에서 만들어짐)
+physics = None
+pikachu1 = pikachu2 = ball = None
+
+def init_display():
+    """pygame, 창, 폰트, 이미지와 게임 요소를 준비하는 함수 (여러 번 불러도 한 번만 실행)"""
+    global screen, clock, font, images, pikachu1_img, pikachu2_img, ball_img, background_img, net_img
+    global physics, pikachu1, pikachu2, ball
+    if screen is not None:
+        return screen
     
-    def handle_pikachu_collision(self, pikachu):
-        # 충돌이 일어나면 주로 위로 튀기게 하되, 방향별 처리도 개선
-        
-        # 공을 친 횟수에 따른 보너스 효과
-        combo_bonus = min(self.consecutive_hits, 3) * 0.2
-        
-        # 위에서 아래로 충돌 (피카추 머리 위에서 충돌)
-        if self.rect.bottom >= pikachu.rect.top and self.rect.top < pikachu.rect.top:
-            # 위쪽 충돌 - 항상 위로 튕기게 함
-            self.rect.bottom = pikachu.rect.top
-            
-            # 점프 키를 누르고 있으면 더 강하게 튀기게 함
-            keys = pygame.key.get_pressed()
-            jump_pressed = False
-            
-            if pikachu.player_num == 1 and keys[pygame.K_w]:
-                jump_pressed = True
-            elif pikachu.player_num == 2 and keys[pygame.K_UP]:
-                jump_pressed = True
-                
-            if jump_pressed:
-                self.vel_y = -18 * (1 + combo_bonus)  # 강한 반발력 + 콤보 보너스
-            else:
-                self.vel_y = -12 * (1 + combo_bonus)  # 일반 반발력 + 콤보 보너스
-                
-            # 플레이어 움직임에 따라 공의 수평 속도 조정
-            if pikachu.vel_x != 0:
-                self.vel_x = pikachu.vel_x * 1.8  # 더 강하게 플레이어 방향으로 움직임
-            
-        # 측면 충돌 (왼쪽, 오른쪽)
-        elif abs(self.rect.right - pikachu.rect.left) < 15:
-            # 오른쪽에서 왼쪽으로 충돌
-            self.rect.right = pikachu.rect.left
-            self.vel_x = -abs(self.vel_x) - 2 * (1 + combo_bonus)  # 더 빠르게 반대 방향으로
-            self.vel_y = -8 * (1 + combo_bonus * 0.5)  # 약간 위로도 튀기게 함
-            
-        elif abs(self.rect.left - pikachu.rect.right) < 15:
-            # 왼쪽에서 오른쪽으로 충돌
-            self.rect.left = pikachu.rect.right
-            self.vel_x = abs(self.vel_x) + 2 * (1 + combo_bonus)  # 더 빠르게 반대 방향으로
-            self.vel_y = -8 * (1 + combo_bonus * 0.5)  # 약간 위로도 튀기게 함
-            
-        # 아래에서 위로 충돌 (피카추 아래에서 충돌 - 거의 발생 안함)
-        elif self.rect.top <= pikachu.rect.bottom and self.rect.bottom > pikachu.rect.bottom:
-            # 아래에서 위로 충돌 - 살짝 아래로 내려감
-            self.rect.top = pikachu.rect.bottom
-            self.vel_y = 4
-            
-        # 다른 모든 경우 - 일반적인 상향 반발
-        else:
-            # 기본 반응 - 항상 어느 정도 위로 튀기게 함
-            if self.vel_y > 0:  # 아래로 떨어지는 중이었다면
-                self.vel_y = -10 * (1 + combo_bonus * 0.5)
-            else:
-                self.vel_y -= 2 * (1 + combo_bonus)  # 더 높이 올라가게 함
-                
-            # 수평 속도에 영향
-            if abs(pikachu.vel_x) > 0:
-                self.vel_x = pikachu.vel_x * 1.2 * (1 + combo_bonus * 0.3)
-        
-        # 소리 처리 (나중에 추가)
-        if self.sound_cooldown == 0:
-            self.sound_cooldown = BOUNCE_SOUND_COOLDOWN
+    # 게임 초기화
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("피카추 배구")
+    if clock is None:
+        clock = pygame.time.Clock()
+    font = pygame.font.SysFont(None, 36)
     
-    def reset(self, server):
-        """득점 후 공을 재배치하는 함수"""
-        self.vel_y = -5
-        
-        if server == 1:
-            self.rect.x = WIDTH // 4
-            self.vel_x = random.choice([-3, 3])
-        else:
-            self.rect.x = 3 * WIDTH // 4
-            self.vel_x = random.choice([-3, 3])
-        
-        self.rect.y = HEIGHT // 3
-        self.last_hit_by = 0
+    # 게임 리소스 로드
+    # 리소스가 없으면 기본 도형으로 대체됩니다
+    try:
+        os.makedirs("assets", exist_ok=True)
+    except:
+        pass
+    images = load_images()
+    pikachu1_img = images['pikachu1']
+    pikachu2_img = images['pikachu2']
+    ball_img = images['ball']
+    background_img = images['background']
+    net_img = images['net']
+    
+    physics = create_match()
+    pikachu1, pikachu2, ball = create_sprites(physics)
+    return screen
+
+class GlowCache:
+    """콤보 발광 효과 이미지를 (반지름, 색상)별로 한 번만 그려 두고 재사용하는 캐시
+
+    전체 픽셀 메모리가 max_bytes를 넘으면 가장 오래 쓰지 않은 이미지부터 버립니다.
+    """
+
+    def __init__(self, max_bytes=4 << 20):
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def get(self, radius, color):
+        key = (radius, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(surface, (*color, 100), (radius, radius), radius)
+        self.surfaces[key] = surface
+        self.bytes += self.surface_bytes(surface)
+        # 방금 만든 이미지는 한도를 넘더라도 이번 프레임에 써야 하므로 남겨 둠
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, old = self.surfaces.popitem(last=False)
+            self.bytes -= self.surface_bytes(old)
+        return surface
+
+    def memory_usage(self):
+        """(이미지 수, 바이트 수)를 돌려주는 함수"""
+        return len(self.surfaces), self.bytes
+
+glow_cache = GlowCache()
+
+# 한 프레임이 너무 늦어져도 한 번에 따라잡을 최대 시간 (초)
+MAX_FRAME_TIME = 0.25
+
+# 리플레이 기록기 (경기마다 새 파일)
+recorder = None
 
-# 게임 요소 초기화
-pikachu1 = Pikachu(WIDTH // 4, HEIGHT - 150, 1)
-pikachu2 = Pikachu(3 * WIDTH // 4, HEIGHT - 150, 2)
-ball = Ball(WIDTH // 2, HEIGHT // 3)
+# 플레이어 2를 조종하는 컴퓨터 (--cpu로 난이도를 정하면 만들어짐)
+cpu = None
+
+# 네트워크 경기 (--host/--join으로 접속하면 만들어짐)
+session = None
+
+# 프레임 단계별 시간 측정 (F3: 오버레이, F4: 기록 내보내기)
+profiler = FrameProfiler()
+profile_path = None  # --profile로 지정하면 종료할 때 여기에 저장
+
+def glow_cache_info():
+    """F3 오버레이에 보여 줄 빛 효과 캐시의 크기와 적중 횟수"""
+    count, size = glow_cache.memory_usage()
+    return f"glow cache {count} surfaces {size / 1024:.0f} KiB, {glow_cache.hits} hits {glow_cache.misses} misses"
+
+profiler.info.append(glow_cache_info)
+
+def export_profile(path=None):
+    """측정한 프레임 기록을 파일로 저장하고 파일 이름을 돌려주는 함수"""
+    path = path or os.path.join('profiles', time.strftime('pika-%Y%m%d-%H%M%S.jsonl'))
+    return profiler.export(path)
+
+def handle_profiler_key(key):
+    if key == pygame.K_F3:
+        profiler.toggle_overlay()
+    elif key == pygame.K_F4 and profiler.frames:
+        print(f"프레임 기록 저장: {export_profile()}")
+
+def bind_sprites(match):
+    """스프라이트가 그릴 물리 상태를 연결하는 함수"""
+    pikachu1.state = match.pikachu1
+    pikachu2.state = match.pikachu2
+    ball.state = match.ball
+
+def draw_scene(match, alpha):
+    """경기 화면을 그리는 함수 (alpha는 물리 틱 사이의 보간 비율)"""
+    # 배경 그리기
+    screen.blit(background_img, (0, 0))
+    
+    # 바닥 그리기
+    pygame.draw.rect(screen, GREEN, (0, HEIGHT - 50, WIDTH, 50))
+    
+    # 네트 그리기
+    screen.blit(net_img, (WIDTH // 2 - net_img.get_width() // 2, HEIGHT - 50 - net_img.get_height()))
+    
+    # 점수 표시
+    score_text = render_text(font, f"{match.pikachu1.score} - {match.pikachu2.score}", WHITE)
+    screen.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, 20))
+    
+    pikachu1.sync(alpha)
+    pikachu2.sync(alpha)
+    ball.sync(alpha)
+    
+    if match.game_active:
+        # 연속 히트 카운트 표시
+        consecutive_hits = match.ball.consecutive_hits
+        if consecutive_hits > 1:
+            combo_color = (255, 255 - min(consecutive_hits * 30, 255), 0)  # 노란색에서 점점 붉은색으로
+            combo_text = render_text(font, f"콤보: {consecutive_hits}x", combo_color)
+            screen.blit(combo_text, (WIDTH // 2 - combo_text.get_width() // 2, 60))
+            
+            # 히트 횟수에 따라 공의 색상 변경 효과
+            if consecutive_hits >= 3:
+                glow_radius = 30 + (consecutive_hits - 3) * 5
+                glow_surf = glow_cache.get(glow_radius, combo_color)
+                screen.blit(glow_surf, (ball.rect.centerx - glow_radius, ball.rect.centery - glow_radius))
+    else:
+        # 게임 종료 화면
+        winner_text = render_text(font, f"피카추 {match.winner} 승리!", WHITE)
+        restart_text = render_text(font, "다시 시작하려면 스페이스바를 누르세요", WHITE)
+        screen.blit(winner_text, (WIDTH // 2 - winner_text.get_width() // 2, HEIGHT // 2 - 50))
+        screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2 + 20))
+    
+    # 요소 그리기
+    screen.blit(pikachu1.image, pikachu1.rect)
+    screen.blit(pikachu2.image, pikachu2.rect)
+    screen.blit(ball.image, ball.rect)
 
-# 네트 설정
-net_rect = pygame.Rect(WIDTH // 2 - 5, HEIGHT - 200, 10, 150)
+def record_confirmed(inputs1, inputs2):
+    """네트워크 경기에서 두 입력이 모두 확정된 틱만 리플레이에 기록하는 함수"""
+    if recorder:
+        recorder.record(inputs1, inputs2)
 
-# 폰트 설정
-font = pygame.font.SysFont(None, 36)
+def draw_net_stats():
+    """왕복 시간과 롤백 깊이를 화면 아래에 표시하는 함수"""
+    stats = session.stats
+    rtt = f"{stats.rtt_ms:.0f}ms" if stats.rtt_ms is not None else "-"
+    text = render_text(font, f"핑 {rtt}  롤백 {stats.last_depth}  멈춤 {stats.stalls}", WHITE)
+    screen.blit(text, (10, HEIGHT - 40))
 
-# 게임 상태
-game_active = True
-winner = None
-MAX_SCORE = 15
+def quit_game():
+    if session:
+        session.close()
+    if recorder:
+        recorder.close()
+    if profile_path:
+        export_profile(profile_path)
+    pygame.quit()
+    sys.exit()
 
 # 게임 메인 루프
-def main():
-    global game_active, winner
+def main(record=True, connection=None):
+    """connection이 (전송 계층, 시드, 내 플레이어 번호, 호스트의 인사 패킷)이면 네트워크 경기를 함"""
+    global session
+    init_display()
+    accumulator = 0.0
+    if connection:
+        transport, seed, local_player, hello = connection
+        reset_game(seed, record=record)
+        session = RollbackSession(physics, local_player, transport, on_confirmed=record_confirmed)
+        session.hello_reply = hello
+    else:
+        reset_game(record=record)
     
     while True:
+        profiler.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-                # 게임이 끝났을 때 스페이스바로 재시작
-                if not game_active and event.key == pygame.K_SPACE:
-                    reset_game()
-        
-        # 배경 그리기
-        screen.blit(background_img, (0, 0))
-        
-        # 바닥 그리기
-        pygame.draw.rect(screen, GREEN, (0, HEIGHT - 50, WIDTH, 50))
+                    quit_game()
+                # 게임이 끝났을 때 스페이스바로 재시작 (네트워크 경기는 한 판만)
+                if not physics.game_active and event.key == pygame.K_SPACE and not session:
+                    reset_game(record=record)
+                handle_profiler_key(event.key)
         
-        # 네트 그리기
-        screen.blit(net_img, (WIDTH // 2 - net_img.get_width() // 2, HEIGHT - 50 - net_img.get_height()))
-        
-        # 점수 표시
-        score_text = font.render(f"{pikachu1.score} - {pikachu2.score}", True, WHITE)
-        screen.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, 20))
-        
-        if game_active:
-            # 게임 요소 업데이트
-            pikachu1.update()
-            pikachu2.update()
-            ball.update(pikachu1, pikachu2, net_rect)
-            
-            # 연속 히트 카운트 표시
-            if ball.consecutive_hits > 1:
-                combo_color = (255, 255 - min(ball.consecutive_hits * 30, 255), 0)  # 노란색에서 점점 붉은색으로
-                combo_text = font.render(f"콤보: {ball.consecutive_hits}x", True, combo_color)
-                screen.blit(combo_text, (WIDTH // 2 - combo_text.get_width() // 2, 60))
-                
-                # 히트 횟수에 따라 공의 색상 변경 효과
-                if ball.consecutive_hits >= 3:
-                    glow_radius = 30 + (ball.consecutive_hits - 3) * 5
-                    glow_surf = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-                    pygame.draw.circle(glow_surf, (*combo_color, 100), (glow_radius, glow_radius), glow_radius)
-                    screen.blit(glow_surf, (ball.rect.centerx - glow_radius, ball.rect.centery - glow_radius))
-            
-            # 승자 확인
-            if pikachu1.score >= MAX_SCORE:
-                game_active = False
-                winner = "피카추 1"
-            elif pikachu2.score >= MAX_SCORE:
-                game_active = False
-                winner = "피카추 2"
-        else:
-            # 게임 종료 화면
-            winner_text = font.render(f"{winner} 승리!", True, WHITE)
-            restart_text = font.render("다시 시작하려면 스페이스바를 누르세요", True, WHITE)
-            screen.blit(winner_text, (WIDTH // 2 - winner_text.get_width() // 2, HEIGHT // 2 - 50))
-            screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2 + 20))
+        # 고정 시간 간격으로 물리 진행 - 렌더링이 프레임을 놓쳐도 시뮬레이션은 그대로
+        keys = pygame.key.get_pressed()
+        inputs1 = read_inputs(keys, 1)
+        inputs2 = read_inputs(keys, 2)
+        profiler.lap('events')
+        frame_ms = clock.tick(FPS)
+        profiler.lap('sleep')
+        accumulator += min(frame_ms / 1000, MAX_FRAME_TIME)
+        while accumulator >= TICK:
+            accumulator -= TICK
+            if session:
+                # 상대 입력이 너무 늦으면 이번 틱은 건너뜀 (다음 프레임에 다시 시도)
+                session.advance(inputs1 if session.local_player == 1 else inputs2)
+                continue
+            if cpu:
+                inputs2 = cpu.inputs(physics)
+            if physics.game_active and recorder:
+                recorder.record(inputs1, inputs2)
+            # 피카추와 공의 갱신 시간은 따로 기록 (CPU 입력, 녹화, 넷코드는 'physics')
+            profiler.lap('physics')
+            physics.step(inputs1, inputs2, profiler.lap if profiler.enabled else None)
+        if not physics.game_active and recorder and not session:
+            recorder.close()
+        profiler.lap('physics')
         
-        # 요소 그리기
-        screen.blit(pikachu1.image, pikachu1.rect)
-        screen.blit(pikachu2.image, pikachu2.rect)
-        screen.blit(ball.image, ball.rect)
+        draw_scene(physics, accumulator / TICK)
+        profiler.lap('draw_scene')
+        if session:
+            draw_net_stats()
+        profiler.draw_overlay(screen)
+        profiler.lap('overlay')
         
         # 화면 업데이트
         pygame.display.flip()
-        clock.tick(FPS)
+        profiler.lap('flip')
+        profiler.end_frame()
 
-def reset_game():
-    """게임을 초기 상태로 재설정하는 함수"""
-    global game_active, winner
+def reset_game(seed=None, record=True):
+    """게임을 초기 상태로 재설정하는 함수 (시드를 정하고 새 리플레이 기록을 시작)"""
+    global recorder
     
-    pikachu1.score = 0
-    pikachu2.score = 0
-    pikachu1.rect.x = WIDTH // 4
-    pikachu1.rect.y = HEIGHT - 150
-    pikachu2.rect.x = 3 * WIDTH // 4
-    pikachu2.rect.y = HEIGHT - 150
-    ball.reset(random.choice([1, 2]))
+    if recorder:
+        recorder.close()
+        recorder = None
+    if seed is None:
+        seed = random.getrandbits(64)
+    physics.reset(seed)
+    bind_sprites(physics)
+    if record:
+        recorder = ReplayWriter(new_replay_path(), seed, physics.pikachu_size, physics.ball_size)
+
+def play_replay(path, speed=1.0):
+    """리플레이 파일을 원하는 배속으로 보여주는 함수
+    
+    스페이스: 일시정지, 좌/우: 5초 이동, 위/아래: 배속 2배/절반, ESC: 종료
+    """
+    init_display()
+    player = ReplayPlayer(path)
+    bind_sprites(player.physics)
+    accumulator = 0.0
+    paused = False
     
-    game_active = True
-    winner = None
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_game()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    quit_game()
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.position - 5 * FPS)
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.position + 5 * FPS)
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+        
+        frame_time = min(clock.tick(FPS) / 1000, MAX_FRAME_TIME)
+        if not paused:
+            accumulator += frame_time * speed
+            while accumulator >= TICK and player.step():
+                accumulator -= TICK
+            if player.finished:
+                accumulator = 0.0
+        
+        draw_scene(player.physics, 0.0 if paused else min(accumulator / TICK, 1.0))
+        status = "일시정지" if paused else f"x{speed:g}"
+        replay_text = render_text(font, f"리플레이 {status}  {player.position / FPS:.1f} / {player.length / FPS:.1f}초",
+                                  WHITE)
+        screen.blit(replay_text, (10, HEIGHT - 40))
+        pygame.display.flip()
 
 # 게임 시작
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="피카추 배구")
+    parser.add_argument('--replay', help="리플레이 파일을 재생")
+    parser.add_argument('--speed', type=float, default=1.0, help="리플레이 배속")
+    parser.add_argument('--no-record', action='store_true', help="리플레이를 기록하지 않음")
+    parser.add_argument('--cpu', choices=sorted(DIFFICULTIES), help="플레이어 2를 컴퓨터가 조종 (난이도)")
+    parser.add_argument('--host', type=int, nargs='?', const=7777, metavar='PORT',
+                        help="네트워크 경기를 열고 상대를 기다림 (플레이어 1)")
+    parser.add_argument('--join', metavar='HOST[:PORT]', help="네트워크 경기에 접속 (플레이어 2)")
+    parser.add_argument('--sim-latency', type=float, default=0.0, metavar='MS', help="보내는 패킷을 MS만큼 늦춤 (시험용)")
+    parser.add_argument('--sim-loss', type=float, default=0.0, metavar='P', help="보내는 패킷을 P 확률로 버림 (시험용)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="프레임마다 단계별 시간을 재고 종료할 때 PATH(.jsonl 또는 .csv)에 저장")
+    args = parser.parse_args()
+    if args.profile:
+        profile_path = args.profile
+        profiler.enabled = True
+    if args.cpu:
+        cpu = CpuPlayer(2, args.cpu)
+    connection = None
+    if args.host is not None or args.join:
+        if args.host is not None:
+            print(f"포트 {args.host}에서 상대를 기다리는 중...")
+            transport, seed, hello = host(args.host)
+            local_player = 1
+        else:
+            transport, seed = join(parse_address(args.join))
+            hello = None
+            local_player = 2
+        if args.sim_latency or args.sim_loss:
+            transport = LossyTransport(transport, args.sim_latency, 0.0, args.sim_loss)
+        connection = (transport, seed, local_player, hello)
+    if args.replay:
+        play_replay(args.replay, args.speed)
+    else:
+        main(record=not args.no_record, connection=connection)
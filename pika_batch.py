@@ -0,0 +1,399 @@
+"""여러 경기를 한 번에 진행하는 벡터화된 피카추 배구 물리 엔진
+
+N개 경기의 피카추와 공 상태를 NumPy 배열(struct-of-arrays)에 담고, 한 번의
+step으로 모든 경기를 한 틱씩 진행합니다. 분기는 모두 마스크 연산으로 바꿨고,
+부동소수점 연산 순서까지 pika_physics의 PikachuState.update / BallState.update와
+같게 맞춰서 결과가 비트 단위로 일치합니다.
+
+    python pika_batch.py            # 속도 측정
+    python pika_batch.py --check    # 스칼라 엔진과의 일치 검사
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from pika_physics import (BALL_SIZE, BOUNCE_SOUND_COOLDOWN, FLOOR_Y, GRAVITY, HEIGHT,
+                          INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT, MAX_SCORE, PIKACHU_SIZE, WIDTH,
+                          PikaPhysics)
+
+# 경기마다 저장하는 상태 배열 이름
+STATE_FIELDS = (
+    'p1_x', 'p1_y', 'p1_vel_x', 'p1_vel_y', 'p1_jump', 'p1_score',
+    'p2_x', 'p2_y', 'p2_vel_x', 'p2_vel_y', 'p2_jump', 'p2_score',
+    'ball_x', 'ball_y', 'ball_vel_x', 'ball_vel_y',
+    'last_hit_by', 'consecutive_hits', 'sound_cooldown', 'active',
+)
+
+
+class PikaBatch:
+    def __init__(self, count, seed=None, pikachu_size=PIKACHU_SIZE, ball_size=BALL_SIZE):
+        self.count = count
+        self.pikachu_w, self.pikachu_h = pikachu_size
+        self.ball_w, self.ball_h = ball_size
+        # 네트 설정 (PikaPhysics와 같은 위치)
+        self.net_x, self.net_y, self.net_w, self.net_h = WIDTH // 2 - 5, HEIGHT - 200, 10, 150
+
+        self.p1_x = np.zeros(count)
+        self.p1_y = np.zeros(count)
+        self.p1_vel_x = np.zeros(count)
+        self.p1_vel_y = np.zeros(count)
+        self.p1_jump = np.zeros(count, dtype=bool)
+        self.p1_score = np.zeros(count, dtype=np.int32)
+        self.p2_x = np.zeros(count)
+        self.p2_y = np.zeros(count)
+        self.p2_vel_x = np.zeros(count)
+        self.p2_vel_y = np.zeros(count)
+        self.p2_jump = np.zeros(count, dtype=bool)
+        self.p2_score = np.zeros(count, dtype=np.int32)
+        self.ball_x = np.zeros(count)
+        self.ball_y = np.zeros(count)
+        self.ball_vel_x = np.zeros(count)
+        self.ball_vel_y = np.zeros(count)
+        self.last_hit_by = np.zeros(count, dtype=np.int8)
+        self.consecutive_hits = np.zeros(count, dtype=np.int32)
+        self.sound_cooldown = np.zeros(count, dtype=np.int32)
+        self.active = np.zeros(count, dtype=bool)
+        self.reset(seed)
+
+    def _serves(self, size):
+        """서브 방향(-3 또는 3)을 뽑는 함수"""
+        return np.where(self.rng.random(size) < 0.5, -3.0, 3.0)
+
+    def reset(self, seed=None, mask=None):
+        """모든 경기(또는 mask로 고른 경기)를 초기 상태로 재설정하는 함수"""
+        if seed is not None or mask is None:
+            self.rng = np.random.default_rng(seed)
+        index = np.arange(self.count) if mask is None else np.flatnonzero(mask)
+        self.p1_x[index] = WIDTH // 4
+        self.p1_y[index] = HEIGHT - 150
+        self.p2_x[index] = 3 * WIDTH // 4
+        self.p2_y[index] = HEIGHT - 150
+        for name in ('p1_vel_x', 'p1_vel_y', 'p1_jump', 'p1_score',
+                     'p2_vel_x', 'p2_vel_y', 'p2_jump', 'p2_score',
+                     'last_hit_by', 'consecutive_hits', 'sound_cooldown'):
+            getattr(self, name)[index] = 0
+        self.ball_x[index] = WIDTH // 2
+        self.ball_y[index] = HEIGHT // 3
+        self.ball_vel_x[index] = self._serves(len(index))
+        self.ball_vel_y[index] = -5.0
+        self.active[index] = True
+
+    def observe(self):
+        """(N, 14) 관측값 배열 - pika_env.OBSERVATION_FIELDS와 같은 순서"""
+        return np.stack([self.p1_x, self.p1_y, self.p1_vel_x, self.p1_vel_y,
+                         self.p2_x, self.p2_y, self.p2_vel_x, self.p2_vel_y,
+                         self.ball_x, self.ball_y, self.ball_vel_x, self.ball_vel_y,
+                         self.consecutive_hits, self.last_hit_by], axis=1)
+
+    def _update_pikachu(self, x, y, vel_x, vel_y, jump, inputs, min_x, max_x):
+        """피카추 한 명씩 모든 경기를 진행 (PikachuState.update와 같은 규칙)"""
+        left = (inputs & INPUT_LEFT) != 0
+        right = (inputs & INPUT_RIGHT) != 0
+        jump_pressed = (inputs & INPUT_JUMP) != 0
+
+        # 좌우 이동 / 점차 속도 감소
+        coasting = np.where(np.abs(vel_x) > 0.5, vel_x * 0.9, 0.0)
+        vel_x[:] = np.where(left, -7.0, np.where(right, 7.0, coasting))
+
+        # 점프, 공중 부스트, 점프 키를 놓으면 빨리 낙하
+        start_jump = jump_pressed & ~jump
+        boost = jump_pressed & jump & (vel_y > 0) & (y + self.pikachu_h < FLOOR_Y)
+        release = ~jump_pressed & (vel_y < 0)
+        vel_y[:] = np.where(start_jump, -15.0,
+                            np.where(boost, vel_y - 0.4, np.where(release, vel_y * 0.9, vel_y)))
+        jump |= start_jump
+
+        # 중력 적용, 최대 낙하 속도 제한
+        vel_y += GRAVITY
+        np.minimum(vel_y, 12.0, out=vel_y)
+
+        # 위치 업데이트
+        x += vel_x
+        y += vel_y
+
+        # 바닥 충돌 확인
+        floor = y + self.pikachu_h >= FLOOR_Y
+        y[floor] = FLOOR_Y - self.pikachu_h
+        vel_y[floor] = 0.0
+        jump &= ~floor
+
+        # 좌우 경계 확인
+        x[x <= min_x] = min_x
+        x[x + self.pikachu_w >= max_x] = max_x - self.pikachu_w
+
+    def _bounce(self, mask):
+        # 소리 처리 (나중에 추가)
+        self.sound_cooldown[mask & (self.sound_cooldown == 0)] = BOUNCE_SOUND_COOLDOWN
+
+    def _pikachu_collision(self, player_num, p_x, p_y, p_vel_x, jump_pressed):
+        """한 피카추와 부딪힌 공을 처리 (BallState.handle_pikachu_collision과 같은 규칙)"""
+        bx, by = self.ball_x, self.ball_y
+        vx, vy = self.ball_vel_x, self.ball_vel_y
+        bw, bh = self.ball_w, self.ball_h
+        pw, ph = self.pikachu_w, self.pikachu_h
+
+        hit = (bx < p_x + pw) & (p_x < bx + bw) & (by < p_y + ph) & (p_y < by + bh)
+        if not hit.any():
+            return
+
+        combo_bonus = np.minimum(self.consecutive_hits, 3) * 0.2
+        from_top = hit & (by + bh >= p_y) & (by < p_y)
+        rest = hit & ~from_top
+        from_right = rest & (np.abs(bx + bw - p_x) < 15)
+        rest &= ~from_right
+        from_left = rest & (np.abs(bx - (p_x + pw)) < 15)
+        rest &= ~from_left
+        from_below = rest & (by <= p_y + ph) & (by + bh > p_y + ph)
+        other = rest & ~from_below
+
+        # 위에서 아래로 충돌 - 항상 위로 튕기고, 점프 키를 누르면 더 강하게
+        strong = np.where(jump_pressed, -18 * (1 + combo_bonus), -12 * (1 + combo_bonus))
+        new_vy = np.where(from_top, strong, vy)
+        new_vx = np.where(from_top & (p_vel_x != 0), p_vel_x * 1.8, vx)
+        new_by = np.where(from_top, p_y - bh, by)
+
+        # 측면 충돌
+        side_vy = -8 * (1 + combo_bonus * 0.5)
+        new_vx = np.where(from_right, -np.abs(vx) - 2 * (1 + combo_bonus), new_vx)
+        new_vx = np.where(from_left, np.abs(vx) + 2 * (1 + combo_bonus), new_vx)
+        new_vy = np.where(from_right | from_left, side_vy, new_vy)
+        new_bx = np.where(from_right, p_x - bw, np.where(from_left, p_x + pw, bx))
+
+        # 아래에서 위로 충돌
+        new_by = np.where(from_below, p_y + ph, new_by)
+        new_vy = np.where(from_below, 4.0, new_vy)
+
+        # 다른 모든 경우 - 일반적인 상향 반발
+        other_vy = np.where(vy > 0, -10 * (1 + combo_bonus * 0.5), vy - 2 * (1 + combo_bonus))
+        new_vy = np.where(other, other_vy, new_vy)
+        new_vx = np.where(other & (np.abs(p_vel_x) > 0), p_vel_x * 1.2 * (1 + combo_bonus * 0.3), new_vx)
+
+        self.ball_x[:] = new_bx
+        self.ball_y[:] = new_by
+        self.ball_vel_x[:] = new_vx
+        self.ball_vel_y[:] = new_vy
+        self._bounce(hit)
+
+        # 연속 히트 시스템
+        repeat = self.last_hit_by == player_num
+        self.consecutive_hits[:] = np.where(hit, np.where(repeat, self.consecutive_hits + 1, 1),
+                                            self.consecutive_hits)
+        self.last_hit_by[hit] = player_num
+
+    def _update_ball(self, inputs1, inputs2):
+        """공을 진행 (BallState.update와 같은 규칙)"""
+        x, y, vx, vy = self.ball_x, self.ball_y, self.ball_vel_x, self.ball_vel_y
+        w, h = self.ball_w, self.ball_h
+
+        # 소리 쿨다운 감소
+        self.sound_cooldown[self.sound_cooldown > 0] -= 1
+
+        # 중력 적용, 공중에서 최대 속도 제한
+        vy += GRAVITY * 0.5
+        np.minimum(vy, 14.0, out=vy)
+        too_fast = np.abs(vx) > 12
+        vx[too_fast] = np.where(vx[too_fast] > 0, 12.0, -12.0)
+
+        # 위치 업데이트
+        x += vx
+        y += vy
+
+        # 바닥 충돌 - 득점 후 서브권을 얻은 쪽에서 재배치
+        floor = y + h >= FLOOR_Y
+        if floor.any():
+            left_side = floor & (x + w / 2 < WIDTH // 2)
+            right_side = floor & ~left_side
+            self.p2_score += left_side
+            self.p1_score += right_side
+            x[left_side] = 3 * WIDTH // 4
+            x[right_side] = WIDTH // 4
+            vx[floor] = self._serves(int(floor.sum()))
+            vy[floor] = -5.0
+            y[floor] = HEIGHT // 3
+            self.last_hit_by[floor] = 0
+            self.consecutive_hits[floor] = 0
+
+        # 천장 충돌 - 튕김 감소
+        ceiling = y <= 0
+        y[ceiling] = 0.0
+        vy[ceiling] = np.abs(vy[ceiling]) * 0.8
+        self._bounce(ceiling)
+
+        # 좌우 벽 충돌 - 튕김 감소
+        left_wall = x <= 0
+        x[left_wall] = 0.0
+        vx[left_wall] = np.abs(vx[left_wall]) * 0.9
+        self._bounce(left_wall)
+
+        right_wall = x + w >= WIDTH
+        x[right_wall] = WIDTH - w
+        vx[right_wall] = -np.abs(vx[right_wall]) * 0.9
+        self._bounce(right_wall)
+
+        # 네트 충돌
+        net_x, net_y, net_w, net_h = self.net_x, self.net_y, self.net_w, self.net_h
+        net_hit = (x < net_x + net_w) & (net_x < x + w) & (y < net_y + net_h) & (net_y < y + h)
+        if net_hit.any():
+            center_x = x + w / 2
+            center_y = y + h / 2
+            net_center_x = net_x + net_w / 2
+            from_left = net_hit & (vx > 0) & (center_x < net_center_x)
+            rest = net_hit & ~from_left
+            from_right = rest & (vx < 0) & (center_x > net_center_x)
+            rest &= ~from_right
+            from_above = rest & (vy > 0) & (center_y < net_y)
+            rest &= ~from_above
+            from_below = rest & (vy < 0) & (center_y > net_y + net_h)
+
+            x[from_left] = net_x - w
+            vx[from_left] = -np.abs(vx[from_left]) * 0.9
+            x[from_right] = net_x + net_w
+            vx[from_right] = np.abs(vx[from_right]) * 0.9
+            y[from_above] = net_y - h
+            vy[from_above] = -np.abs(vy[from_above]) * 0.7
+            y[from_below] = net_y + net_h
+            vy[from_below] = np.abs(vy[from_below]) * 0.7
+            self._bounce(net_hit)
+
+        # 피카추와 충돌 (1번을 처리한 뒤의 공으로 2번을 검사)
+        self._pikachu_collision(1, self.p1_x, self.p1_y, self.p1_vel_x, (inputs1 & INPUT_JUMP) != 0)
+        self._pikachu_collision(2, self.p2_x, self.p2_y, self.p2_vel_x, (inputs2 & INPUT_JUMP) != 0)
+
+        # 연속 히트에 따른 속도 보너스 (최대 3회)
+        combo = self.consecutive_hits > 1
+        if combo.any():
+            bonus = np.minimum(self.consecutive_hits, 3) * 0.2
+            max_x_vel = 12 * (1 + bonus)
+            clamp = combo & (np.abs(vx) > max_x_vel)
+            vx[clamp] = np.where(vx[clamp] > 0, max_x_vel[clamp], -max_x_vel[clamp])
+            rising = combo & (vy < 0)
+            vy[rising] *= (1 + bonus[rising] * 0.3)
+
+    def step(self, inputs1, inputs2):
+        """모든 경기를 한 틱 진행하고 (플레이어 1 기준 보상, 종료 여부) 배열을 돌려주는 함수"""
+        inputs1 = np.broadcast_to(np.asarray(inputs1, dtype=np.int64), (self.count,))
+        inputs2 = np.broadcast_to(np.asarray(inputs2, dtype=np.int64), (self.count,))
+        active = self.active.copy()
+        frozen = None
+        if not active.all():
+            # 끝난 경기는 그대로 멈춰 있어야 하므로 상태를 보관해 두었다가 되돌림
+            frozen = {name: getattr(self, name)[~active].copy() for name in STATE_FIELDS}
+        score1 = self.p1_score.copy()
+        score2 = self.p2_score.copy()
+
+        self._update_pikachu(self.p1_x, self.p1_y, self.p1_vel_x, self.p1_vel_y, self.p1_jump,
+                             inputs1, 0, WIDTH // 2 - 10)
+        self._update_pikachu(self.p2_x, self.p2_y, self.p2_vel_x, self.p2_vel_y, self.p2_jump,
+                             inputs2, WIDTH // 2 + 10, WIDTH)
+        self._update_ball(inputs1, inputs2)
+
+        if frozen is not None:
+            for name, values in frozen.items():
+                getattr(self, name)[~active] = values
+
+        # 승자 확인
+        self.active &= (self.p1_score < MAX_SCORE) & (self.p2_score < MAX_SCORE)
+        reward = (self.p1_score - score1) - (self.p2_score - score2)
+        return reward, ~self.active
+
+    def load_match(self, i, physics):
+        """스칼라 PikaPhysics의 상태를 i번째 경기로 복사하는 함수"""
+        for prefix, pikachu in (('p1', physics.pikachu1), ('p2', physics.pikachu2)):
+            getattr(self, prefix + '_x')[i] = pikachu.x
+            getattr(self, prefix + '_y')[i] = pikachu.y
+            getattr(self, prefix + '_vel_x')[i] = pikachu.vel_x
+            getattr(self, prefix + '_vel_y')[i] = pikachu.vel_y
+            getattr(self, prefix + '_jump')[i] = pikachu.jump
+            getattr(self, prefix + '_score')[i] = pikachu.score
+        ball = physics.ball
+        self.ball_x[i] = ball.x
+        self.ball_y[i] = ball.y
+        self.ball_vel_x[i] = ball.vel_x
+        self.ball_vel_y[i] = ball.vel_y
+        self.last_hit_by[i] = ball.last_hit_by
+        self.consecutive_hits[i] = ball.consecutive_hits
+        self.sound_cooldown[i] = ball.sound_cooldown
+        self.active[i] = physics.game_active
+
+    def store_match(self, i, physics):
+        """i번째 경기의 상태를 스칼라 PikaPhysics로 복사하는 함수"""
+        for prefix, pikachu in (('p1', physics.pikachu1), ('p2', physics.pikachu2)):
+            pikachu.x = float(getattr(self, prefix + '_x')[i])
+            pikachu.y = float(getattr(self, prefix + '_y')[i])
+            pikachu.vel_x = float(getattr(self, prefix + '_vel_x')[i])
+            pikachu.vel_y = float(getattr(self, prefix + '_vel_y')[i])
+            pikachu.jump = bool(getattr(self, prefix + '_jump')[i])
+            pikachu.score = int(getattr(self, prefix + '_score')[i])
+        ball = physics.ball
+        ball.x = float(self.ball_x[i])
+        ball.y = float(self.ball_y[i])
+        ball.vel_x = float(self.ball_vel_x[i])
+        ball.vel_y = float(self.ball_vel_y[i])
+        ball.last_hit_by = int(self.last_hit_by[i])
+        ball.consecutive_hits = int(self.consecutive_hits[i])
+        ball.sound_cooldown = int(self.sound_cooldown[i])
+        physics.game_active = bool(self.active[i])
+
+
+class _ServeFrom:
+    """스칼라 엔진의 서브 방향을 배치 엔진이 뽑은 값으로 맞추기 위한 대역"""
+
+    def __init__(self):
+        self.value = 3.0
+
+    def choice(self, options):
+        return self.value
+
+
+def check_conformance(matches=64, ticks=3000, seed=0):
+    """매 틱마다 배치 엔진과 스칼라 엔진의 결과가 정확히 같은지 확인하는 함수"""
+    batch = PikaBatch(matches, seed=seed)
+    scalar = PikaPhysics()
+    serve = _ServeFrom()
+    scalar.ball.rng = serve
+    rng = random.Random(seed)
+    before = PikaBatch(matches)
+    mismatches = 0
+    for _ in range(ticks):
+        inputs1 = np.array([rng.randrange(8) for _ in range(matches)])
+        inputs2 = np.array([rng.randrange(8) for _ in range(matches)])
+        for name in STATE_FIELDS:
+            getattr(before, name)[:] = getattr(batch, name)
+        batch.step(inputs1, inputs2)
+        for i in range(matches):
+            before.store_match(i, scalar)
+            serve.value = float(batch.ball_vel_x[i])
+            scalar.step(int(inputs1[i]), int(inputs2[i]))
+            expected = PikaBatch(1)
+            expected.load_match(0, scalar)
+            for name in STATE_FIELDS:
+                if getattr(expected, name)[0] != getattr(batch, name)[i]:
+                    mismatches += 1
+                    print(f"mismatch in {name}: match {i}, scalar {getattr(expected, name)[0]}, "
+                          f"batch {getattr(batch, name)[i]}")
+        batch.reset(mask=~batch.active)
+    return mismatches
+
+
+if __name__ == "__main__":
+    if '--check' in sys.argv:
+        failures = check_conformance()
+        print("conformance ok" if not failures else f"{failures} mismatches")
+        sys.exit(1 if failures else 0)
+
+    # 무작위 입력으로 속도 측정
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ticks = 600
+    batch = PikaBatch(count, seed=0)
+    rng = np.random.default_rng(0)
+    inputs = rng.integers(0, 8, size=(ticks, 2, count))
+    start = time.perf_counter()
+    for tick in range(ticks):
+        _, done = batch.step(inputs[tick, 0], inputs[tick, 1])
+        if done.any():
+            batch.reset(mask=done)
+    elapsed = time.perf_counter() - start
+    print(f"{count} matches x {ticks} ticks in {elapsed:.2f}s "
+          f"({count * ticks / elapsed / 1000:.0f} match-steps/ms)")
@@ -0,0 +1,101 @@
+"""컴퓨터가 조종하는 피카추
+
+매 틱 pika_predict로 공이 피카추 머리 높이까지 내려오는 시각과 위치를 구하고, 그곳으로
+달려가 때맞춰 점프합니다. 예측은 TrajectoryCache에 남아 있으므로 공이 예측 경로를 따라
+날아가는 동안에는 틱마다 경로 위에 있는지만 확인합니다.
+
+난이도는 반응 시간(새 궤적을 알아채기까지의 틱 수), 목표 위치 오차, 점프 확률,
+강타(점프 키를 누른 채로 받기) 여부로 정해집니다. 오차와 확률에는 물리 엔진과 별도의
+난수 생성기를 쓰므로 경기 결과와 리플레이에는 영향을 주지 않습니다.
+
+    cpu = CpuPlayer(2, 'normal')
+    physics.step(read_inputs(keys, 1), cpu.inputs(physics))
+"""
+import random
+from collections import namedtuple
+
+from pika_physics import FLOOR_Y, INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT, PIKACHU_SPEED, WIDTH
+from pika_predict import TrajectoryCache
+
+Difficulty = namedtuple('Difficulty', ['reaction', 'aim_error', 'jump_chance', 'spike'])
+
+DIFFICULTIES = {
+    'easy': Difficulty(reaction=20, aim_error=45, jump_chance=0.2, spike=False),
+    'normal': Difficulty(reaction=10, aim_error=20, jump_chance=0.6, spike=False),
+    'hard': Difficulty(reaction=3, aim_error=5, jump_chance=0.9, spike=True),
+}
+
+# 공이 머리 높이에 닿기 몇 틱 전에 점프할지
+JUMP_LEAD = 8
+# 공을 상대 코트 쪽으로 보내기 위해 공보다 자기 코트 쪽에 설 거리 (피카추 폭에 대한 비율)
+LEAN = 0.25
+# 목표와 이 거리 안이면 멈춤
+DEADZONE = PIKACHU_SPEED / 2
+
+
+class CpuPlayer:
+    def __init__(self, player_num, difficulty='normal', seed=None):
+        self.player_num = player_num
+        self.difficulty = DIFFICULTIES[difficulty] if isinstance(difficulty, str) else difficulty
+        self.rng = random.Random(seed)
+        self.cache = TrajectoryCache()
+        self.trajectory = None
+        self.noticed_at = 0
+        self.target_x = self.home_x()
+        self.error = 0.0
+        self.will_jump = False
+        self.intercept = None
+
+    def home_x(self):
+        """공이 상대 코트에 있을 때 기다리는 자리 (자기 코트 가운데)"""
+        return WIDTH / 4 if self.player_num == 1 else 3 * WIDTH / 4
+
+    def on_my_side(self, center_x):
+        return center_x < WIDTH / 2 if self.player_num == 1 else center_x > WIDTH / 2
+
+    def inputs(self, physics):
+        """이번 틱에 누를 입력 비트를 돌려주는 함수"""
+        if not physics.game_active:
+            return 0
+        me = physics.pikachu1 if self.player_num == 1 else physics.pikachu2
+        ball = physics.ball
+        tick = physics.tick
+
+        trajectory = self.cache.get(physics)
+        if trajectory is not self.trajectory:
+            # 새 궤적 - 반응 시간이 지나야 움직임을 바꿈
+            self.trajectory = trajectory
+            self.noticed_at = tick + self.difficulty.reaction
+            aim_error = self.difficulty.aim_error
+            self.error = self.rng.uniform(-aim_error, aim_error)
+            self.will_jump = self.rng.random() < self.difficulty.jump_chance
+            self.intercept = None
+
+        intercept = None
+        if tick >= self.noticed_at:
+            # 공이 서 있는 피카추 머리에 닿는 시각과 위치 (궤적마다 한 번, 그 시각이 지나면 다시)
+            intercept = self.intercept
+            if intercept is None or intercept[0] < tick:
+                intercept = self.intercept = trajectory.reach(FLOOR_Y - me.h - ball.h, tick)
+            if intercept is not None and self.on_my_side(intercept[1] + ball.w / 2):
+                lean = me.w * LEAN if self.player_num == 2 else -me.w * LEAN
+                self.target_x = intercept[1] + ball.w / 2 + lean + self.error
+            else:
+                intercept = None
+                self.target_x = self.home_x()
+
+        inputs = 0
+        dx = self.target_x - me.centerx
+        if dx < -DEADZONE:
+            inputs |= INPUT_LEFT
+        elif dx > DEADZONE:
+            inputs |= INPUT_RIGHT
+
+        if me.jump:
+            # 공중에서 점프 키를 누르고 있으면 공을 더 세게 받아침
+            if self.difficulty.spike and (me.vel_y < 0 or self.on_my_side(ball.centerx)):
+                inputs |= INPUT_JUMP
+        elif (intercept is not None and self.will_jump and intercept[0] - tick <= JUMP_LEAD
+              and abs(dx) < me.w / 2):
+            inputs |= INPUT_JUMP
+        return inputs
@@ -0,0 +1,111 @@
+"""피카추 배구 학습용 환경 (창 없이 최대 속도로 실행)
+
+    env = PikaEnv()
+    obs = env.reset(seed=1)
+    while True:
+        obs, reward, done = env.step(action_p1, action_p2)
+        if done:
+            break
+
+행동은 pika_physics의 INPUT_LEFT / INPUT_RIGHT / INPUT_JUMP 비트를 조합한 정수(0~7)입니다.
+보상은 플레이어 1 기준으로, 1이 득점하면 +1, 2가 득점하면 -1, 그 외에는 0입니다.
+렌더링은 기본적으로 꺼져 있고, render=True일 때만 pygame을 불러옵니다.
+"""
+import random
+import sys
+import time
+
+from pika_physics import FLOOR_Y, FPS, HEIGHT, WIDTH, PikaPhysics
+
+# 관측값 순서 (observe가 돌려주는 튜플의 각 항목)
+OBSERVATION_FIELDS = (
+    'p1_x', 'p1_y', 'p1_vel_x', 'p1_vel_y',
+    'p2_x', 'p2_y', 'p2_vel_x', 'p2_vel_y',
+    'ball_x', 'ball_y', 'ball_vel_x', 'ball_vel_y',
+    'consecutive_hits', 'last_hit_by',
+)
+ACTION_COUNT = 8
+
+
+class PikaEnv:
+    def __init__(self, render=False, render_fps=FPS, max_steps=None):
+        self.render_enabled = render
+        self.render_fps = render_fps  # 0이면 속도 제한 없이 그림
+        self.max_steps = max_steps
+        self.physics = PikaPhysics()
+        self.steps = 0
+        self._screen = None
+        self._clock = None
+
+    def reset(self, seed=None):
+        """새 경기를 시작하고 첫 관측값을 돌려주는 함수"""
+        self.physics.reset(seed)
+        self.steps = 0
+        return self.observe()
+
+    def observe(self):
+        physics = self.physics
+        p1, p2, ball = physics.pikachu1, physics.pikachu2, physics.ball
+        return (p1.x, p1.y, p1.vel_x, p1.vel_y,
+                p2.x, p2.y, p2.vel_x, p2.vel_y,
+                ball.x, ball.y, ball.vel_x, ball.vel_y,
+                ball.consecutive_hits, ball.last_hit_by)
+
+    def step(self, action_p1, action_p2):
+        """한 틱을 진행하고 (관측값, 보상, 종료 여부)를 돌려주는 함수"""
+        physics = self.physics
+        score1 = physics.pikachu1.score
+        score2 = physics.pikachu2.score
+        physics.step(action_p1, action_p2)
+        self.steps += 1
+
+        reward = (physics.pikachu1.score - score1) - (physics.pikachu2.score - score2)
+        done = not physics.game_active or (self.max_steps is not None and self.steps >= self.max_steps)
+        if self.render_enabled:
+            self.render()
+        return self.observe(), reward, done
+
+    def render(self):
+        """현재 상태를 단순한 도형으로 그리는 함수"""
+        import pygame
+        if self._screen is None:
+            pygame.init()
+            self._screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("피카추 배구 (환경)")
+            self._clock = pygame.time.Clock()
+        pygame.event.pump()
+
+        physics = self.physics
+        screen = self._screen
+        screen.fill((135, 206, 235))
+        pygame.draw.rect(screen, (0, 255, 0), (0, FLOOR_Y, WIDTH, HEIGHT - FLOOR_Y))
+        net = physics.net
+        pygame.draw.rect(screen, (0, 0, 0), (net.x, net.y, net.w, net.h))
+        for pikachu in (physics.pikachu1, physics.pikachu2):
+            pygame.draw.rect(screen, (255, 255, 0), (pikachu.x, pikachu.y, pikachu.w, pikachu.h))
+        ball = physics.ball
+        pygame.draw.circle(screen, (255, 0, 0), (round(ball.centerx), round(ball.centery)), ball.w // 2)
+        pygame.display.flip()
+        if self.render_fps:
+            self._clock.tick(self.render_fps)
+
+    def close(self):
+        if self._screen is not None:
+            import pygame
+            pygame.display.quit()
+            self._screen = None
+
+
+if __name__ == "__main__":
+    # 무작위 행동으로 초당 스텝 수를 측정
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    env = PikaEnv()
+    rng = random.Random(0)
+    env.reset(seed=0)
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done = env.step(rng.randrange(ACTION_COUNT), rng.randrange(ACTION_COUNT))
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    print(f"{steps} steps in {elapsed:.2f}s ({steps / elapsed / 1000:.0f} steps/ms)")
@@ -0,0 +1,466 @@
+"""두 컴퓨터가 UDP로 피카추 배구를 하는 롤백 넷코드
+
+입력 지연 없이 자기 입력은 바로 적용하고, 아직 도착하지 않은 상대 입력은 마지막으로 받은
+입력이 계속된다고 예측해서 진행합니다. 나중에 도착한 실제 입력이 예측과 다르면 그 틱의
+스냅샷(PikaPhysics.pack_state)으로 되돌린 뒤 현재 틱까지 다시 시뮬레이션합니다.
+스냅샷은 최근 max_rollback틱만 링 버퍼에 두므로, 상대보다 그만큼 앞서면 입력이 올 때까지
+멈춥니다(stall).
+
+패킷 (리틀 엔디언):
+    입력  : 매직 b'PV', 종류 0, 첫 틱(4바이트), 받은 상대 입력 수(4바이트), 개수(1바이트), 입력 바이트들
+    인사  : 매직 b'PV', 종류 1, 시드(8바이트)
+입력 패킷은 상대가 아직 받았다고 알려 오지 않은 입력을 모두 다시 담으므로, 패킷 몇 개가
+사라져도 다음 패킷이 빈 곳을 채웁니다.
+
+한 대의 리눅스 컴퓨터에서 시험하려면 지연과 손실을 흉내 내는 루프백 하네스를 씁니다.
+
+    python pika_net.py --latency 60 --jitter 15 --loss 0.1 --frames 3600
+"""
+import argparse
+import heapq
+import random
+import socket
+import struct
+import time
+from array import array
+
+from pika_physics import FPS, TICK, PikaPhysics
+
+DEFAULT_PORT = 7777
+MAX_ROLLBACK = 8
+# 입력을 보관하는 틱 수 (max_rollback과 왕복 지연보다 충분히 커야 함)
+INPUT_RING = 256
+MAX_INPUTS_PER_PACKET = 64
+HELLO_INTERVAL = 0.1  # 초
+CONNECT_TIMEOUT = 30.0
+
+MAGIC = b'PV'
+PACKET_INPUT = 0
+PACKET_HELLO = 1
+INPUT_HEADER = struct.Struct('<2sBIIB')
+HELLO = struct.Struct('<2sBQ')
+
+
+class UdpTransport:
+    """논블로킹 UDP 소켓 (peer가 없으면 처음 받은 패킷의 주소를 상대로 삼음)"""
+
+    def __init__(self, sock, peer=None):
+        sock.setblocking(False)
+        self.sock = sock
+        self.peer = peer
+
+    def send(self, data):
+        if self.peer is not None:
+            try:
+                self.sock.sendto(data, self.peer)
+            except OSError:
+                pass  # 상대가 아직 없거나 잠시 막힌 경우 - 다음 패킷이 다시 담아 보냄
+
+    def receive(self):
+        packets = []
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return packets
+            except OSError:
+                # 상대 포트가 닫혔다는 ICMP 응답 등 - 이번 호출은 여기까지
+                return packets
+            if self.peer is None:
+                self.peer = address
+            if address == self.peer:
+                packets.append(data)
+
+    def close(self):
+        self.sock.close()
+
+
+class LossyTransport:
+    """보내는 패킷을 latency ± jitter 밀리초 늦추고 loss 확률로 버리는 시험용 전송 계층"""
+
+    def __init__(self, transport, latency_ms=0.0, jitter_ms=0.0, loss=0.0, seed=None, clock=time.monotonic):
+        self.transport = transport
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.queue = []
+        self.sequence = 0
+        self.dropped = 0
+
+    def send(self, data):
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        self.sequence += 1
+        heapq.heappush(self.queue, (self.clock() + delay, self.sequence, data))
+        self.flush()
+
+    def flush(self):
+        now = self.clock()
+        queue = self.queue
+        while queue and queue[0][0] <= now:
+            self.transport.send(heapq.heappop(queue)[2])
+
+    def receive(self):
+        self.flush()
+        return self.transport.receive()
+
+    def close(self):
+        self.transport.close()
+
+
+class NetStats:
+    """롤백 깊이와 다시 시뮬레이션한 시간 (최근 capacity 프레임은 링 버퍼에 보관)"""
+
+    def __init__(self, max_rollback, capacity=600):
+        self.capacity = capacity
+        self.frames = 0
+        self.stalls = 0
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.depths = [0] * (max_rollback + 1)  # 롤백 깊이별 프레임 수
+        self.resim_ms = array('d', bytes(8 * capacity))
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.rtt_ms = None
+        self.last_depth = 0
+
+    def record(self, depth, resim_ms):
+        self.resim_ms[self.frames % self.capacity] = resim_ms
+        self.frames += 1
+        self.last_depth = depth
+        self.depths[min(depth, len(self.depths) - 1)] += 1
+        if depth:
+            self.rollbacks += 1
+            self.resimulated += depth
+
+    def add_rtt(self, sample_ms):
+        # 지수 이동 평균
+        self.rtt_ms = sample_ms if self.rtt_ms is None else self.rtt_ms * 0.9 + sample_ms * 0.1
+
+    def summary(self):
+        window = sorted(self.resim_ms[:min(self.frames, self.capacity)])
+        max_depth = max((depth for depth, count in enumerate(self.depths) if count), default=0)
+        return {
+            'frames': self.frames,
+            'stalls': self.stalls,
+            'rollbacks': self.rollbacks,
+            'mean_depth': self.resimulated / self.rollbacks if self.rollbacks else 0.0,
+            'max_depth': max_depth,
+            'depths': list(self.depths),
+            'resim_ms_p50': window[len(window) // 2] if window else 0.0,
+            'resim_ms_p99': window[min(len(window) - 1, len(window) * 99 // 100)] if window else 0.0,
+            'resim_ms_max': window[-1] if window else 0.0,
+            'packets_sent': self.packets_sent,
+            'packets_received': self.packets_received,
+            'rtt_ms': self.rtt_ms,
+        }
+
+
+class RollbackSession:
+    """한쪽 컴퓨터의 경기 진행 (local_player는 이 컴퓨터가 조종하는 피카추 번호)
+
+    on_confirmed(inputs1, inputs2)는 두 입력이 모두 확정된 틱마다 순서대로 한 번씩 불리므로
+    리플레이 기록에 그대로 쓸 수 있습니다.
+    """
+
+    def __init__(self, physics, local_player, transport, max_rollback=MAX_ROLLBACK, on_confirmed=None,
+                 clock=time.perf_counter):
+        self.physics = physics
+        self.local_player = local_player
+        self.transport = transport
+        self.max_rollback = max_rollback
+        self.on_confirmed = on_confirmed
+        self.clock = clock
+        self.stats = NetStats(max_rollback)
+        self.frame = 0           # 다음에 진행할 틱
+        self.remote_frame = 0    # 빠짐없이 받은 상대 입력 수
+        self.peer_ack = 0        # 상대가 빠짐없이 받은 내 입력 수
+        self.confirmed = 0       # on_confirmed로 넘긴 틱 수
+        self.local = bytearray(INPUT_RING)
+        self.remote = bytearray(INPUT_RING)
+        self.predicted = bytearray(INPUT_RING)  # 각 틱을 진행할 때 쓴 상대 입력
+        self.sent_at = array('d', bytes(8 * INPUT_RING))
+        self.snapshots = [None] * (max_rollback + 1)
+        self.hello_reply = None  # 호스트가 늦게 온 인사에 답할 패킷
+        self._rollback_from = None
+        self._rng_state = physics.rng.getstate()
+        self._rng_score = self._score()
+
+    def _score(self):
+        return self.physics.pikachu1.score + self.physics.pikachu2.score
+
+    def _save(self, frame):
+        # 난수는 득점해서 공을 재배치할 때만 쓰이므로 점수가 바뀌었을 때만 다시 저장
+        score = self._score()
+        if score != self._rng_score:
+            self._rng_state = self.physics.rng.getstate()
+            self._rng_score = score
+        self.snapshots[frame % len(self.snapshots)] = (self.physics.pack_state(), self._rng_state, score)
+
+    def _load(self, frame):
+        state, rng_state, score = self.snapshots[frame % len(self.snapshots)]
+        self.physics.unpack_state(state)
+        self.physics.rng.setstate(rng_state)
+        self._rng_state = rng_state
+        self._rng_score = score
+
+    def _simulate(self, frame):
+        """frame 틱을 (확정되었으면 실제, 아니면 예측한) 상대 입력으로 진행하는 함수"""
+        slot = frame % INPUT_RING
+        if frame < self.remote_frame:
+            remote = self.remote[slot]
+        elif self.remote_frame:
+            # 예측: 상대가 마지막으로 보낸 입력을 계속 누르고 있다고 봄
+            remote = self.remote[(self.remote_frame - 1) % INPUT_RING]
+        else:
+            remote = 0
+        self.predicted[slot] = remote
+        if self.local_player == 1:
+            self.physics.step(self.local[slot], remote)
+        else:
+            self.physics.step(remote, self.local[slot])
+
+    def _receive(self):
+        for data in self.transport.receive():
+            if len(data) >= HELLO.size and data[2] == PACKET_HELLO:
+                if self.hello_reply is not None:
+                    self.transport.send(self.hello_reply)
+                continue
+            if len(data) < INPUT_HEADER.size:
+                continue
+            magic, kind, start, ack, count = INPUT_HEADER.unpack_from(data)
+            if magic != MAGIC or kind != PACKET_INPUT:
+                continue
+            self.stats.packets_received += 1
+            if ack > self.peer_ack:
+                self.peer_ack = ack
+                self.stats.add_rtt((self.clock() - self.sent_at[(ack - 1) % INPUT_RING]) * 1000)
+            inputs = data[INPUT_HEADER.size:INPUT_HEADER.size + count]
+            for frame in range(max(start, self.remote_frame), start + len(inputs)):
+                if frame != self.remote_frame:
+                    break
+                value = inputs[frame - start]
+                slot = frame % INPUT_RING
+                self.remote[slot] = value
+                if frame < self.frame and self.predicted[slot] != value:
+                    if self._rollback_from is None or frame < self._rollback_from:
+                        self._rollback_from = frame
+                self.remote_frame += 1
+
+    def _rollback(self):
+        """예측이 틀린 가장 이른 틱으로 되돌려 현재 틱까지 다시 진행하고 깊이를 돌려주는 함수"""
+        start = self._rollback_from
+        self._rollback_from = None
+        if start is None:
+            return 0
+        self._load(start)
+        self._simulate(start)
+        for frame in range(start + 1, self.frame):
+            self._save(frame)
+            self._simulate(frame)
+        return self.frame - start
+
+    def _confirm(self):
+        if self.on_confirmed is None:
+            self.confirmed = min(self.remote_frame, self.frame)
+            return
+        while self.confirmed < self.remote_frame and self.confirmed < self.frame:
+            slot = self.confirmed % INPUT_RING
+            if self.local_player == 1:
+                self.on_confirmed(self.local[slot], self.remote[slot])
+            else:
+                self.on_confirmed(self.remote[slot], self.local[slot])
+            self.confirmed += 1
+
+    def _send(self):
+        start = self.peer_ack
+        end = min(self.frame, start + MAX_INPUTS_PER_PACKET)
+        inputs = bytes(self.local[frame % INPUT_RING] for frame in range(start, end))
+        self.transport.send(INPUT_HEADER.pack(MAGIC, PACKET_INPUT, start, self.remote_frame, len(inputs)) + inputs)
+        self.stats.packets_sent += 1
+
+    def poll(self):
+        """받은 입력을 반영(필요하면 롤백)하고 확정된 틱을 넘긴 뒤 롤백 깊이를 돌려주는 함수"""
+        self._receive()
+        depth = self._rollback()
+        self._confirm()
+        return depth
+
+    def advance(self, local_input):
+        """내 입력으로 한 틱을 진행하는 함수 (상대 입력을 너무 오래 못 받아 멈추면 False)"""
+        start = time.perf_counter()
+        depth = self.poll()
+        resim_ms = (time.perf_counter() - start) * 1000
+        if self.frame - self.remote_frame >= self.max_rollback:
+            self.stats.stalls += 1
+            self._send()
+            return False
+
+        frame = self.frame
+        slot = frame % INPUT_RING
+        self.local[slot] = local_input
+        self.sent_at[slot] = self.clock()
+        self._save(frame)
+        self._simulate(frame)
+        self.frame += 1
+        self._confirm()
+        self._send()
+        self.stats.record(depth, resim_ms)
+        return True
+
+    def settled(self):
+        """모든 틱이 확정된 입력으로 진행되었는지 (예측이 남아 있지 않은지)"""
+        return self.remote_frame >= self.frame and self._rollback_from is None
+
+    def close(self):
+        self.transport.close()
+
+
+def host(port=DEFAULT_PORT, seed=None, timeout=CONNECT_TIMEOUT):
+    """상대가 접속하기를 기다렸다가 (전송 계층, 시드, 인사 패킷)을 돌려주는 함수 (호스트는 플레이어 1)
+
+    인사 패킷은 RollbackSession.hello_reply에 넣어 두면 답장을 못 받은 상대가 다시 인사할 때 답합니다.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('', port))
+    transport = UdpTransport(sock)
+    hello = HELLO.pack(MAGIC, PACKET_HELLO, seed)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(data[:3] == MAGIC + bytes((PACKET_HELLO,)) for data in transport.receive()):
+            transport.send(hello)
+            return transport, seed, hello
+        time.sleep(HELLO_INTERVAL / 10)
+    transport.close()
+    raise TimeoutError(f"{timeout:.0f}초 동안 아무도 접속하지 않았습니다")
+
+
+def join(address, timeout=CONNECT_TIMEOUT):
+    """호스트에 접속해 (전송 계층, 시드)를 돌려주는 함수 (접속한 쪽은 플레이어 2)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    transport = UdpTransport(sock, address)
+    hello = HELLO.pack(MAGIC, PACKET_HELLO, 0)
+    deadline = time.monotonic() + timeout
+    next_hello = 0.0
+    while time.monotonic() < deadline:
+        if time.monotonic() >= next_hello:
+            transport.send(hello)
+            next_hello = time.monotonic() + HELLO_INTERVAL
+        for data in transport.receive():
+            if len(data) >= HELLO.size and data[:3] == MAGIC + bytes((PACKET_HELLO,)):
+                return transport, HELLO.unpack_from(data)[2]
+        time.sleep(HELLO_INTERVAL / 10)
+    transport.close()
+    raise TimeoutError(f"{address[0]}:{address[1]}에 접속하지 못했습니다")
+
+
+def parse_address(text):
+    """'host[:port]'를 (host, port)로 바꾸는 함수"""
+    name, _, port = text.rpartition(':') if ':' in text else (text, '', '')
+    return name, int(port) if port else DEFAULT_PORT
+
+
+def held_inputs(seed):
+    """한동안 같은 키를 누르고 있다가 가끔 바꾸는 사람 흉내 입력"""
+    rng = random.Random(seed)
+    value = 0
+    while True:
+        if rng.random() < 0.1:
+            value = rng.randrange(8)
+        yield value
+
+
+def run_loopback(frames=FPS * 60, latency_ms=50.0, jitter_ms=10.0, loss=0.05, max_rollback=MAX_ROLLBACK, seed=0):
+    """127.0.0.1의 UDP 소켓 두 개로 두 세션을 번갈아 진행하고 결과를 확인하는 함수
+
+    시간은 프레임마다 TICK씩 흐르는 가상 시계를 쓰므로 실행 속도와 상관없이 같은 지연이
+    적용됩니다. 마지막에는 입력을 모두 주고받을 때까지 기다린 뒤 두 컴퓨터의 상태와 확정된
+    입력 기록이 같은지, 그 기록을 처음부터 다시 시뮬레이션한 결과와도 같은지 확인합니다.
+    """
+    now = [0.0]
+    clock = lambda: now[0]
+    sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(2)]
+    for sock in sockets:
+        sock.bind(('127.0.0.1', 0))
+    logs = ([], [])
+    sessions = []
+    for i in range(2):
+        peer = sockets[1 - i].getsockname()
+        transport = LossyTransport(UdpTransport(sockets[i], peer), latency_ms, jitter_ms, loss,
+                                   seed=seed * 2 + i, clock=clock)
+        sessions.append(RollbackSession(PikaPhysics(seed), i + 1, transport, max_rollback,
+                                        on_confirmed=lambda a, b, log=logs[i]: log.append((a, b)), clock=clock))
+    players = [held_inputs(seed * 2 + i + 100) for i in range(2)]
+    pending = [next(players[0]), next(players[1])]
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        for i, session in enumerate(sessions):
+            # 멈춘 프레임에는 같은 입력을 다음 프레임에 다시 시도
+            if session.advance(pending[i]):
+                pending[i] = next(players[i])
+        now[0] += TICK
+    elapsed = time.perf_counter() - start
+
+    # 뒤처진 쪽을 따라잡게 한 뒤 남은 입력이 모두 도착할 때까지 주고받음
+    for _ in range(FPS * 60):
+        target = max(session.frame for session in sessions)
+        for session in sessions:
+            if session.frame < target:
+                session.advance(0)
+            else:
+                session.poll()
+                session._send()
+        now[0] += TICK
+        if all(session.settled() and session.frame == target for session in sessions):
+            break
+
+    states = [session.physics.pack_state() for session in sessions]
+    replay = PikaPhysics(seed)
+    for inputs1, inputs2 in logs[0]:
+        replay.step(inputs1, inputs2)
+    for session in sessions:
+        session.close()
+    return {
+        'frames': frames,
+        'elapsed_s': elapsed,
+        'in_sync': states[0] == states[1] and logs[0] == logs[1],
+        'replay_matches': replay.pack_state() == states[0],
+        'score': (sessions[0].physics.pikachu1.score, sessions[0].physics.pikachu2.score),
+        'dropped': [session.transport.dropped for session in sessions],
+        'stats': [session.stats.summary() for session in sessions],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="롤백 넷코드 루프백 시험 (지연과 패킷 손실을 흉내 냄)")
+    parser.add_argument('--frames', type=int, default=FPS * 60, help="진행할 프레임 수")
+    parser.add_argument('--latency', type=float, default=50.0, help="한 방향 지연 (ms)")
+    parser.add_argument('--jitter', type=float, default=10.0, help="지연 흔들림 (±ms)")
+    parser.add_argument('--loss', type=float, default=0.05, help="패킷 손실 확률")
+    parser.add_argument('--rollback', type=int, default=MAX_ROLLBACK, help="최대 롤백 프레임 수")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    result = run_loopback(args.frames, args.latency, args.jitter, args.loss, args.rollback, args.seed)
+    print(f"{result['frames']}프레임 {result['elapsed_s']:.2f}초, 점수 {result['score'][0]} : {result['score'][1]}, "
+          f"버린 패킷 {result['dropped'][0]} / {result['dropped'][1]}")
+    for player, stats in enumerate(result['stats'], 1):
+        rtt = f"{stats['rtt_ms']:.0f}ms" if stats['rtt_ms'] is not None else "-"
+        print(f"플레이어 {player}: 왕복 {rtt}, 롤백 {stats['rollbacks']}회 (평균 {stats['mean_depth']:.1f}, "
+              f"최대 {stats['max_depth']}프레임), 멈춤 {stats['stalls']}회, 재시뮬레이션 "
+              f"p50 {stats['resim_ms_p50']:.3f} / p99 {stats['resim_ms_p99']:.3f} / "
+              f"최대 {stats['resim_ms_max']:.3f}ms")
+    ok = result['in_sync'] and result['replay_matches']
+    print("동기화 확인: " + ("일치" if ok else "불일치"))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
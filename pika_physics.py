@@ -0,0 +1,487 @@
+"""피카추 배구 물리 엔진 (pygame 없이 동작)
+
+상태는 모두 실수(float)로 저장하고, 한 번의 step이 고정된 시간 간격(TICK) 하나를
+진행합니다. 속도 단위는 원래 게임과 같은 "틱당 픽셀"입니다.
+같은 시드와 같은 입력 순서를 주면 항상 같은 랠리가 재현됩니다.
+"""
+import random
+import struct
+
+# 화면 설정
+WIDTH, HEIGHT = 800, 600
+FLOOR_Y = HEIGHT - 50
+
+# 고정 시간 간격
+FPS = 60
+TICK = 1 / FPS
+
+# 중력 설정
+GRAVITY = 0.6  # 중력 약간 감소하여 공중에 더 오래 머물게 함
+
+# 피카추 속도 (틱당 픽셀)
+PIKACHU_SPEED = 7
+PIKACHU_JUMP_SPEED = 15
+
+# 공 속도 제한과 반발 계수
+BALL_MAX_FALL_SPEED = 14
+BALL_MAX_SPEED = 12
+CEILING_BOUNCE = 0.8
+WALL_BOUNCE = 0.9
+
+# 게임 상수
+BOUNCE_SOUND_COOLDOWN = 10  # 소리가 너무 자주 나지 않게
+MAX_SCORE = 15
+
+# 입력 비트 (플레이어마다 한 틱의 입력을 비트필드로 표현)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+
+# pack_state 형식: 틱, 진행 중, 승자(없으면 0) / 피카추 두 명 (위치, 속도, 이전 위치, 점프, 점수) /
+# 공 (위치, 속도, 이전 위치, 마지막 타자, 연속 히트, 소리 쿨다운)
+STATE = struct.Struct('<I?B 6d?B 6d?B 6dBIB')
+
+# 이미지가 없을 때 대체 도형의 크기
+PIKACHU_SIZE = (100, 100)
+BALL_SIZE = (50, 50)
+
+
+def colliderect(a, b):
+    """두 상자가 겹치는지 확인하는 함수 (pygame.Rect.colliderect와 같은 규칙)"""
+    return a.x < b.x + b.w and b.x < a.x + a.w and a.y < b.y + b.h and b.y < a.y + a.h
+
+
+def bounce_off_net(ball, net):
+    """네트와 겹친 공을 들어온 방향에 맞게 밀어내고 튕기는 함수"""
+    # 왼쪽에서 오른쪽으로 가는 경우
+    if ball.vel_x > 0 and ball.centerx < net.centerx:
+        ball.right = net.left
+        ball.vel_x = -abs(ball.vel_x) * 0.9
+    # 오른쪽에서 왼쪽으로 가는 경우
+    elif ball.vel_x < 0 and ball.centerx > net.centerx:
+        ball.left = net.right
+        ball.vel_x = abs(ball.vel_x) * 0.9
+    # 위에서 아래로 가는 경우
+    elif ball.vel_y > 0 and ball.centery < net.top:
+        ball.bottom = net.top
+        ball.vel_y = -abs(ball.vel_y) * 0.7  # 반발력 감소
+    # 아래에서 위로 가는 경우 (거의 발생하지 않음)
+    elif ball.vel_y < 0 and ball.centery > net.bottom:
+        ball.top = net.bottom
+        ball.vel_y = abs(ball.vel_y) * 0.7  # 반발력 감소
+
+
+class Body:
+    """실수 좌표를 가진 상자 (이전 틱의 위치는 보간 렌더링에 사용)"""
+    __slots__ = ('x', 'y', 'w', 'h', 'vel_x', 'vel_y', 'prev_x', 'prev_y')
+
+    def __init__(self, x, y, w, h):
+        self.x = float(x)
+        self.y = float(y)
+        self.w = w
+        self.h = h
+        self.vel_x = 0.0
+        self.vel_y = 0.0
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    @property
+    def left(self):
+        return self.x
+
+    @left.setter
+    def left(self, value):
+        self.x = value
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @right.setter
+    def right(self, value):
+        self.x = value - self.w
+
+    @property
+    def top(self):
+        return self.y
+
+    @top.setter
+    def top(self, value):
+        self.y = value
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @bottom.setter
+    def bottom(self, value):
+        self.y = value - self.h
+
+    @property
+    def centerx(self):
+        return self.x + self.w / 2
+
+    @property
+    def centery(self):
+        return self.y + self.h / 2
+
+    def save_previous(self):
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    def get_state(self):
+        return (self.x, self.y, self.vel_x, self.vel_y, self.prev_x, self.prev_y)
+
+    def set_state(self, state):
+        self.x, self.y, self.vel_x, self.vel_y, self.prev_x, self.prev_y = state
+
+    def interpolate(self, alpha):
+        """이전 틱과 현재 틱 사이의 위치를 돌려주는 함수"""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+
+# 피카추 상태
+class PikachuState(Body):
+    __slots__ = ('player_num', 'jump', 'score')
+
+    def __init__(self, x, y, player_num, size=PIKACHU_SIZE):
+        super().__init__(x, y, *size)
+        self.player_num = player_num
+        self.jump = False
+        self.score = 0
+
+    def get_state(self):
+        return super().get_state() + (self.jump, self.score)
+
+    def set_state(self, state):
+        super().set_state(state[:6])
+        self.jump, self.score = state[6:]
+
+    def update(self, inputs):
+        # 좌우 이동
+        if inputs & INPUT_LEFT:
+            self.vel_x = -PIKACHU_SPEED  # 속도 증가
+        elif inputs & INPUT_RIGHT:
+            self.vel_x = PIKACHU_SPEED  # 속도 증가
+        else:
+            # 점차 속도 감소
+            if abs(self.vel_x) > 0.5:
+                self.vel_x *= 0.9
+            else:
+                self.vel_x = 0
+
+        # 점프 (공중에서도 일정 시간마다 추가 점프 가능)
+        if inputs & INPUT_JUMP:
+            if not self.jump:
+                self.vel_y = -PIKACHU_JUMP_SPEED
+                self.jump = True
+            # 이미 점프 중일 때 작은 부스트 (공중에서 추가 조작)
+            elif self.vel_y > 0 and self.bottom < FLOOR_Y:
+                self.vel_y -= 0.4  # 낙하 속도 감소
+        # 점프 키를 계속 누르지 않으면 빨리 낙하
+        elif self.vel_y < 0:
+            self.vel_y *= 0.9  # 상승 중 점프 키를 놓으면 빨리 떨어짐
+
+        # 중력 적용
+        self.vel_y += GRAVITY
+
+        # 공중에서 최대 낙하 속도 제한
+        if self.vel_y > 12:
+            self.vel_y = 12
+
+        # 위치 업데이트
+        self.x += self.vel_x
+        self.y += self.vel_y
+
+        # 바닥 충돌 확인
+        if self.bottom >= FLOOR_Y:
+            self.bottom = FLOOR_Y
+            self.vel_y = 0
+            self.jump = False
+
+        # 좌우 경계 확인
+        if self.player_num == 1:
+            # 플레이어 1은 코트 왼쪽 절반에만 있을 수 있음
+            if self.left <= 0:
+                self.left = 0
+            if self.right >= WIDTH // 2 - 10:
+                self.right = WIDTH // 2 - 10
+        else:
+            # 플레이어 2는 코트 오른쪽 절반에만 있을 수 있음
+            if self.left <= WIDTH // 2 + 10:
+                self.left = WIDTH // 2 + 10
+            if self.right >= WIDTH:
+                self.right = WIDTH
+
+
+# 볼 상태
+class BallState(Body):
+    __slots__ = ('rng', 'last_hit_by', 'consecutive_hits', 'sound_cooldown')
+
+    def __init__(self, x, y, rng, size=BALL_SIZE):
+        super().__init__(x, y, *size)
+        self.rng = rng
+        self.vel_x = float(rng.choice([-3, 3]))
+        self.vel_y = -5.0
+        self.last_hit_by = 0  # 마지막으로 공을 친 플레이어
+        self.consecutive_hits = 0  # 연속 히트 카운트
+        self.sound_cooldown = 0  # 소리 쿨다운
+
+    def get_state(self):
+        return super().get_state() + (self.last_hit_by, self.consecutive_hits, self.sound_cooldown)
+
+    def set_state(self, state):
+        super().set_state(state[:6])
+        self.last_hit_by, self.consecutive_hits, self.sound_cooldown = state[6:]
+
+    def update(self, pikachu1, pikachu2, net, inputs1=0, inputs2=0):
+        # 소리 쿨다운 감소
+        if self.sound_cooldown > 0:
+            self.sound_cooldown -= 1
+
+        # 중력 적용 - 속도 제한 추가
+        self.vel_y += GRAVITY * 0.5
+
+        # 공중에서 최대 속도 제한
+        if self.vel_y > BALL_MAX_FALL_SPEED:
+            self.vel_y = BALL_MAX_FALL_SPEED
+        if abs(self.vel_x) > BALL_MAX_SPEED:
+            self.vel_x = BALL_MAX_SPEED * (1 if self.vel_x > 0 else -1)
+
+        # 위치 업데이트
+        self.x += self.vel_x
+        self.y += self.vel_y
+
+        # 바닥 충돌
+        if self.bottom >= FLOOR_Y:
+            # 득점 처리
+            if self.centerx < WIDTH // 2:
+                pikachu2.score += 1
+                self.reset(2)  # 플레이어 2가 득점하여 서브권 획득
+            else:
+                pikachu1.score += 1
+                self.reset(1)  # 플레이어 1이 득점하여 서브권 획득
+
+            # 연속 히트 카운트 리셋
+            self.consecutive_hits = 0
+
+        # 천장 충돌 - 튕김 감소
+        if self.top <= 0:
+            self.top = 0
+            self.vel_y = abs(self.vel_y) * CEILING_BOUNCE
+            self.play_bounce()
+
+        # 좌우 벽 충돌 - 튕김 감소
+        if self.left <= 0:
+            self.left = 0
+            self.vel_x = abs(self.vel_x) * WALL_BOUNCE
+            self.play_bounce()
+
+        if self.right >= WIDTH:
+            self.right = WIDTH
+            self.vel_x = -abs(self.vel_x) * WALL_BOUNCE
+            self.play_bounce()
+
+        # 네트 충돌
+        if colliderect(self, net):
+            bounce_off_net(self, net)
+            self.play_bounce()
+
+        # 피카추와 충돌
+        if colliderect(self, pikachu1):
+            self.handle_pikachu_collision(pikachu1, inputs1 & INPUT_JUMP)
+
+            # 연속 히트 시스템 - 공이 더 빨라지고 더 높이 튀게 됨
+            if self.last_hit_by == 1:
+                self.consecutive_hits += 1
+            else:
+                self.consecutive_hits = 1
+
+            self.last_hit_by = 1
+
+        if colliderect(self, pikachu2):
+            self.handle_pikachu_collision(pikachu2, inputs2 & INPUT_JUMP)
+
+            # 연속 히트 시스템 - 공이 더 빨라지고 더 높이 튀게 됨
+            if self.last_hit_by == 2:
+                self.consecutive_hits += 1
+            else:
+                self.consecutive_hits = 1
+
+            self.last_hit_by = 2
+
+        # 연속 히트에 따른 속도 보너스 (최대 3회)
+        bonus = min(self.consecutive_hits, 3) * 0.2
+        if self.consecutive_hits > 1:
+            # 속도 증가 (최대 제한 내에서)
+            max_x_vel = 12 * (1 + bonus)
+            if abs(self.vel_x) > max_x_vel:
+                self.vel_x = max_x_vel * (1 if self.vel_x > 0 else -1)
+
+            # 점프 높이 증가 (최대 제한 내에서)
+            if self.vel_y < 0:  # 올라가는 중일 때만
+                self.vel_y *= (1 + bonus * 0.3)  # 높이 약간 증가
+
+    def handle_pikachu_collision(self, pikachu, jump_pressed):
+        # 충돌이 일어나면 주로 위로 튀기게 하되, 방향별 처리도 개선
+
+        # 공을 친 횟수에 따른 보너스 효과
+        combo_bonus = min(self.consecutive_hits, 3) * 0.2
+
+        # 위에서 아래로 충돌 (피카추 머리 위에서 충돌)
+        if self.bottom >= pikachu.top and self.top < pikachu.top:
+            # 위쪽 충돌 - 항상 위로 튕기게 함
+            self.bottom = pikachu.top
+
+            # 점프 키를 누르고 있으면 더 강하게 튀기게 함
+            if jump_pressed:
+                self.vel_y = -18 * (1 + combo_bonus)  # 강한 반발력 + 콤보 보너스
+            else:
+                self.vel_y = -12 * (1 + combo_bonus)  # 일반 반발력 + 콤보 보너스
+
+            # 플레이어 움직임에 따라 공의 수평 속도 조정
+            if pikachu.vel_x != 0:
+                self.vel_x = pikachu.vel_x * 1.8  # 더 강하게 플레이어 방향으로 움직임
+
+        # 측면 충돌 (왼쪽, 오른쪽)
+        elif abs(self.right - pikachu.left) < 15:
+            # 오른쪽에서 왼쪽으로 충돌
+            self.right = pikachu.left
+            self.vel_x = -abs(self.vel_x) - 2 * (1 + combo_bonus)  # 더 빠르게 반대 방향으로
+            self.vel_y = -8 * (1 + combo_bonus * 0.5)  # 약간 위로도 튀기게 함
+
+        elif abs(self.left - pikachu.right) < 15:
+            # 왼쪽에서 오른쪽으로 충돌
+            self.left = pikachu.right
+            self.vel_x = abs(self.vel_x) + 2 * (1 + combo_bonus)  # 더 빠르게 반대 방향으로
+            self.vel_y = -8 * (1 + combo_bonus * 0.5)  # 약간 위로도 튀기게 함
+
+        # 아래에서 위로 충돌 (피카추 아래에서 충돌 - 거의 발생 안함)
+        elif self.top <= pikachu.bottom and self.bottom > pikachu.bottom:
+            # 아래에서 위로 충돌 - 살짝 아래로 내려감
+            self.top = pikachu.bottom
+            self.vel_y = 4
+
+        # 다른 모든 경우 - 일반적인 상향 반발
+        else:
+            # 기본 반응 - 항상 어느 정도 위로 튀기게 함
+            if self.vel_y > 0:  # 아래로 떨어지는 중이었다면
+                self.vel_y = -10 * (1 + combo_bonus * 0.5)
+            else:
+                self.vel_y -= 2 * (1 + combo_bonus)  # 더 높이 올라가게 함
+
+            # 수평 속도에 영향
+            if abs(pikachu.vel_x) > 0:
+                self.vel_x = pikachu.vel_x * 1.2 * (1 + combo_bonus * 0.3)
+
+        self.play_bounce()
+
+    def play_bounce(self):
+        # 소리 처리 (나중에 추가)
+        if self.sound_cooldown == 0:
+            self.sound_cooldown = BOUNCE_SOUND_COOLDOWN
+
+    def reset(self, server):
+        """득점 후 공을 재배치하는 함수"""
+        self.vel_y = -5.0
+
+        if server == 1:
+            self.x = float(WIDTH // 4)
+        else:
+            self.x = float(3 * WIDTH // 4)
+        self.vel_x = float(self.rng.choice([-3, 3]))
+
+        self.y = float(HEIGHT // 3)
+        self.last_hit_by = 0
+        # 순간이동한 위치는 보간하지 않음
+        self.save_previous()
+
+
+# 경기 전체 상태
+class PikaPhysics:
+    """두 피카추와 공, 네트를 고정 시간 간격으로 진행하는 시뮬레이션"""
+
+    def __init__(self, seed=None, pikachu_size=PIKACHU_SIZE, ball_size=BALL_SIZE):
+        self.pikachu_size = pikachu_size
+        self.ball_size = ball_size
+        # 네트 설정
+        self.net = Body(WIDTH // 2 - 5, HEIGHT - 200, 10, 150)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """게임을 초기 상태로 재설정하는 함수"""
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.pikachu1 = PikachuState(WIDTH // 4, HEIGHT - 150, 1, self.pikachu_size)
+        self.pikachu2 = PikachuState(3 * WIDTH // 4, HEIGHT - 150, 2, self.pikachu_size)
+        self.ball = BallState(WIDTH // 2, HEIGHT // 3, self.rng, self.ball_size)
+        self.tick = 0
+        self.game_active = True
+        self.winner = None
+
+    def snapshot(self):
+        """되돌아올 수 있도록 현재 상태 전체를 튜플로 저장하는 함수"""
+        return (self.tick, self.game_active, self.winner, self.rng.getstate(),
+                self.pikachu1.get_state(), self.pikachu2.get_state(), self.ball.get_state())
+
+    def restore(self, snapshot):
+        """snapshot으로 저장한 상태로 되돌리는 함수"""
+        (self.tick, self.game_active, self.winner, rng_state,
+         pikachu1, pikachu2, ball) = snapshot
+        self.rng.setstate(rng_state)
+        self.pikachu1.set_state(pikachu1)
+        self.pikachu2.set_state(pikachu2)
+        self.ball.set_state(ball)
+
+    def pack_state(self):
+        """난수 생성기를 뺀 상태를 STATE 형식의 바이트열로 저장하는 함수
+
+        snapshot보다 훨씬 작고 빨라서 매 틱 저장해도 부담이 없습니다. 난수는 득점 후
+        공을 재배치할 때만 쓰이므로, 필요하면 rng.getstate()를 따로 저장합니다.
+        """
+        p1, p2, ball = self.pikachu1, self.pikachu2, self.ball
+        return STATE.pack(self.tick, self.game_active, self.winner or 0,
+                          p1.x, p1.y, p1.vel_x, p1.vel_y, p1.prev_x, p1.prev_y, p1.jump, p1.score,
+                          p2.x, p2.y, p2.vel_x, p2.vel_y, p2.prev_x, p2.prev_y, p2.jump, p2.score,
+                          ball.x, ball.y, ball.vel_x, ball.vel_y, ball.prev_x, ball.prev_y,
+                          ball.last_hit_by, ball.consecutive_hits, ball.sound_cooldown)
+
+    def unpack_state(self, data):
+        """pack_state로 저장한 상태로 되돌리는 함수 (난수 생성기는 그대로)"""
+        values = STATE.unpack(data)
+        self.tick, self.game_active, winner = values[:3]
+        self.winner = winner or None
+        self.pikachu1.set_state(values[3:11])
+        self.pikachu2.set_state(values[11:19])
+        self.ball.set_state(values[19:28])
+
+    def step(self, inputs1, inputs2, lap=None):
+        """한 틱을 진행하는 함수 (inputs는 INPUT_* 비트의 조합)
+
+        lap을 주면 피카추와 공을 움직인 뒤 각각 lap('pikachu'), lap('ball')을 부릅니다
+        (FrameProfiler.lap으로 두 단계의 시간을 따로 잴 때 사용).
+        """
+        for body in (self.pikachu1, self.pikachu2, self.ball):
+            body.save_previous()
+        # 경기가 끝난 뒤에는 멈춘 위치를 그대로 그리도록 이전 위치만 맞춤
+        if not self.game_active:
+            return
+
+        # 게임 요소 업데이트
+        self.pikachu1.update(inputs1)
+        self.pikachu2.update(inputs2)
+        if lap:
+            lap('pikachu')
+        self.ball.update(self.pikachu1, self.pikachu2, self.net, inputs1, inputs2)
+        if lap:
+            lap('ball')
+        self.tick += 1
+
+        # 승자 확인
+        if self.pikachu1.score >= MAX_SCORE:
+            self.game_active = False
+            self.winner = 1
+        elif self.pikachu2.score >= MAX_SCORE:
+            self.game_active = False
+            self.winner = 2
@@ -0,0 +1,328 @@
+"""공의 궤적을 틱마다 시뮬레이션하지 않고 식으로 계산하는 예측기
+
+BallState.update에서 피카추와의 충돌을 빼고 보면 공은 다음처럼 움직입니다.
+  - 수직 속도: 매 틱 GRAVITY * 0.5를 더하고 BALL_MAX_FALL_SPEED에서 자름
+    콤보 중(consecutive_hits > 1)에는 올라가는 동안 매 틱 (1 + bonus * 0.3)배가 됨
+  - 수평 속도: BALL_MAX_SPEED로 자른 뒤 다음 접촉까지 일정
+  - 천장은 CEILING_BOUNCE, 좌우 벽은 WALL_BOUNCE로 튕기고, 네트는 bounce_off_net 규칙을 따름
+따라서 접촉과 접촉 사이의 한 구간에서 n틱 뒤의 위치는 등차/등비 수열의 합으로 바로
+구할 수 있습니다. predict는 구간마다 다음 접촉(천장, 벽, 네트)이 일어나는 틱을 이 식과
+이분 탐색으로 찾고, update와 같은 규칙으로 튕긴 뒤 다음 구간을 이어 붙여 공이 바닥에
+닿을 때까지의 경로를 만듭니다.
+
+피카추와의 충돌은 입력에 달려 있어 예측하지 않습니다. TrajectoryCache는 공이 예측한
+경로를 벗어날 때(피카추에게 맞았거나 득점 후 재배치되었을 때)만 다시 계산합니다.
+"""
+import math
+from collections import namedtuple
+
+from pika_physics import (BALL_MAX_FALL_SPEED, BALL_MAX_SPEED, CEILING_BOUNCE, FLOOR_Y, GRAVITY,
+                          WALL_BOUNCE, WIDTH, Body, bounce_off_net, colliderect)
+
+BALL_GRAVITY = GRAVITY * 0.5
+# 바닥에 닿지 않는 경로(예: 천장과 네트 사이를 오가는 공)를 끝까지 따라가지 않도록 하는 한계 (틱)
+MAX_HORIZON = 600
+# 실제 공이 예측 경로 위에 있는지 비교할 때 허용하는 오차 (픽셀)
+TOLERANCE = 1e-6
+
+# 예측한 접촉 (tick은 절대 틱, x와 y는 그 틱에 튕긴 뒤 공의 왼쪽 위 좌표)
+Contact = namedtuple('Contact', ['tick', 'kind', 'x', 'y', 'vel_x', 'vel_y'])
+
+
+def first_tick(condition, lo, hi=None):
+    """lo 이상에서 condition이 처음 참이 되는 정수를 찾는 함수 (condition은 단조 증가)
+
+    hi가 None이면 구간을 두 배씩 늘려 가며 찾고, MAX_HORIZON을 넘으면 None입니다.
+    """
+    if hi is None:
+        hi = max(lo, 1)
+        while not condition(hi):
+            if hi > MAX_HORIZON:
+                return None
+            lo = hi + 1
+            hi *= 2
+    elif hi < lo or not condition(hi):
+        return None
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if condition(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class Segment:
+    """접촉 없이 날아가는 한 구간 (start 틱의 상태에서 출발)
+
+    n틱째에 공이 움직이는 수직 속도를 w(n)이라 하면
+      - 콤보로 올라가는 동안(처음 rise틱): w(n+1) = k * w(n) + g 이므로
+        w(n) = w* + k^n (w(0) - w*), w* = -g / (k - 1)
+      - 그 뒤: w(n) = min(u + (n - rise + 1) * g, BALL_MAX_FALL_SPEED)
+    이고, 위치는 이 값들의 합입니다.
+    """
+    __slots__ = ('start', 'x', 'y', 'vel_x', 'vel_y', 'k', 'w0', 'w_fixed', 'rise', 'rise_y', 'u', 'descend')
+
+    def __init__(self, start, x, y, vel_x, vel_y, k):
+        self.start = start
+        self.x = x
+        self.y = y
+        self.vel_x = max(-BALL_MAX_SPEED, min(vel_x, BALL_MAX_SPEED))
+        self.vel_y = vel_y
+        self.k = k
+        g = BALL_GRAVITY
+        self.w0 = w0 = min(vel_y + g, BALL_MAX_FALL_SPEED)
+
+        # 콤보 상승 구간의 길이
+        if k > 1 and w0 < 0:
+            self.w_fixed = w_fixed = -g / (k - 1)
+            if w0 <= w_fixed:
+                # 계속 빨라지며 올라감 - 천장에 닿아야 끝남
+                self.rise = math.inf
+            else:
+                rise = max(1, math.ceil(math.log(-w_fixed / (w0 - w_fixed)) / math.log(k)))
+                # 로그의 반올림 오차 보정
+                while rise > 1 and self._rising_w(rise - 1) >= 0:
+                    rise -= 1
+                while self._rising_w(rise) < 0:
+                    rise += 1
+                self.rise = rise
+        else:
+            self.w_fixed = 0.0
+            self.rise = 0
+
+        if self.rise == 0:
+            self.u = vel_y
+            self.rise_y = 0.0
+        elif self.rise < math.inf:
+            self.u = k * self._rising_w(self.rise - 1)
+            self.rise_y = self._rising_sum(self.rise)
+        else:
+            self.u = 0.0
+            self.rise_y = 0.0
+        # 위치가 줄어드는(올라가는) 틱 수 - 이 뒤로는 y가 늘어나기만 함
+        self.descend = self.rise + max(0, math.ceil(-self.u / g) - 1) if self.rise < math.inf else math.inf
+
+    def _rising_w(self, n):
+        return self.w_fixed + self.k ** n * (self.w0 - self.w_fixed)
+
+    def _rising_sum(self, n):
+        return n * self.w_fixed + (self.w0 - self.w_fixed) * (self.k ** n - 1) / (self.k - 1)
+
+    def _falling_sum(self, n):
+        """상승 구간 뒤 n틱 동안의 이동 거리 (BALL_MAX_FALL_SPEED에서 잘림)"""
+        g = BALL_GRAVITY
+        u = self.u
+        capped = max(0, math.ceil((BALL_MAX_FALL_SPEED - u) / g) - 1)
+        m = min(n, capped)
+        return m * u + g * m * (m + 1) / 2 + (n - m) * BALL_MAX_FALL_SPEED
+
+    def y_at(self, n):
+        if n <= self.rise:
+            return self.y + (self._rising_sum(n) if n else 0.0)
+        return self.y + self.rise_y + self._falling_sum(n - self.rise)
+
+    def x_at(self, n):
+        return self.x + n * self.vel_x
+
+    def move_vel_y(self, n):
+        """n번째 틱(1부터)에 공을 움직인 수직 속도"""
+        if n <= self.rise:
+            return self._rising_w(n - 1)
+        return min(self.u + (n - self.rise) * BALL_GRAVITY, BALL_MAX_FALL_SPEED)
+
+    def vel_y_at(self, n):
+        """n틱 뒤 공에 저장되어 있을 수직 속도 (접촉이 없었다면)"""
+        if n == 0:
+            return self.vel_y
+        if n <= self.rise:
+            return self.k * self._rising_w(n - 1)
+        return self.move_vel_y(n)
+
+    def first_below(self, level, lo, hi=None, strict=False):
+        """lo~hi 틱 중 공의 y가 level 이상(strict면 초과)이 되는 첫 틱, 없으면 None"""
+        if strict:
+            below = lambda n: self.y_at(n) > level
+        else:
+            below = lambda n: self.y_at(n) >= level
+        if below(lo):
+            return lo
+        if self.descend == math.inf:
+            return None
+        # 올라가는 동안에는 더 낮아질 수 없으므로 꼭대기부터 찾음
+        return first_tick(below, max(lo, self.descend), hi)
+
+    def first_above(self, level, hi=None):
+        """1틱 이후 공의 y가 level 이하가 되는 첫 틱 (천장), 없으면 None"""
+        if self.descend == 0:
+            return None
+        above = lambda n: self.y_at(n) <= level
+        if self.descend == math.inf:
+            return first_tick(above, 1, hi)
+        return first_tick(above, 1, self.descend if hi is None else min(hi, self.descend))
+
+
+class Trajectory:
+    """예측한 구간들과 접촉 목록 (landing은 바닥에 닿는 Contact, 한계 안에 없으면 None)"""
+
+    def __init__(self, segments, contacts, landing):
+        self.segments = segments
+        self.contacts = contacts
+        self.landing = landing
+        self.end = landing.tick if landing else segments[0].start + MAX_HORIZON
+
+    def segment_at(self, tick):
+        segments = self.segments
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i].start <= tick:
+                return segments[i]
+        return None
+
+    def position_at(self, tick):
+        """tick에 공이 있을 왼쪽 위 좌표 (예측 범위 밖이면 None)"""
+        segment = self.segment_at(tick)
+        if segment is None or tick > self.end:
+            return None
+        n = tick - segment.start
+        return segment.x_at(n), segment.y_at(n)
+
+    def matches(self, ball, tick):
+        """tick에 공이 이 경로 위에 있는지 확인하는 함수"""
+        if tick > self.end:
+            return False
+        segment = self.segment_at(tick)
+        if segment is None:
+            return False
+        n = tick - segment.start
+        return (abs(ball.x - segment.x_at(n)) < TOLERANCE
+                and abs(ball.y - segment.y_at(n)) < TOLERANCE
+                and abs(ball.vel_y - segment.vel_y_at(n)) < TOLERANCE)
+
+    def reach(self, level, after):
+        """after 틱 이후 공의 y가 처음 level 이상이 되는 (틱, x), 없으면 None
+
+        피카추 머리 높이를 주면 공을 받을 수 있는 시각과 위치가 됩니다.
+        """
+        segments = self.segments
+        for i, segment in enumerate(segments):
+            stop = segments[i + 1].start if i + 1 < len(segments) else self.end
+            if stop < after:
+                continue
+            lo = max(after, segment.start) - segment.start
+            n = segment.first_below(level, lo, stop - segment.start)
+            if n is not None:
+                return segment.start + n, segment.x_at(n)
+        return None
+
+
+def predict(ball, net, tick):
+    """ball이 tick의 상태에서 바닥에 닿을 때까지의 경로를 계산하는 함수"""
+    w, h = ball.w, ball.h
+    combo = min(ball.consecutive_hits, 3) * 0.2
+    k = 1 + combo * 0.3 if ball.consecutive_hits > 1 else 1.0
+    segments = []
+    contacts = []
+    landing = None
+    scratch = Body(0, 0, w, h)
+    x, y, vel_x, vel_y = ball.x, ball.y, ball.vel_x, ball.vel_y
+    start = tick
+
+    while start - tick < MAX_HORIZON:
+        segment = Segment(start, x, y, vel_x, vel_y, k)
+        segments.append(segment)
+        vx = segment.vel_x
+        horizon = tick + MAX_HORIZON - start
+
+        # 이 구간에서 처음 일어나는 접촉의 틱 (바닥, 천장, 벽, 네트 중 가장 이른 것)
+        event = segment.first_below(FLOOR_Y - h, 1)
+        ceiling = segment.first_above(0)
+        if ceiling is not None and (event is None or ceiling < event):
+            event = ceiling
+        if vx < 0:
+            wall = max(1, math.ceil(-x / vx))
+        elif vx > 0:
+            wall = max(1, math.ceil((WIDTH - w - x) / vx))
+        else:
+            wall = None
+        if wall is not None:
+            # 나눗셈의 반올림 오차 보정 (update와 같은 비교식 사용)
+            hit_wall = (lambda n: x + n * vx <= 0) if vx < 0 else (lambda n: x + n * vx + w >= WIDTH)
+            while wall > 1 and hit_wall(wall - 1):
+                wall -= 1
+            while not hit_wall(wall):
+                wall += 1
+            if event is None or wall < event:
+                event = wall
+
+        # 네트: 가로로 겹치는 틱 구간 안에서 세로로도 겹치는 첫 틱
+        if vx > 0:
+            first = max(1, math.floor((net.x - w - x) / vx) + 1)
+            last = math.ceil((net.x + net.w - x) / vx) - 1
+        elif vx < 0:
+            first = max(1, math.floor((net.x + net.w - x) / vx) + 1)
+            last = math.ceil((net.x - w - x) / vx) - 1
+        elif net.x - w < x < net.x + net.w:
+            first, last = 1, horizon
+        else:
+            first, last = 1, 0
+        if event is not None:
+            last = min(last, event)
+        if first <= last:
+            n = segment.first_below(net.y - h, first, last, strict=True)
+            if n is not None and (event is None or n < event):
+                event = n
+
+        if event is None or event > horizon:
+            break
+
+        # 접촉한 틱의 상태에서 BallState.update와 같은 순서로 튕김
+        x = segment.x_at(event)
+        y = segment.y_at(event)
+        vel_x = vx
+        vel_y = segment.move_vel_y(event)
+        start += event
+        if y + h >= FLOOR_Y:
+            landing = Contact(start, 'floor', x, y, vel_x, vel_y)
+            break
+        kind = None
+        if y <= 0:
+            y = 0.0
+            vel_y = abs(vel_y) * CEILING_BOUNCE
+            kind = 'ceiling'
+        if x <= 0:
+            x = 0.0
+            vel_x = abs(vel_x) * WALL_BOUNCE
+            kind = 'wall'
+        if x + w >= WIDTH:
+            x = float(WIDTH - w)
+            vel_x = -abs(vel_x) * WALL_BOUNCE
+            kind = 'wall'
+        scratch.x, scratch.y, scratch.vel_x, scratch.vel_y = x, y, vel_x, vel_y
+        if colliderect(scratch, net):
+            bounce_off_net(scratch, net)
+            x, y, vel_x, vel_y = scratch.x, scratch.y, scratch.vel_x, scratch.vel_y
+            kind = 'net'
+        if k > 1 and vel_y < 0:
+            vel_y *= k
+        if kind is not None:
+            contacts.append(Contact(start, kind, x, y, vel_x, vel_y))
+
+    return Trajectory(segments, contacts, landing)
+
+
+class TrajectoryCache:
+    """공이 예측 경로를 벗어날 때만 다시 계산하는 예측 캐시"""
+
+    def __init__(self):
+        self.trajectory = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, physics):
+        trajectory = self.trajectory
+        if trajectory is not None and trajectory.matches(physics.ball, physics.tick):
+            self.hits += 1
+            return trajectory
+        self.misses += 1
+        self.trajectory = trajectory = predict(physics.ball, physics.net, physics.tick)
+        return trajectory
@@ -0,0 +1,130 @@
+"""피카추 배구 리플레이 파일 (기록, 재생, 탐색)
+
+파일 구조 (리틀 엔디언):
+    헤더  : 매직 b'PIKR', 버전(1바이트), 시드(8바이트), 피카추 크기(2x2바이트), 공 크기(2x2바이트)
+    본문  : 틱마다 1바이트 - 하위 3비트가 플레이어 1, 그 위 3비트가 플레이어 2의 입력 비트필드
+
+시뮬레이션이 결정적이므로 시드와 입력만 있으면 경기 전체를 다시 만들 수 있습니다.
+
+    python pika_replay.py replays/xxx.pikr    # 창 없이 최대 속도로 재시뮬레이션
+"""
+import os
+import struct
+import sys
+import time
+
+from pika_physics import PikaPhysics
+
+MAGIC = b'PIKR'
+VERSION = 1
+HEADER = struct.Struct('<4sBQHHHH')
+WRITE_BUFFER = 1 << 16
+SNAPSHOT_INTERVAL = 300  # 5초마다 상태 스냅샷
+REPLAY_DIR = 'replays'
+
+
+def pack_inputs(inputs1, inputs2):
+    return (inputs1 & 7) | (inputs2 & 7) << 3
+
+
+def unpack_inputs(packed):
+    return packed & 7, packed >> 3 & 7
+
+
+class ReplayWriter:
+    """경기 입력을 버퍼에 모았다가 한꺼번에 쓰는 기록기 (프레임마다 시스템 호출 없음)"""
+
+    def __init__(self, path, seed, pikachu_size, ball_size):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, 'wb', buffering=WRITE_BUFFER)
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, *pikachu_size, *ball_size))
+        self.ticks = 0
+
+    def record(self, inputs1, inputs2):
+        self.file.write(bytes((pack_inputs(inputs1, inputs2),)))
+        self.ticks += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def new_replay_path(directory=REPLAY_DIR):
+    return os.path.join(directory, time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}.pikr')
+
+
+def read_replay(path):
+    """리플레이 파일을 읽어 (시드, 피카추 크기, 공 크기, 입력 바이트열)을 돌려주는 함수"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"리플레이 파일이 너무 짧습니다: {path}")
+    magic, version, seed, pw, ph, bw, bh = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"리플레이 파일 형식이 아닙니다: {path}")
+    return seed, (pw, ph), (bw, bh), data[HEADER.size:]
+
+
+class ReplayPlayer:
+    """리플레이를 한 틱씩 재생하고, 스냅샷에서 다시 시뮬레이션하여 원하는 틱으로 이동"""
+
+    def __init__(self, path, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.seed, pikachu_size, ball_size, self.inputs = read_replay(path)
+        self.physics = PikaPhysics(self.seed, pikachu_size, ball_size)
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {0: self.physics.snapshot()}
+
+    @property
+    def length(self):
+        return len(self.inputs)
+
+    @property
+    def position(self):
+        return self.physics.tick
+
+    @property
+    def finished(self):
+        return self.position >= self.length
+
+    def step(self):
+        """다음 틱을 재생하는 함수 (끝에 도달하면 False)"""
+        tick = self.physics.tick
+        if tick >= self.length or not self.physics.game_active:
+            return False
+        self.physics.step(*unpack_inputs(self.inputs[tick]))
+        if self.physics.tick % self.snapshot_interval == 0:
+            self.snapshots.setdefault(self.physics.tick, self.physics.snapshot())
+        return True
+
+    def seek(self, tick):
+        """가장 가까운 이전 스냅샷으로 되돌린 뒤 tick까지 다시 시뮬레이션하는 함수"""
+        tick = max(0, min(tick, self.length))
+        start = max(t for t in self.snapshots if t <= tick)
+        if not start <= self.physics.tick <= tick:
+            self.physics.restore(self.snapshots[start])
+        while self.physics.tick < tick and self.step():
+            pass
+        # 이동한 위치는 보간하지 않음
+        for body in (self.physics.pikachu1, self.physics.pikachu2, self.physics.ball):
+            body.save_previous()
+
+    def run(self):
+        """남은 틱을 모두 최대 속도로 재생하는 함수"""
+        while self.step():
+            pass
+        return self.physics
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("사용법: python pika_replay.py <리플레이 파일>")
+        sys.exit(1)
+    start = time.perf_counter()
+    player = ReplayPlayer(sys.argv[1])
+    physics = player.run()
+    elapsed = time.perf_counter() - start
+    print(f"{player.length}틱 재시뮬레이션 {elapsed:.3f}초 - "
+          f"점수 {physics.pikachu1.score} : {physics.pikachu2.score}")
@@ -0,0 +1,84 @@
+"""Measure startup cost of the game modules, headless and with a window.
+
+Each case runs in a fresh interpreter, so module caches never hide the
+real cost. Headless cases only import the module. Windowed cases also
+call init_display(), which opens the window and loads fonts and images.
+Times are medians over --repeat runs; memory is the child's peak RSS.
+
+    python startup_bench.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module} as module
+imported = time.perf_counter()
+if {windowed}:
+    module.init_display()
+ready = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is kilobytes on Linux and bytes on macOS
+rss_kb = rss // 1024 if sys.platform == 'darwin' else rss
+print(json.dumps({{'import': imported - start, 'init': ready - imported, 'rss_kb': rss_kb}}))
+"""
+
+CASES = (
+    ('yacht_rules', False),
+    ('yacht_engine', False),
+    ('pika_physics', False),
+    ('pika_env', False),
+    ('yacht_game', False),
+    ('pika', False),
+    ('yacht_game', True),
+    ('pika', True),
+)
+
+
+def run_case(module, windowed, env):
+    code = CHILD.format(module=module, windowed=windowed)
+    output = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(repeat):
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    results = []
+    for module, windowed in CASES:
+        runs = [run_case(module, windowed, env) for _ in range(repeat)]
+        results.append({
+            'module': module,
+            'path': 'windowed' if windowed else 'headless',
+            'import_ms': statistics.median(run['import'] for run in runs) * 1000,
+            'init_ms': statistics.median(run['init'] for run in runs) * 1000,
+            'rss_mb': max(run['rss_kb'] for run in runs) / 1024,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time and memory of the game modules")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per case")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'module':<14}{'path':<10}{'import ms':>11}{'init ms':>10}{'peak MB':>10}")
+    for row in results:
+        print(f"{row['module']:<14}{row['path']:<10}{row['import_ms']:>11.1f}"
+              f"{row['init_ms']:>10.1f}{row['rss_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
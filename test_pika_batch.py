@@ -0,0 +1,5 @@
+from pika_batch import check_conformance
+
+
+def test_batch_matches_scalar_engine():
+    assert check_conformance(matches=16, ticks=1500, seed=1) == 0
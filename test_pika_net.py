@@ -0,0 +1,9 @@
+from pika_net import run_loopback
+
+
+def test_loopback_peers_stay_in_sync_under_loss():
+    result = run_loopback(frames=600, latency_ms=60.0, jitter_ms=15.0, loss=0.1, seed=3)
+    assert result['in_sync']
+    assert result['replay_matches']
+    assert sum(result['dropped']) > 0
+    assert sum(stats['rollbacks'] for stats in result['stats']) > 0
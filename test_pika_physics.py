@@ -0,0 +1,14 @@
+from pika_physics import INPUT_LEFT, INPUT_RIGHT, MAX_SCORE, PikaPhysics
+
+
+def test_bodies_stop_moving_after_game_over():
+    physics = PikaPhysics(0)
+    physics.step(0, 0)
+    physics.pikachu2.score = MAX_SCORE - 1
+    physics.ball.y = 10 ** 4  # Lands on the left side, so player 2 wins
+    physics.ball.x = 0
+    physics.step(INPUT_RIGHT, INPUT_LEFT)  # Both Pikachus are moving on the winning tick
+    assert not physics.game_active
+    physics.step(0, 0)
+    for body in (physics.pikachu1, physics.pikachu2, physics.ball):
+        assert body.interpolate(0.5) == (body.x, body.y)
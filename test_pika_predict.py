@@ -0,0 +1,46 @@
+import random
+
+from pika_physics import FLOOR_Y, WIDTH, PikaPhysics, colliderect
+from pika_predict import MAX_HORIZON, predict
+
+TOLERANCE = 1e-6
+
+
+def random_physics(rng):
+    """PikaPhysics with the ball in a random free-flight state away from the net and the Pikachus"""
+    physics = PikaPhysics(rng.randrange(1 << 30))
+    ball = physics.ball
+    while True:
+        ball.x = rng.uniform(0, WIDTH - ball.w)
+        ball.y = rng.uniform(0, FLOOR_Y - ball.h - 1)
+        if not any(colliderect(ball, body) for body in (physics.net, physics.pikachu1, physics.pikachu2)):
+            break
+    ball.vel_x = rng.uniform(-15, 15)
+    ball.vel_y = rng.uniform(-20, 12)
+    ball.consecutive_hits = rng.randrange(4)
+    ball.last_hit_by = rng.randrange(3)
+    return physics
+
+
+def test_trajectory_follows_the_simulation():
+    rng = random.Random(5)
+    landings = 0
+    for _ in range(300):
+        physics = random_physics(rng)
+        ball = physics.ball
+        trajectory = predict(ball, physics.net, physics.tick)
+        hits = (ball.last_hit_by, ball.consecutive_hits)
+        scores = (physics.pikachu1.score, physics.pikachu2.score)
+        for _ in range(MAX_HORIZON):
+            physics.step(0, 0)
+            if (physics.pikachu1.score, physics.pikachu2.score) != scores:
+                # The ball reached the floor and was served again
+                assert trajectory.landing is not None
+                assert trajectory.landing.tick == physics.tick
+                landings += 1
+                break
+            if (ball.last_hit_by, ball.consecutive_hits) != hits:
+                break  # A Pikachu hit the ball, which the predictor leaves out
+            x, y = trajectory.position_at(physics.tick)
+            assert abs(x - ball.x) < TOLERANCE and abs(y - ball.y) < TOLERANCE
+    assert landings > 100
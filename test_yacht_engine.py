@@ -0,0 +1,25 @@
+import random
+
+import numpy as np
+import pytest
+
+from yacht_engine import ALL_DICE, YachtEngine
+
+
+def test_keep_before_first_roll_is_rejected():
+    engine = YachtEngine(2, random.Random(0))
+    assert not engine.can_lock()
+    with pytest.raises(ValueError):
+        engine.roll(1)
+    with pytest.raises(ValueError):
+        engine.roll([True, False, False, False, False])
+    assert engine.rolls_left == 3
+
+
+def test_numpy_keep_mask():
+    engine = YachtEngine(2, random.Random(0))
+    engine.roll(np.uint8(0))
+    assert engine.can_lock()
+    kept = list(engine.dice)
+    assert engine.roll(np.int64(ALL_DICE)) == kept
+    assert engine.roll(np.array([True] * 5)) == kept
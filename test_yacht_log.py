@@ -0,0 +1,110 @@
+import os
+import random
+
+from yacht_log import GameLog, SCORE, replay, resume, seeded_engine
+from yacht_rules import CATEGORY_COUNT, DICE_COUNT
+
+# Keep every event in the buffer until the test syncs it
+NO_SYNC = {'sync_events': 10 ** 6, 'sync_interval': 10 ** 6, 'snapshot_events': 10 ** 6}
+
+
+def state(engine, locks):
+    return (engine.turn, engine.current_player, engine.rolls_left, engine.game_over, list(engine.dice),
+            [dict(card.scores) for card in engine.scorecards], locks)
+
+
+def play(engine, log, rng, events):
+    """Take random actions through the engine and log them, like the UI does"""
+    for _ in range(events):
+        if engine.game_over:
+            break
+        if engine.can_lock() and rng.random() < 0.4:
+            die = rng.randrange(DICE_COUNT)
+            log.lock(die, not log.locks >> die & 1)
+        elif engine.can_roll() and (not engine.can_lock() or rng.random() < 0.5):
+            keep_mask = log.locks if engine.can_lock() else 0
+            log.roll(keep_mask, engine.roll(keep_mask))
+        else:
+            category = rng.choice(engine.open_categories())
+            log.score(category, engine.score(category))
+
+
+def new_game(tmp_path, seed=7, **options):
+    engine = seeded_engine(3, seed)
+    return engine, GameLog.create(engine, seed, str(tmp_path / 'game.ylog'), **options)
+
+
+def test_crash_loses_only_the_unsynced_buffer(tmp_path):
+    rng = random.Random(1)
+    engine, log = new_game(tmp_path, **NO_SYNC)
+    play(engine, log, rng, 40)
+    log.sync()
+    synced = state(engine, log.locks)
+    play(engine, log, rng, 10)
+    assert log.buffer
+    log.file.close()  # Crash: the buffer never reaches the file
+
+    engine, locks, log = resume(log.path)
+    log.close()
+    assert state(engine, locks) == synced
+
+
+def test_torn_tail_is_cut_off(tmp_path):
+    rng = random.Random(2)
+    engine, log = new_game(tmp_path, **NO_SYNC)
+    play(engine, log, rng, 30)
+    log.close()
+    expected = state(engine, log.locks)
+    size = os.path.getsize(log.path)
+    with open(log.path, 'ab') as f:
+        f.write(b'\x01\x00')  # First two bytes of a roll record
+
+    engine, locks, log = resume(log.path)
+    assert state(engine, locks) == expected
+    assert log.size == size
+    log.close()
+    assert os.path.getsize(log.path) == size
+
+
+def test_resume_with_and_without_snapshot(tmp_path):
+    rng = random.Random(3)
+    engine, log = new_game(tmp_path, snapshot_events=8)
+    play(engine, log, rng, 61)
+    log.close()
+    expected = state(engine, log.locks)
+    assert os.path.exists(log.path + '.snap')
+
+    engine, locks, log = resume(log.path)
+    log.close()
+    assert state(engine, locks) == expected
+
+    # A damaged snapshot is ignored and the whole log is replayed
+    with open(log.path + '.snap', 'r+b') as f:
+        f.seek(10)
+        f.write(b'\xff')
+    engine, locks, log = resume(log.path)
+    log.close()
+    assert state(engine, locks) == expected
+
+    os.remove(log.path + '.snap')
+    engine, locks, log = resume(log.path)
+    log.close()
+    assert state(engine, locks) == expected
+
+
+def test_resumed_game_replays_to_the_same_result(tmp_path):
+    rng = random.Random(4)
+    engine, log = new_game(tmp_path, snapshot_events=16)
+    play(engine, log, rng, 100)
+    log.close()
+
+    engine, locks, log = resume(log.path, snapshot_events=16)
+    play(engine, log, rng, 10 ** 4)
+    log.close()
+    assert engine.game_over
+
+    scored = 0
+    for event, replayed, locks in replay(log.path):
+        scored += event.kind == SCORE
+    assert scored == 3 * CATEGORY_COUNT
+    assert state(replayed, locks) == state(engine, 0)
@@ -0,0 +1,82 @@
+import random
+from functools import lru_cache
+from itertools import product
+
+import pytest
+
+from yacht_odds import TurnOdds
+from yacht_rules import CATEGORY_COUNT, DICE_COUNT, MAX_ROLLS, score_vector
+
+
+def final_values(dice):
+    return tuple((1.0 if points > 0 else 0.0, float(points)) for points in score_vector(list(dice)))
+
+
+def best_of(*options):
+    return tuple((max(option[c][0] for option in options), max(option[c][1] for option in options))
+                 for c in range(CATEGORY_COUNT))
+
+
+@lru_cache(maxsize=None)
+def best(dice, rolls_left):
+    """Brute force: stop now or try every one of the 32 keep masks, per category"""
+    options = [final_values(dice)]
+    if rolls_left:
+        for mask in range(1 << DICE_COUNT):
+            kept = tuple(sorted(d for i, d in enumerate(dice) if mask >> i & 1))
+            options.append(after_roll(kept, rolls_left - 1))
+    return best_of(*options)
+
+
+@lru_cache(maxsize=None)
+def after_roll(kept, rolls_left):
+    """Brute force average over every ordered outcome of the rerolled dice"""
+    rerolled = DICE_COUNT - len(kept)
+    total = [[0.0, 0.0] for _ in range(CATEGORY_COUNT)]
+    for outcome in product(range(1, 7), repeat=rerolled):
+        values = best(tuple(sorted(kept + outcome)), rolls_left)
+        for c in range(CATEGORY_COUNT):
+            total[c][0] += values[c][0]
+            total[c][1] += values[c][1]
+    return tuple((p / 6 ** rerolled, e / 6 ** rerolled) for p, e in total)
+
+
+def expected(dice, locked, rolls_left):
+    kept = tuple(sorted(d for d, lock in zip(dice, locked) if lock))
+    if rolls_left == MAX_ROLLS:
+        return after_roll(kept, rolls_left - 1)
+    if rolls_left == 0:
+        return final_values(dice)
+    return best_of(final_values(dice), after_roll(kept, rolls_left - 1))
+
+
+def assert_matches(odds, reference):
+    probabilities, scores = odds
+    for c in range(CATEGORY_COUNT):
+        assert probabilities[c] == pytest.approx(reference[c][0], abs=1e-12)
+        assert scores[c] == pytest.approx(reference[c][1], abs=1e-12)
+
+
+@pytest.fixture(scope='module')
+def table():
+    return TurnOdds()
+
+
+def test_odds_match_brute_force(table):
+    rng = random.Random(0)
+    for _ in range(40):
+        dice = [rng.randint(1, 6) for _ in range(DICE_COUNT)]
+        locked = [rng.random() < 0.5 for _ in range(DICE_COUNT)]
+        rolls_left = rng.randint(0, MAX_ROLLS)
+        assert_matches(table.odds(dice, locked, rolls_left), expected(dice, locked, rolls_left))
+
+
+def test_dice_on_the_table_can_be_scored(table):
+    probabilities, scores = table.odds([6] * DICE_COUNT, [False] * DICE_COUNT, 2)
+    assert probabilities[-1] == 1.0
+    assert scores[-1] == 50.0
+
+
+def test_opening_roll(table):
+    probabilities, _ = table.odds([1] * DICE_COUNT, [False] * DICE_COUNT, MAX_ROLLS)
+    assert probabilities[-1] == pytest.approx(0.0460286425, abs=1e-9)
@@ -0,0 +1,35 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from yacht_rules import CATEGORY_NAMES, ScoreCard, _reference_score, score_batch
+
+ALL_ROLLS = list(product(range(1, 7), repeat=5))
+
+
+def test_score_table_matches_reference():
+    card = ScoreCard()
+    for roll in ALL_ROLLS:
+        for category in CATEGORY_NAMES:
+            assert card.calculate_possible_score(category, list(roll)) == _reference_score(category, list(roll))
+
+
+def test_score_batch_matches_reference():
+    scores = score_batch(np.array(ALL_ROLLS))
+    expected = [[_reference_score(category, list(roll)) for category in CATEGORY_NAMES] for roll in ALL_ROLLS]
+    assert scores.shape == (len(ALL_ROLLS), len(CATEGORY_NAMES))
+    assert (scores == np.array(expected)).all()
+
+
+@pytest.mark.parametrize('rolls', [
+    np.ones((4, 4), dtype=int),
+    np.ones(5, dtype=int),
+    np.ones((2, 5, 1), dtype=int),
+    np.array([[1, 2, 3, 4, 7]]),
+    np.array([[0, 2, 3, 4, 5]]),
+    np.array([[1.0, 2.0, 3.0, 4.0, 5.0]]),
+])
+def test_score_batch_rejects_bad_input(rolls):
+    with pytest.raises(ValueError):
+        score_batch(rolls)
@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+from yacht_server import Client, YachtServer
+
+
+def replies(lines):
+    """Feed request lines to a server from one client and return the replies it queued"""
+    async def run():
+        server = YachtServer(seed=0)
+        client = Client(None)
+        for line in lines:
+            server.handle_line(client, line)
+        return [json.loads(data) for data in client.out]
+    return asyncio.run(run())
+
+
+def test_deeply_nested_request_gets_an_error_reply():
+    reply, = replies([b'[' * 100000 + b'\n'])
+    assert reply['type'] == 'error'
+
+
+def test_lock_before_first_roll_is_rejected():
+    requests = [{'op': 'join', 'seats': 1, 'id': 1}, {'op': 'lock', 'dice': [0], 'id': 2},
+                {'op': 'roll', 'id': 3}, {'op': 'lock', 'dice': [0], 'id': 4}]
+    answers = {reply['id']: reply for reply in replies([json.dumps(request).encode() for request in requests])
+               if 'id' in reply}
+    assert answers[1]['type'] == 'ok'
+    assert answers[2]['type'] == 'error'
+    assert answers[3]['type'] == 'ok'
+    assert answers[4]['type'] == 'ok'
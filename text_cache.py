@@ -0,0 +1,66 @@
+"""Cache of rendered text surfaces shared by the pygame front ends.
+
+Font.render rasterizes every glyph on every call, but almost all on-screen
+text (labels, scores, player names) changes far less often than once per
+frame. render_text keeps the surfaces it produced keyed by
+(font, text, color, antialias) and hands the same surface back on later
+calls, evicting the least recently used entries past a fixed capacity.
+
+Returned surfaces are shared: blit them, never draw on them.
+"""
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 512
+
+
+class TextCache:
+    """Bounded LRU cache of Font.render results with hit/miss counters"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        # The key holds a reference to the font, so a freed font's id can
+        # never be reused by a different font while its entries are alive
+        key = (font, text, tuple(color), antialias)
+        surfaces = self.surfaces
+        surface = surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        surfaces[key] = surface
+        if len(surfaces) > self.capacity:
+            surfaces.popitem(last=False)
+        return surface
+
+    def invalidate(self, font=None):
+        """Drop every entry, or only those rendered with font"""
+        if font is None:
+            self.surfaces.clear()
+        else:
+            for key in [key for key in self.surfaces if key[0] is font]:
+                del self.surfaces[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# One cache for the whole process; both games draw through it
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    return text_cache.render(font, text, color, antialias)
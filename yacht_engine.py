@@ -0,0 +1,122 @@
+"""Headless Yacht game core: turns, rolls, locks and scoring without a display."""
+import operator
+import random
+import sys
+import time
+
+from yacht_rules import CATEGORIES, DICE_COUNT, MAX_ROLLS, ScoreCard
+
+ALL_DICE = (1 << DICE_COUNT) - 1
+
+
+def keep_mask_from_flags(flags):
+    """Turn per-die lock flags into a keep bitmask (bit i keeps die i)"""
+    mask = 0
+    for i, keep in enumerate(flags):
+        if keep:
+            mask |= 1 << i
+    return mask
+
+
+class YachtEngine:
+    """Authoritative state of one Yacht game.
+
+    Players act through two steps: roll(keep_mask) rerolls every die whose bit
+    is not set in keep_mask, and score(category) records the current dice for
+    the current player and passes the turn. Illegal moves raise ValueError.
+    """
+
+    def __init__(self, player_count, rng=None):
+        if player_count < 1:
+            raise ValueError("a game needs at least one player")
+        self.rng = rng or random.Random()
+        self.scorecards = [ScoreCard() for _ in range(player_count)]
+        self.current_player = 0
+        self.rolls_left = MAX_ROLLS
+        self.turn = 0
+        self.game_over = False
+        self.dice = [self._roll_die() for _ in range(DICE_COUNT)]
+
+    def _roll_die(self):
+        return int(self.rng.random() * 6) + 1
+
+    @property
+    def player_count(self):
+        return len(self.scorecards)
+
+    @property
+    def scorecard(self):
+        """Scorecard of the player whose turn it is"""
+        return self.scorecards[self.current_player]
+
+    def can_roll(self):
+        return not self.game_over and self.rolls_left > 0
+
+    def can_lock(self):
+        """Dice can be kept only after the turn's first roll; before it they show the last player's roll"""
+        return not self.game_over and 0 < self.rolls_left < MAX_ROLLS
+
+    def can_score(self, category):
+        return (not self.game_over and self.rolls_left < MAX_ROLLS
+                and not self.scorecard.is_category_used(category))
+
+    def open_categories(self):
+        return [category for category in CATEGORIES if not self.scorecard.is_category_used(category)]
+
+    def roll(self, keep_mask=0):
+        """Reroll the dice not kept and return the new values"""
+        if not self.can_roll():
+            raise ValueError("no rolls left this turn")
+        try:
+            keep_mask = operator.index(keep_mask)
+        except TypeError:
+            keep_mask = keep_mask_from_flags(keep_mask)
+        if keep_mask & ALL_DICE and self.rolls_left == MAX_ROLLS:
+            raise ValueError("roll before keeping dice")
+        dice = self.dice
+        for i in range(DICE_COUNT):
+            if not keep_mask >> i & 1:
+                dice[i] = self._roll_die()
+        self.rolls_left -= 1
+        return dice
+
+    def score(self, category):
+        """Score the current dice in category, pass the turn and return the points"""
+        if category not in CATEGORIES:
+            raise ValueError(f"unknown category: {category}")
+        if not self.can_score(category):
+            raise ValueError(f"cannot score {category} now")
+        scorecard = self.scorecard
+        points = scorecard.calculate_possible_score(category, self.dice)
+        scorecard.record_score(category, points)
+
+        self.current_player = (self.current_player + 1) % self.player_count
+        self.rolls_left = MAX_ROLLS
+        if self.current_player == 0:
+            self.turn += 1
+            self.game_over = self.turn == len(CATEGORIES)
+        return points
+
+    def total_scores(self):
+        return [scorecard.get_total_score() for scorecard in self.scorecards]
+
+
+def play_random_game(engine):
+    """Play a game to the end with uniformly random keeps and categories"""
+    rng = engine.rng
+    while not engine.game_over:
+        engine.roll()
+        while engine.rolls_left and rng.random() < 0.5:
+            engine.roll(rng.getrandbits(DICE_COUNT))
+        engine.score(rng.choice(engine.open_categories()))
+    return engine.total_scores()
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(games):
+        play_random_game(YachtEngine(2, rng))
+    elapsed = time.perf_counter() - start
+    print(f"{games} two-player games in {elapsed:.2f}s ({games / elapsed:.0f} games/s)")
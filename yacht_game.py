@@ -1,19 +1,28 @@
 import pygame
 import sys
+import argparse
 import random
 import os
 from pygame.locals import *
 import time
 import math
-
-# Initialize pygame
-pygame.init()
+import numpy as np
+from yacht_rules import CATEGORIES, DICE_COUNT, MAX_ROLLS, ScoreCard, score_vector
+from yacht_solver import YachtSolver, used_mask
+from yacht_engine import YachtEngine, keep_mask_from_flags
+from yacht_odds import TurnOdds
+import yacht_log
+from text_cache import render_text, text_cache
+from assets import convert_image
+from frame_profiler import FrameProfiler
 
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 750  # Increased from 600 to 750
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption('Yacht Dice Game')
+
+# The window, fonts and dice images are created by init_display(), so importing
+# this module (for the engine, a bot or a test) never opens a window
+screen = None
 
 # Colors
 WHITE = (255, 255, 255)
@@ -28,23 +37,45 @@ YELLOW = (255, 255, 0)
 LIGHT_GREEN = (200, 255, 200)
 
 # Fonts
-font_small = pygame.font.SysFont('Arial', 20)
-font_medium = pygame.font.SysFont('Arial', 30)
-font_large = pygame.font.SysFont('Arial', 40)
+font_small = None
+font_medium = None
+font_large = None
 
 # Game constants
 MAX_PLAYERS = 4
 MIN_PLAYERS = 2
-DICE_COUNT = 5
-MAX_ROLLS = 3
-
-# Create images directory if it doesn't exist
-if not os.path.exists('images'):
-    os.makedirs('images')
 
 # Dice images - we'll draw them programmatically
 dice_images = []
 
+# Per-phase frame timing; F3 shows the overlay, F4 exports the recorded frames
+profiler = FrameProfiler()
+profile_path = None  # Set by --profile: export here when the game exits
+
+# Every game is logged to saves/ so it can be resumed after a crash; --no-save turns this off
+save_games = True
+resume_path = None  # Set by --resume: the log to continue instead of opening the menu
+
+def init_display():
+    """Initialize pygame and create the window, fonts and dice images; safe to call twice"""
+    global screen, font_small, font_medium, font_large, dice_images
+    if screen is not None:
+        return screen
+    
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption('Yacht Dice Game')
+    
+    font_small = pygame.font.SysFont('Arial', 20)
+    font_medium = pygame.font.SysFont('Arial', 30)
+    font_large = pygame.font.SysFont('Arial', 40)
+    
+    # Create images directory if it doesn't exist
+    if not os.path.exists('images'):
+        os.makedirs('images')
+    dice_images = generate_dice_images()
+    return screen
+
 def generate_dice_images(size=60):
     """Generate dice face images"""
     images = []
@@ -92,16 +123,18 @@ def generate_dice_images(size=60):
             pygame.draw.circle(dice_img, BLACK, (3 * size // 4, size // 2), dot_radius)
             pygame.draw.circle(dice_img, BLACK, (3 * size // 4, 3 * size // 4), dot_radius)
         
-        images.append(dice_img)
+        # Match the display format so blitting a die needs no per-pixel conversion
+        images.append(convert_image(dice_img, alpha=False))
     return images
 
 # Class to represent a die
 class Die:
-    def __init__(self, x, y, size=60):
+    def __init__(self, x, y, value, size=60):
         self.x = x
         self.y = y
         self.size = size
-        self.value = random.randint(1, 6)
+        self.value = value
+        self.final_value = value  # Value rolled by the engine, shown when the animation ends
         self.locked = False
         self.rect = pygame.Rect(x, y, size, size)
         self.rolling = False
@@ -109,8 +142,9 @@ class Die:
         self.roll_duration = 10  # Number of frames for rolling animation
         self.hover = False
     
-    def roll(self):
+    def roll(self, value):
         if not self.locked:
+            self.final_value = value
             self.rolling = True
             self.roll_frames = self.roll_duration
     
@@ -119,14 +153,24 @@ class Die:
             self.value = random.randint(1, 6)
             self.roll_frames -= 1
             if self.roll_frames <= 0:
+                self.value = self.final_value
                 self.rolling = False
     
-    def toggle_lock(self):
-        if not self.rolling:
-            self.locked = not self.locked
+    def move_to(self, x, y):
+        self.x = x
+        self.y = y
+        self.rect = pygame.Rect(x, y, self.size, self.size)
     
     def check_hover(self, pos):
-        self.hover = self.rect.collidepoint(pos)
+        """Update the hover flag and return True if it changed"""
+        hover = self.rect.collidepoint(pos)
+        changed = hover != self.hover
+        self.hover = hover
+        return changed
+    
+    def get_dirty_rect(self):
+        """Area the die can paint, including the shadow and the rolling shake"""
+        return pygame.Rect(self.x - 2, self.y - 2, self.size + 6, self.size + 6)
     
     def draw(self, surface):
         # Draw the die with some visual effects
@@ -154,203 +198,274 @@ class Die:
         if self.hover and not self.rolling:
             pygame.draw.rect(surface, YELLOW, self.rect, 2)
 
-# Add Confetti class after the Die class
-class Confetti:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.randint(5, 10)
-        self.color = random.choice([RED, GREEN, BLUE, YELLOW])
-        self.speed_x = random.uniform(-2, 2)
-        self.speed_y = random.uniform(1, 3)
-        self.rotation = random.uniform(0, 360)
-        self.rotation_speed = random.uniform(-5, 5)
-    
-    def update(self):
-        self.y += self.speed_y
+# Confetti appearance: every piece is a square of one of these colors and sizes
+CONFETTI_COLORS = (RED, GREEN, BLUE, YELLOW)
+CONFETTI_SIZES = tuple(range(5, 11))
+# A square looks the same every 90 degrees, so only that range is pre-rotated
+CONFETTI_ANGLE_STEPS = 18
+CONFETTI_CAPACITY = 4096
+
+_confetti_atlas = None
+
+def get_confetti_atlas():
+    """Pre-rotated confetti sprites plus the offset from each sprite's center to its corner"""
+    global _confetti_atlas
+    if _confetti_atlas is None:
+        images = []
+        offsets = []
+        for color in CONFETTI_COLORS:
+            for size in CONFETTI_SIZES:
+                square = pygame.Surface((size, size), pygame.SRCALPHA)
+                square.fill(color)
+                for step in range(CONFETTI_ANGLE_STEPS):
+                    rotated = pygame.transform.rotate(square, step * 90 / CONFETTI_ANGLE_STEPS)
+                    images.append(rotated)
+                    offsets.append(rotated.get_rect(center=(0, 0)).topleft)
+        _confetti_atlas = images, np.array(offsets, dtype=np.float64)
+    return _confetti_atlas
+
+class ConfettiSystem:
+    """Falling confetti kept in preallocated arrays and recycled through a free list"""
+    
+    def __init__(self, capacity=CONFETTI_CAPACITY):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.speed_x = np.zeros(capacity)
+        self.speed_y = np.zeros(capacity)
+        self.rotation = np.zeros(capacity)
+        self.rotation_speed = np.zeros(capacity)
+        # First atlas sprite of the piece's color and size; the angle step is added when drawing
+        self.sprite = np.zeros(capacity, dtype=np.intp)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.rng = np.random.default_rng()
+    
+    def __len__(self):
+        return self.capacity - len(self.free)
+    
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+    
+    def spawn(self, count, width):
+        """Drop up to count new pieces above the screen; returns how many fit"""
+        count = min(count, len(self.free))
+        if count <= 0:
+            return 0
+        index = np.array(self.free[-count:], dtype=np.intp)
+        del self.free[-count:]
+        rng = self.rng
+        self.x[index] = rng.integers(0, width, count, endpoint=True)
+        self.y[index] = -10
+        self.speed_x[index] = rng.uniform(-2, 2, count)
+        self.speed_y[index] = rng.uniform(1, 3, count)
+        self.rotation[index] = rng.uniform(0, 360, count)
+        self.rotation_speed[index] = rng.uniform(-5, 5, count)
+        color = rng.integers(0, len(CONFETTI_COLORS), count)
+        size = rng.integers(0, len(CONFETTI_SIZES), count)
+        self.sprite[index] = (color * len(CONFETTI_SIZES) + size) * CONFETTI_ANGLE_STEPS
+        self.alive[index] = True
+        return count
+    
+    def update(self, height):
+        """Move every piece one frame and recycle those that fell off the bottom"""
         self.x += self.speed_x
+        self.y += self.speed_y
         self.rotation += self.rotation_speed
+        fallen = np.flatnonzero(self.alive & (self.y > height))
+        if len(fallen):
+            self.alive[fallen] = False
+            self.free.extend(fallen.tolist())
     
     def draw(self, surface):
-        # Create a surface for the confetti piece
-        confetti = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
-        pygame.draw.rect(confetti, self.color, (0, 0, self.size, self.size))
-        
-        # Rotate the confetti
-        rotated = pygame.transform.rotate(confetti, self.rotation)
-        # Get the rect for the rotated image
-        rect = rotated.get_rect(center=(self.x, self.y))
-        
-        # Draw to the screen
-        surface.blit(rotated, rect)
-
-# Scoring categories
-CATEGORIES = {
-    'Aces': 'Sum of all 1s',
-    'Twos': 'Sum of all 2s',
-    'Threes': 'Sum of all 3s',
-    'Fours': 'Sum of all 4s',
-    'Fives': 'Sum of all 5s',
-    'Sixes': 'Sum of all 6s',
-    'Choice': 'Sum of all dice',
-    'Four of a Kind': 'Four dice showing the same face',
-    'Full House': 'Three of a kind and a pair',
-    'Small Straight': 'Four sequential dice',
-    'Large Straight': 'Five sequential dice',
-    'Yacht': 'Five dice showing the same face'
-}
+        live = np.flatnonzero(self.alive)
+        if not len(live):
+            return
+        images, offsets = get_confetti_atlas()
+        step = (self.rotation[live] % 90 * (CONFETTI_ANGLE_STEPS / 90)).astype(np.intp) % CONFETTI_ANGLE_STEPS
+        sprite = self.sprite[live] + step
+        corner = offsets[sprite]
+        xs = (self.x[live] + corner[:, 0]).astype(np.intp).tolist()
+        ys = (self.y[live] + corner[:, 1]).astype(np.intp).tolist()
+        surface.blits([(images[i], (x, y)) for i, x, y in zip(sprite.tolist(), xs, ys)], doreturn=False)
 
-# Class to handle scoring
-class ScoreCard:
+# Tracks which parts of the screen changed and need repainting
+class DirtyRegions:
     def __init__(self):
-        self.scores = {category: None for category in CATEGORIES}
-    
-    def calculate_possible_score(self, category, dice_values):
-        """Calculate possible score for a given category with current dice"""
-        
-        if category == 'Aces':
-            return sum(d for d in dice_values if d == 1)
-        elif category == 'Twos':
-            return sum(d for d in dice_values if d == 2)
-        elif category == 'Threes':
-            return sum(d for d in dice_values if d == 3)
-        elif category == 'Fours':
-            return sum(d for d in dice_values if d == 4)
-        elif category == 'Fives':
-            return sum(d for d in dice_values if d == 5)
-        elif category == 'Sixes':
-            return sum(d for d in dice_values if d == 6)
-        elif category == 'Choice':
-            return sum(dice_values)
-        elif category == 'Four of a Kind':
-            for value in range(1, 7):
-                if dice_values.count(value) >= 4:
-                    return value * 4
-            return 0
-        elif category == 'Full House':
-            has_three = False
-            has_two = False
-            for value in range(1, 7):
-                if dice_values.count(value) == 3:
-                    has_three = True
-                elif dice_values.count(value) == 2:
-                    has_two = True
-            if has_three and has_two:
-                return sum(dice_values)
-            return 0
-        elif category == 'Small Straight':
-            # Check for 1-2-3-4 or 2-3-4-5 or 3-4-5-6
-            sorted_dice = sorted(dice_values)
-            unique_sorted = sorted(set(sorted_dice))
-            
-            if len(unique_sorted) >= 4:
-                for i in range(len(unique_sorted) - 3):
-                    if unique_sorted[i] + 1 == unique_sorted[i+1] and \
-                       unique_sorted[i+1] + 1 == unique_sorted[i+2] and \
-                       unique_sorted[i+2] + 1 == unique_sorted[i+3]:
-                        return 15
-            return 0
-        elif category == 'Large Straight':
-            # Check for 1-2-3-4-5 or 2-3-4-5-6
-            sorted_dice = sorted(dice_values)
-            if sorted_dice == [1, 2, 3, 4, 5] or sorted_dice == [2, 3, 4, 5, 6]:
-                return 30
-            return 0
-        elif category == 'Yacht':
-            if all(d == dice_values[0] for d in dice_values):
-                return 50
-            return 0
-        return 0
-    
-    def record_score(self, category, score):
-        self.scores[category] = score
-    
-    def is_category_used(self, category):
-        return self.scores[category] is not None
-    
-    def get_total_score(self):
-        return sum(score for score in self.scores.values() if score is not None)
+        self.rects = []
+        self.full = True
+    
+    def invalidate(self):
+        """Repaint the whole screen on the next frame"""
+        self.full = True
+        self.rects = []
+    
+    def add(self, rect):
+        if not self.full:
+            self.rects.append(pygame.Rect(rect))
+    
+    def is_clean(self):
+        return not self.full and not self.rects
+    
+    def take(self, screen_rect):
+        """Return the rects to repaint this frame and reset the tracker"""
+        if self.full:
+            rects = [screen_rect]
+        elif self.rects:
+            rects = [self.rects[0].unionall(self.rects[1:]).clip(screen_rect)]
+        else:
+            rects = []
+        self.full = False
+        self.rects = []
+        return rects
 
 # Player class
 class Player:
-    def __init__(self, name):
+    def __init__(self, name, scorecard=None):
         self.name = name
-        self.scorecard = ScoreCard()
+        self.scorecard = scorecard or ScoreCard()
         self.total_score = 0
     
     def update_total_score(self):
         self.total_score = self.scorecard.get_total_score()
 
-# Game state manager
+# Game state manager - a view over YachtEngine, which owns the rules
 class YachtGame:
     def __init__(self):
         self.state = 'menu'  # menu, setup, playing, game_over, help, scoreboard
+        self.engine = None
         self.players = []
-        self.current_player_index = 0
         self.dice = []
-        self.rolls_left = MAX_ROLLS
         self.selected_category = None
         self.previous_state = None  # To remember where to return from help or scoreboard
-        self.confetti = []
+        self.confetti = ConfettiSystem()
         self.time_at_game_over = 0
+        self.solver = None  # Optimal-strategy table, loaded on first use
+        self.hint = None
+        self.odds_table = None  # Exact category odds, built on first use
+        self.odds = None  # (chances, expected scores) for the current dice; None while dice roll
+        self.show_odds = True
+        self.dirty = DirtyRegions()
+        self.log = None  # Event log of the current game (yacht_log.GameLog)
         
+    @property
+    def current_player_index(self):
+        return self.engine.current_player if self.engine else 0
+    
+    @property
+    def rolls_left(self):
+        return self.engine.rolls_left if self.engine else MAX_ROLLS
+    
     def initialize_game(self, player_count):
+        self.close_log()
+        seed = random.getrandbits(64)
+        self.start_game(YachtEngine(player_count, random.Random(seed)))
+        if save_games:
+            self.log = yacht_log.GameLog.create(self.engine, seed)
+    
+    def resume_game(self, path):
+        """Continue a logged game from its latest snapshot and the events after it"""
+        self.close_log()
+        engine, locks, self.log = yacht_log.resume(path)
+        self.start_game(engine)
+        for i, die in enumerate(self.dice):
+            die.locked = bool(locks >> i & 1)
+        self.refresh_odds()
+        for player in self.players:
+            player.update_total_score()
+        if engine.game_over:
+            self.next_player()
+    
+    def start_game(self, engine):
+        self.engine = engine
         self.players = []
-        for i in range(player_count):
-            self.players.append(Player(f"Player {i+1}"))
+        for i, scorecard in enumerate(self.engine.scorecards):
+            self.players.append(Player(f"Player {i+1}", scorecard))
         
-        self.current_player_index = 0
         self.dice = []
         
         # Create dice with positions based on screen size
-        positions = get_dice_positions()
-        for i in range(DICE_COUNT):
-            self.dice.append(Die(positions[i][0], positions[i][1]))
+        for (x, y), value in zip(get_layout().dice_positions, self.engine.dice):
+            self.dice.append(Die(x, y, value))
         
-        self.rolls_left = MAX_ROLLS
+        self.hint = None
         self.state = 'playing'
+        self.refresh_odds()
+    
+    def close_log(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+    
+    def set_lock(self, index, locked):
+        die = self.dice[index]
+        locked = bool(locked)
+        if locked and not self.engine.can_lock():
+            return
+        if die.locked != locked and not die.rolling:
+            die.locked = locked
+            if self.log:
+                self.log.lock(index, locked)
+            self.refresh_odds()
     
     def roll_dice(self):
-        if self.rolls_left > 0:
-            for die in self.dice:
-                die.roll()
-            self.rolls_left -= 1
+        if self.engine.can_roll():
+            keep_mask = keep_mask_from_flags(die.locked for die in self.dice)
+            values = self.engine.roll(keep_mask)
+            if self.log:
+                self.log.roll(keep_mask, values)
+            for die, value in zip(self.dice, values):
+                die.roll(value)
+            self.hint = None
+            self.refresh_odds()
+    
+    def is_animating(self):
+        return self.state == 'game_over' or any(die.rolling for die in self.dice)
     
     def update(self):
         # Update dice states
+        settled = False
         for die in self.dice:
-            die.update()
+            if die.rolling:
+                die.update()
+                if self.state == 'playing':
+                    if die.rolling:
+                        self.dirty.add(die.get_dirty_rect())
+                    else:
+                        # The die settled, so the possible scores changed too
+                        self.dirty.invalidate()
+                        settled = True
+        if settled:
+            self.refresh_odds()
         
         # Update confetti
         if self.state == 'game_over':
             # Get current screen dimensions
             width, height = get_screen_dimensions()
             
+            if self.confetti:
+                self.dirty.invalidate()
+            else:
+                # Only the glowing play again button is still animating
+                self.dirty.add(get_play_again_rect())
+            
             # Update existing confetti
-            for conf in self.confetti[:]:
-                conf.update()
-                if conf.y > height:
-                    self.confetti.remove(conf)
+            self.confetti.update(height)
             
             # Add new confetti periodically
             if len(self.confetti) < 50 and time.time() - self.time_at_game_over < 10:  # Limit confetti duration
-                self.confetti.append(Confetti(random.randint(0, width), -10))
+                self.confetti.spawn(1, width)
     
     def next_player(self):
-        self.current_player_index = (self.current_player_index + 1) % len(self.players)
-        self.rolls_left = MAX_ROLLS
+        # The engine has already passed the turn; reset the view for the next player
+        self.hint = None
         for die in self.dice:
             die.locked = False
         
-        # Check if game is over
-        game_completed = True
-        for player in self.players:
-            for category, score in player.scorecard.scores.items():
-                if score is None:
-                    game_completed = False
-                    break
-        
-        if game_completed:
+        self.refresh_odds()
+        if self.engine.game_over:
+            self.close_log()
             self.state = 'game_over'
             self.time_at_game_over = time.time()
             # Create initial confetti
@@ -359,104 +474,109 @@ class YachtGame:
     def score_current_roll(self, category):
         current_player = self.players[self.current_player_index]
         
-        if not current_player.scorecard.is_category_used(category):
-            dice_values = [die.value for die in self.dice]
-            score = current_player.scorecard.calculate_possible_score(category, dice_values)
-            current_player.scorecard.record_score(category, score)
+        if self.engine.can_score(category):
+            for die in self.dice:
+                die.value = die.final_value
+                die.rolling = False
+            points = self.engine.score(category)
+            if self.log:
+                self.log.score(category, points)
             current_player.update_total_score()
             self.next_player()
     
+    def refresh_odds(self):
+        """Look up the category odds once the dice have settled, so drawing never computes them"""
+        if any(die.rolling for die in self.dice) or self.engine.game_over:
+            self.odds = None
+            return
+        if self.odds_table is None:
+            self.odds_table = TurnOdds()
+        self.odds = self.odds_table.odds(self.engine.dice, [die.locked for die in self.dice], self.rolls_left)
+    
+    def get_solver(self):
+        if self.solver is None:
+            self.solver = YachtSolver.load()
+        return self.solver
+    
+    def get_hint(self):
+        """Ask the solver for the current player's best move: ('roll', locks) or ('score', category)"""
+        if self.rolls_left == MAX_ROLLS:
+            return 'roll', [False] * DICE_COUNT
+        return self.get_solver().decide(used_mask(self.engine.scorecard), self.engine.dice, self.rolls_left)
+    
+    def show_hint(self):
+        if self.state != 'playing' or any(die.rolling for die in self.dice):
+            return
+        action, choice = self.get_hint()
+        if action == 'score':
+            self.hint = f"Hint: score {choice}"
+        elif any(choice):
+            kept = ", ".join(str(die.value) for die, keep in zip(self.dice, choice) if keep)
+            self.hint = f"Hint: keep {kept} and roll"
+        else:
+            self.hint = "Hint: roll all dice"
+    
+    def play_ai_step(self):
+        """Let the solver make the current player's next move"""
+        if self.state != 'playing' or any(die.rolling for die in self.dice):
+            return
+        action, choice = self.get_hint()
+        if action == 'roll':
+            for i, keep in enumerate(choice):
+                self.set_lock(i, keep)
+            self.roll_dice()
+        else:
+            self.score_current_roll(choice)
+    
     def handle_click(self, pos):
-        width, height = get_screen_dimensions()
+        widget = get_layout().hit_test(self.state, pos)
+        if widget is None:
+            return
+        kind = widget[0]
         
         if self.state == 'menu':
-            # Calculate button positions for responsive menu
-            button_width = 200
-            button_height = 40
-            button_x = width // 2 - button_width // 2
-            
-            # Check for player number buttons
-            for i in range(MIN_PLAYERS, MAX_PLAYERS + 1):
-                button_rect = pygame.Rect(button_x, height // 6 + 100 + 50 * (i - MIN_PLAYERS), button_width, button_height)
-                if button_rect.collidepoint(pos):
-                    self.initialize_game(i)
-                    return
-            
-            # Handle help button
-            help_rect = pygame.Rect(button_x, height // 6 + 100 + 50 * (MAX_PLAYERS - MIN_PLAYERS + 1), button_width, button_height)
-            if help_rect.collidepoint(pos):
+            if kind == 'players':
+                self.initialize_game(widget[1])
+            elif kind == 'help':
                 self.previous_state = self.state
                 self.state = 'help'
         
         elif self.state == 'playing':
-            # Handle dice clicks
-            for die in self.dice:
-                if die.rect.collidepoint(pos):
-                    die.toggle_lock()
-            
-            # Handle roll button
-            button_width = 100
-            button_height = 40
-            roll_button = pygame.Rect(width // 2 - button_width // 2, get_dice_positions()[0][1] + 100, button_width, button_height)
-            if roll_button.collidepoint(pos) and self.rolls_left > 0:
-                self.roll_dice()
-            
-            # Handle "View Scoreboard" button
-            scoreboard_button = pygame.Rect(width - 150, 20, 130, 30)
-            if scoreboard_button.collidepoint(pos):
+            if kind == 'die':
+                self.set_lock(widget[1], not self.dice[widget[1]].locked)
+            elif kind == 'roll':
+                if self.rolls_left > 0:
+                    self.roll_dice()
+            elif kind == 'scoreboard':
                 self.previous_state = self.state
                 self.state = 'scoreboard'
-                return
-            
-            # Calculate row height for categories based on screen height
-            max_categories = len(CATEGORIES)
-            available_height = height - 350
-            row_height = min(30, max(20, available_height // max_categories))
-            
-            # Handle category selection
-            if self.rolls_left < MAX_ROLLS:  # Only allow scoring after at least one roll
-                y_pos = 320
-                for category in CATEGORIES:
-                    category_rect = pygame.Rect(30, y_pos, 200, 30)
-                    if category_rect.collidepoint(pos):
-                        self.score_current_roll(category)
-                    y_pos += row_height
+            elif kind == 'category':
+                if self.rolls_left < MAX_ROLLS:  # Only allow scoring after at least one roll
+                    self.score_current_roll(widget[1])
         
         elif self.state == 'game_over':
-            # Handle play again button
-            button_width = 200
-            button_height = 50
-            play_again_rect = pygame.Rect(width // 2 - button_width // 2, height - button_height - 50, button_width, button_height)
-            if play_again_rect.collidepoint(pos):
+            if kind == 'play_again':
                 self.state = 'menu'
         
         elif self.state == 'help':
-            # Handle back button
-            button_width = 100
-            button_height = 40
-            back_rect = pygame.Rect(width // 2 - button_width // 2, height - button_height - 30, button_width, button_height)
-            if back_rect.collidepoint(pos):
+            if kind == 'back':
                 self.state = self.previous_state or 'menu'
         
         elif self.state == 'scoreboard':
-            # Handle back button
-            button_width = 100
-            button_height = 40
-            back_rect = pygame.Rect(width // 2 - button_width // 2, height - button_height - 30, button_width, button_height)
-            if back_rect.collidepoint(pos):
+            if kind == 'back':
                 self.state = self.previous_state or 'playing'
     
     def handle_mouse_motion(self, pos):
         # Update hover states
         if self.state == 'playing':
             for die in self.dice:
-                die.check_hover(pos)
+                if die.check_hover(pos):
+                    self.dirty.add(die.get_dirty_rect())
     
     def create_confetti(self, count):
-        self.confetti = []
         width, height = get_screen_dimensions()
-        for _ in range(count):
-            self.confetti.append(Confetti(random.randint(0, width), -10))
+        self.confetti.clear()
+        self.confetti.spawn(count, width)
 
 # Drawing functions
 def draw_menu(screen):
@@ -464,50 +584,51 @@ def draw_menu(screen):
     screen.fill(LIGHT_BLUE)
     
     # Title
-    title_text = font_large.render("Yacht Dice Game", True, BLACK)
+    title_text = render_text(font_large, "Yacht Dice Game", BLACK)
     screen.blit(title_text, (width // 2 - title_text.get_width() // 2, height // 6))
     
     # Player number selection
-    subtitle_text = font_medium.render("Select number of players:", True, BLACK)
+    subtitle_text = render_text(font_medium, "Select number of players:", BLACK)
     screen.blit(subtitle_text, (width // 2 - subtitle_text.get_width() // 2, height // 6 + 60))
     
-    button_width = 200
-    button_height = 40
-    button_x = width // 2 - button_width // 2
-    
-    for i in range(MIN_PLAYERS, MAX_PLAYERS + 1):
-        player_rect = pygame.Rect(button_x, height // 6 + 100 + 50 * (i - MIN_PLAYERS), button_width, button_height)
+    layout = get_layout()
+    for i, player_rect in layout.player_buttons.items():
         pygame.draw.rect(screen, GREEN, player_rect)
         
-        player_text = font_medium.render(f"{i} Players", True, BLACK)
+        player_text = render_text(font_medium, f"{i} Players", BLACK)
         screen.blit(player_text, (player_rect.centerx - player_text.get_width() // 2, 
                                  player_rect.centery - player_text.get_height() // 2))
     
     # Help button
-    help_rect = pygame.Rect(button_x, height // 6 + 100 + 50 * (MAX_PLAYERS - MIN_PLAYERS + 1), button_width, button_height)
+    help_rect = layout.help_button
     pygame.draw.rect(screen, YELLOW, help_rect)
-    help_text = font_medium.render("Help", True, BLACK)
+    help_text = render_text(font_medium, "Help", BLACK)
     screen.blit(help_text, (help_rect.centerx - help_text.get_width() // 2, 
                           help_rect.centery - help_text.get_height() // 2))
 
 def draw_game(screen, game):
-    width, height = get_screen_dimensions()
+    layout = get_layout()
     screen.fill(LIGHT_BLUE)
     
     # Draw player info
     current_player = game.players[game.current_player_index]
-    player_text = font_medium.render(f"{current_player.name}'s turn", True, BLACK)
+    player_text = render_text(font_medium, f"{current_player.name}'s turn", BLACK)
     screen.blit(player_text, (20, 20))
     
     # Draw rolls left
-    rolls_text = font_small.render(f"Rolls left: {game.rolls_left}", True, BLACK)
+    rolls_text = render_text(font_small, f"Rolls left: {game.rolls_left}", BLACK)
     screen.blit(rolls_text, (20, 60))
     
+    # Draw solver hint
+    if game.hint:
+        hint_text = render_text(font_small, game.hint, BLUE)
+        screen.blit(hint_text, (20, 90))
+    
     # Draw "View Scoreboard" button
-    scoreboard_button = pygame.Rect(width - 150, 20, 130, 30)
+    scoreboard_button = layout.scoreboard_button
     pygame.draw.rect(screen, YELLOW, scoreboard_button)
     pygame.draw.rect(screen, BLACK, scoreboard_button, 1)  # Add border
-    scoreboard_text = font_small.render("View Scoreboard", True, BLACK)
+    scoreboard_text = render_text(font_small, "View Scoreboard", BLACK)
     screen.blit(scoreboard_text, (scoreboard_button.centerx - scoreboard_text.get_width() // 2, 
                             scoreboard_button.centery - scoreboard_text.get_height() // 2))
     
@@ -516,72 +637,87 @@ def draw_game(screen, game):
         die.draw(screen)
     
     # Draw roll button
-    button_width = 100
-    button_height = 40
-    roll_button = pygame.Rect(width // 2 - button_width // 2, get_dice_positions()[0][1] + 100, button_width, button_height)
+    roll_button = layout.roll_button
     button_color = GREEN if game.rolls_left > 0 else GRAY
     pygame.draw.rect(screen, button_color, roll_button)
-    roll_text = font_small.render("Roll", True, BLACK)
+    roll_text = render_text(font_small, "Roll", BLACK)
     screen.blit(roll_text, (roll_button.centerx - roll_text.get_width() // 2, 
                            roll_button.centery - roll_text.get_height() // 2))
     
     # Draw scorecard
+    profiler.lap('draw_game')
     draw_scorecard(screen, game)
+    profiler.lap('draw_scorecard')
     
     # Draw scores for all players
     draw_all_player_scores(screen, game)
 
 def draw_scorecard(screen, game):
-    width, height = get_screen_dimensions()
+    layout = get_layout()
     current_player = game.players[game.current_player_index]
     dice_values = [die.value for die in game.dice]
-    
-    # Adjust vertical spacing based on screen height
-    max_categories = len(CATEGORIES)
-    available_height = height - 350  # Space after other UI elements
-    row_height = min(30, max(20, available_height // max_categories))
+    possible_scores = score_vector(dice_values)
     
     # Draw category options
-    y_pos = 320
-    title_text = font_small.render("Categories", True, BLACK)
+    y_pos = layout.category_rects[0].y
+    title_text = render_text(font_small, "Categories", BLACK)
     screen.blit(title_text, (30, y_pos - 30))
     
-    score_title_text = font_small.render("Possible Score", True, BLACK)
+    score_title_text = render_text(font_small, "Possible Score", BLACK)
     screen.blit(score_title_text, (250, y_pos - 30))
     
-    for category, description in CATEGORIES.items():
+    # Chance of a non-zero score and best expected score this turn, chasing each category alone
+    odds = game.odds if game.show_odds and layout.odds_fits else None
+    if odds:
+        screen.blit(render_text(font_small, "Chance", BLUE), (layout.chance_x, y_pos - 30))
+        screen.blit(render_text(font_small, "Expected", BLUE), (layout.expected_x, y_pos - 30))
+    
+    for i, (category, category_rect) in enumerate(zip(CATEGORIES, layout.category_rects)):
+        y_pos = category_rect.y
+        
         # Category name
         category_color = BLACK
         if current_player.scorecard.is_category_used(category):
             category_color = DARK_GRAY
         
-        category_text = font_small.render(category, True, category_color)
+        category_text = render_text(font_small, category, category_color)
         screen.blit(category_text, (30, y_pos))
         
         # Possible score
         if not current_player.scorecard.is_category_used(category) and game.rolls_left < MAX_ROLLS:
-            score = current_player.scorecard.calculate_possible_score(category, dice_values)
-            score_text = font_small.render(str(score), True, category_color)
+            score_text = render_text(font_small, str(possible_scores[i]), category_color)
             screen.blit(score_text, (250, y_pos))
         
-        # Draw category box
-        pygame.draw.rect(screen, BLACK, (30, y_pos, 200, 30), 1)
+        if odds and not current_player.scorecard.is_category_used(category):
+            chance_text = render_text(font_small, format_chance(odds[0][i]), BLUE)
+            screen.blit(chance_text, (layout.chance_x, y_pos))
+            expected_text = render_text(font_small, f"{odds[1][i]:.1f}", BLUE)
+            screen.blit(expected_text, (layout.expected_x, y_pos))
         
-        y_pos += row_height
+        # Draw category box
+        pygame.draw.rect(screen, BLACK, category_rect, 1)
+
+def format_chance(probability):
+    # Sums of exact fractions can land a hair below 1
+    if probability > 1 - 1e-9:
+        return "100%"
+    if 0 < probability < 0.001:
+        return "<0.1%"
+    return f"{min(probability * 100, 99.9):.1f}%"
 
 def draw_all_player_scores(screen, game):
-    width, height = get_screen_dimensions()
+    layout = get_layout()
     # Section for showing all player scores
-    x_pos = min(550, width - 200)  # Keep visible on smaller screens
-    y_pos = 320
+    x_pos = layout.scores_x
+    y_pos = layout.category_rects[0].y
     
     # Title
-    score_title = font_small.render("Scores", True, BLACK)
+    score_title = render_text(font_small, "Scores", BLACK)
     screen.blit(score_title, (x_pos, y_pos - 30))
     
     # Player scores
     for player in game.players:
-        player_text = font_small.render(f"{player.name}: {player.total_score}", True, BLACK)
+        player_text = render_text(font_small, f"{player.name}: {player.total_score}", BLACK)
         screen.blit(player_text, (x_pos, y_pos))
         y_pos += 30
 
@@ -593,19 +729,18 @@ def draw_game_over(screen, game):
     winner = max(game.players, key=lambda p: p.total_score)
     
     # Draw confetti
-    for conf in game.confetti:
-        conf.draw(screen)
+    game.confetti.draw(screen)
     
     # Title with glow effect
-    title_text = font_large.render("Game Over!", True, BLACK)
+    title_text = render_text(font_large, "Game Over!", BLACK)
     title_y = height // 6
     for offset in range(1, 4):
         screen.blit(title_text, (width // 2 - title_text.get_width() // 2 + offset, title_y + offset))
-    title_glow = font_large.render("Game Over!", True, YELLOW)
+    title_glow = render_text(font_large, "Game Over!", YELLOW)
     screen.blit(title_glow, (width // 2 - title_glow.get_width() // 2, title_y))
     
     # Winner announcement with animation
-    winner_text = font_medium.render(f"Winner: {winner.name} with {winner.total_score} points!", True, BLACK)
+    winner_text = render_text(font_medium, f"Winner: {winner.name} with {winner.total_score} points!", BLACK)
     
     # Add a pulsing effect
     scale = 1.0 + 0.1 * abs(math.sin(time.time() * 3))  # Pulsing between 90% and 110%
@@ -614,33 +749,31 @@ def draw_game_over(screen, game):
     # Draw with glow
     for offset in range(1, 3):
         screen.blit(winner_text, (winner_rect.x + offset, winner_rect.y + offset))
-    winner_glow = font_medium.render(f"Winner: {winner.name} with {winner.total_score} points!", True, GREEN)
+    winner_glow = render_text(font_medium, f"Winner: {winner.name} with {winner.total_score} points!", GREEN)
     screen.blit(winner_glow, winner_rect)
     
     # Display all scores
     scores_y = title_y + 150
-    title_text = font_medium.render("Final Scores:", True, BLACK)
+    title_text = render_text(font_medium, "Final Scores:", BLACK)
     screen.blit(title_text, (width // 2 - title_text.get_width() // 2, scores_y))
     
     scores_y += 50
     for player in sorted(game.players, key=lambda p: p.total_score, reverse=True):
         # Highlight the winner
         color = GREEN if player is winner else BLACK
-        score_text = font_medium.render(f"{player.name}: {player.total_score}", True, color)
+        score_text = render_text(font_medium, f"{player.name}: {player.total_score}", color)
         screen.blit(score_text, (width // 2 - score_text.get_width() // 2, scores_y))
         scores_y += 40
     
     # Play again button with animation
-    button_width = 200
-    button_height = 50
-    play_again_rect = pygame.Rect(width // 2 - button_width // 2, height - button_height - 50, button_width, button_height)
+    play_again_rect = get_play_again_rect()
     
     # Button glow animation
     glow_intensity = abs(math.sin(time.time() * 2)) * 50
     pygame.draw.rect(screen, (200 + glow_intensity, 255, 200 + glow_intensity), play_again_rect)
     pygame.draw.rect(screen, BLACK, play_again_rect, 2)  # Add border
     
-    play_again_text = font_medium.render("Play Again", True, BLACK)
+    play_again_text = render_text(font_medium, "Play Again", BLACK)
     screen.blit(play_again_text, (play_again_rect.centerx - play_again_text.get_width() // 2, 
                                   play_again_rect.centery - play_again_text.get_height() // 2))
 
@@ -649,7 +782,7 @@ def draw_help(screen):
     screen.fill(LIGHT_GREEN)
     
     # Title
-    title_text = font_large.render("How to Play Yacht", True, BLACK)
+    title_text = render_text(font_large, "How to Play Yacht", BLACK)
     screen.blit(title_text, (width // 2 - title_text.get_width() // 2, height // 10))
     
     # Rules text
@@ -682,16 +815,14 @@ def draw_help(screen):
         if line == "":
             y_pos += 10  # Add a little extra space for blank lines
         else:
-            text = font_small.render(line, True, BLACK)
+            text = render_text(font_small, line, BLACK)
             screen.blit(text, (width // 2 - text.get_width() // 2, y_pos))
         y_pos += line_height
     
     # Back button
-    button_width = 100
-    button_height = 40
-    back_rect = pygame.Rect(width // 2 - button_width // 2, height - button_height - 30, button_width, button_height)
+    back_rect = get_layout().back_button
     pygame.draw.rect(screen, GREEN, back_rect)
-    back_text = font_small.render("Back", True, BLACK)
+    back_text = render_text(font_small, "Back", BLACK)
     screen.blit(back_text, (back_rect.centerx - back_text.get_width() // 2, 
                           back_rect.centery - back_text.get_height() // 2))
 
@@ -701,30 +832,29 @@ def draw_scoreboard(screen, game):
     screen.fill(LIGHT_BLUE)
     
     # Title
-    title_text = font_large.render("Detailed Scoreboard", True, BLACK)
+    title_text = render_text(font_large, "Detailed Scoreboard", BLACK)
     screen.blit(title_text, (width // 2 - title_text.get_width() // 2, 30))
     
-    # Calculate column widths and positions
+    # Column widths and positions
+    layout = get_layout()
     num_players = len(game.players)
-    category_width = 150
-    player_column_width = min(100, (width - category_width) // num_players)
-    start_x = (width - (category_width + player_column_width * num_players)) // 2
+    start_x, category_width, player_column_width = layout.scoreboard_columns(num_players)
     
     # Draw player headers
     for i, player in enumerate(game.players):
         # Highlight the current player
         player_color = GREEN if i == game.current_player_index else BLACK
-        player_header = font_medium.render(player.name, True, player_color)
+        player_header = render_text(font_medium, player.name, player_color)
         player_x = start_x + category_width + i * player_column_width + player_column_width // 2
         screen.blit(player_header, (player_x - player_header.get_width() // 2, 80))
     
     # Draw category rows and scores
     y_pos = 120
-    row_height = min(30, max(24, (height - 170) // len(CATEGORIES)))
+    row_height = layout.scoreboard_row_height
     
     for category in CATEGORIES:
         # Draw category name
-        category_text = font_small.render(category, True, BLACK)
+        category_text = render_text(font_small, category, BLACK)
         screen.blit(category_text, (start_x + 10, y_pos + (row_height - category_text.get_height()) // 2))
         
         # Draw horizontal line
@@ -735,7 +865,7 @@ def draw_scoreboard(screen, game):
             score = player.scorecard.scores[category]
             
             if score is not None:
-                score_text = font_small.render(str(score), True, BLACK)
+                score_text = render_text(font_small, str(score), BLACK)
                 score_x = start_x + category_width + i * player_column_width + player_column_width // 2
                 screen.blit(score_text, (score_x - score_text.get_width() // 2, y_pos + (row_height - score_text.get_height()) // 2))
             else:
@@ -759,97 +889,285 @@ def draw_scoreboard(screen, game):
     
     # Draw totals
     y_pos += 10
-    total_text = font_medium.render("Total:", True, BLACK)
+    total_text = render_text(font_medium, "Total:", BLACK)
     screen.blit(total_text, (start_x + 10, y_pos))
     
     for i, player in enumerate(game.players):
         total_score = player.total_score
-        total_score_text = font_medium.render(str(total_score), True, GREEN if i == game.current_player_index else BLACK)
+        total_score_text = render_text(font_medium, str(total_score), GREEN if i == game.current_player_index else BLACK)
         total_score_x = start_x + category_width + i * player_column_width + player_column_width // 2
         screen.blit(total_score_text, (total_score_x - total_score_text.get_width() // 2, y_pos))
     
     # Back button
-    button_width = 100
-    button_height = 40
-    back_rect = pygame.Rect(width // 2 - button_width // 2, height - button_height - 30, button_width, button_height)
+    back_rect = layout.back_button
     pygame.draw.rect(screen, GREEN, back_rect)
-    back_text = font_small.render("Back", True, BLACK)
+    back_text = render_text(font_small, "Back", BLACK)
     screen.blit(back_text, (back_rect.centerx - back_text.get_width() // 2, 
                           back_rect.centery - back_text.get_height() // 2))
 
 # Add these functions after the draw_ functions to handle responsive layout
 def get_screen_dimensions():
     """Get current screen dimensions for responsive layout"""
+    if screen is None:
+        # No window yet: lay out for the default size
+        return SCREEN_WIDTH, SCREEN_HEIGHT
     return screen.get_width(), screen.get_height()
 
-def get_dice_positions():
-    """Calculate dice positions based on current screen size"""
-    width, height = get_screen_dimensions()
-    dice_spacing = 80
-    start_x = (width - dice_spacing * DICE_COUNT) // 2
-    y_pos = min(150, height // 4)  # Adjust y position based on screen height
+# Size of the square cells in the click lookup grid
+HIT_CELL_SIZE = 64
+
+class Layout:
+    """Every widget rect for one screen size, shared by drawing and click handling"""
     
-    positions = []
-    for i in range(DICE_COUNT):
-        positions.append((start_x + i * dice_spacing, y_pos))
-    return positions
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        
+        # Menu: one button per player count, then help
+        self.menu_y = height // 6
+        button_x = width // 2 - 100
+        self.player_buttons = {}
+        for i in range(MIN_PLAYERS, MAX_PLAYERS + 1):
+            self.player_buttons[i] = pygame.Rect(button_x, self.menu_y + 100 + 50 * (i - MIN_PLAYERS), 200, 40)
+        self.help_button = pygame.Rect(button_x, self.menu_y + 100 + 50 * (MAX_PLAYERS - MIN_PLAYERS + 1), 200, 40)
+        
+        # Playing: dice row, roll button, scoreboard button and category rows
+        dice_spacing = 80
+        dice_x = (width - dice_spacing * DICE_COUNT) // 2
+        dice_y = min(150, height // 4)  # Adjust y position based on screen height
+        self.dice_positions = [(dice_x + i * dice_spacing, dice_y) for i in range(DICE_COUNT)]
+        self.dice_rects = [pygame.Rect(x, y, 60, 60) for x, y in self.dice_positions]
+        self.roll_button = pygame.Rect(width // 2 - 50, dice_y + 100, 100, 40)
+        self.scoreboard_button = pygame.Rect(width - 150, 20, 130, 30)
+        
+        # Rows shrink on short screens; boxes keep their height and may overlap
+        available_height = height - 350  # Space after other UI elements
+        self.row_height = min(30, max(20, available_height // len(CATEGORIES)))
+        self.category_rects = [pygame.Rect(30, 320 + i * self.row_height, 200, 30) for i in range(len(CATEGORIES))]
+        self.scores_x = min(550, width - 200)  # Keep visible on smaller screens
+        self.chance_x = 370
+        self.expected_x = 455
+        self.odds_fits = self.expected_x + 75 <= self.scores_x
+        
+        # Game over, help and scoreboard buttons
+        self.play_again_button = pygame.Rect(width // 2 - 100, height - 100, 200, 50)
+        self.back_button = pygame.Rect(width // 2 - 50, height - 70, 100, 40)
+        self.scoreboard_row_height = min(30, max(24, (height - 170) // len(CATEGORIES)))
+        self._scoreboard_columns = {}
+        
+        # Clickable widgets per state; earlier entries win where rects overlap
+        widgets = {
+            'menu': [(rect, ('players', i)) for i, rect in self.player_buttons.items()]
+                    + [(self.help_button, ('help',))],
+            'playing': [(rect, ('die', i)) for i, rect in enumerate(self.dice_rects)]
+                       + [(self.roll_button, ('roll',)), (self.scoreboard_button, ('scoreboard',))]
+                       + [(rect, ('category', category)) for rect, category in zip(self.category_rects, CATEGORIES)],
+            'game_over': [(self.play_again_button, ('play_again',))],
+            'help': [(self.back_button, ('back',))],
+            'scoreboard': [(self.back_button, ('back',))],
+        }
+        self.hit_index = {state: self._build_index(entries) for state, entries in widgets.items()}
+    
+    @staticmethod
+    def _build_index(entries):
+        """Bucket widgets into a grid so a click only checks the few rects in its cell"""
+        cells = {}
+        for rect, widget in entries:
+            for cx in range(rect.left // HIT_CELL_SIZE, (rect.right - 1) // HIT_CELL_SIZE + 1):
+                for cy in range(rect.top // HIT_CELL_SIZE, (rect.bottom - 1) // HIT_CELL_SIZE + 1):
+                    cells.setdefault((cx, cy), []).append((rect, widget))
+        return cells
+    
+    def hit_test(self, state, pos):
+        """Return the widget id under pos on the given screen, or None"""
+        x, y = pos
+        cell = self.hit_index.get(state, {}).get((x // HIT_CELL_SIZE, y // HIT_CELL_SIZE), ())
+        for rect, widget in cell:
+            if rect.collidepoint(pos):
+                return widget
+        return None
+    
+    def scoreboard_columns(self, player_count):
+        """Return (start_x, category_width, player_column_width) for the scoreboard table"""
+        columns = self._scoreboard_columns.get(player_count)
+        if columns is None:
+            category_width = 150
+            player_column_width = min(100, (self.width - category_width) // player_count)
+            start_x = (self.width - (category_width + player_column_width * player_count)) // 2
+            columns = self._scoreboard_columns[player_count] = (start_x, category_width, player_column_width)
+        return columns
+
+_layout = None
+
+def get_layout():
+    """Return the layout for the current screen size, rebuilding it only after a resize"""
+    global _layout
+    width, height = get_screen_dimensions()
+    if _layout is None or _layout.width != width or _layout.height != height:
+        _layout = Layout(width, height)
+    return _layout
+
+def get_play_again_rect():
+    return get_layout().play_again_button
+
+def draw_screen(screen, game):
+    """Draw the appropriate screen based on game state"""
+    if game.state == 'menu':
+        draw_menu(screen)
+    elif game.state == 'playing':
+        draw_game(screen, game)
+    elif game.state == 'game_over':
+        draw_game_over(screen, game)
+    elif game.state == 'help':
+        draw_help(screen)
+    elif game.state == 'scoreboard':
+        draw_scoreboard(screen, game)
+
+# Profiler phase for each screen's draw function
+DRAW_PHASES = {
+    'menu': 'draw_menu',
+    'playing': 'draw_game',
+    'game_over': 'draw_game_over',
+    'help': 'draw_help',
+    'scoreboard': 'draw_scoreboard',
+}
+
+def render_dirty(screen, game):
+    """Repaint only the regions that changed and push just those to the display"""
+    if profiler.show_overlay and profiler.overlay_rect():
+        # The overlay is translucent, so whatever is under it is redrawn first
+        game.dirty.add(profiler.overlay_rect())
+    rects = game.dirty.take(screen.get_rect())
+    for rect in rects:
+        screen.set_clip(rect)
+        draw_screen(screen, game)
+    screen.set_clip(None)
+    profiler.lap(DRAW_PHASES.get(game.state, 'draw'))
+    overlay_rect = profiler.draw_overlay(screen)
+    if overlay_rect:
+        rects.append(overlay_rect)
+    profiler.lap('overlay')
+    if rects:
+        pygame.display.update(rects)
+    profiler.lap('display')
+    return rects
+
+def export_profile(path=None):
+    """Write the profiler's recorded frames and return the file name"""
+    path = path or os.path.join('profiles', time.strftime('yacht-%Y%m%d-%H%M%S.jsonl'))
+    return profiler.export(path)
+
+def quit_game():
+    if profile_path:
+        export_profile(profile_path)
+    pygame.quit()
+    sys.exit()
+
+# How long to sleep waiting for input when nothing on screen is changing
+IDLE_WAIT_MS = 1000
 
 # Main game loop
 def main():
     # Add global screen declaration
     global screen
     
-    # Generate dice images
-    global dice_images
-    dice_images = generate_dice_images()
+    # Open the window and generate dice images
+    init_display()
     
     # Create game object
     game = YachtGame()
+    if resume_path:
+        game.resume_game(resume_path)
     
     # Main game loop
     clock = pygame.time.Clock()
     running = True
     
     while running:
-        for event in pygame.event.get():
+        profiler.begin_frame()
+        if game.dirty.is_clean() and not game.is_animating():
+            # Nothing to animate: sleep until input arrives instead of spinning at 60 FPS
+            first = pygame.event.wait(IDLE_WAIT_MS)
+            profiler.lap('idle')
+            events = [first] + pygame.event.get()
+        else:
+            events = pygame.event.get()
+        
+        for event in events:
             if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
+                game.close_log()
+                quit_game()
             
             if event.type == MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
                     game.handle_click(event.pos)
+                    game.dirty.invalidate()
             
             if event.type == MOUSEMOTION:
                 game.handle_mouse_motion(event.pos)
+            
+            if event.type == KEYDOWN and event.key == K_h:
+                game.show_hint()
+                game.dirty.invalidate()
+            
+            if event.type == KEYDOWN and event.key == K_o:
+                game.show_odds = not game.show_odds
+                game.dirty.invalidate()
+            
+            if event.type == KEYDOWN and event.key == K_F3:
+                profiler.toggle_overlay()
+                game.dirty.invalidate()
+            
+            if event.type == KEYDOWN and event.key == K_F4 and profiler.frames:
+                print(f"Frame timings written to {export_profile()}")
                 
             if event.type == VIDEORESIZE:
                 # Update the global screen variable to handle resizing
                 screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                # Surfaces rendered for the old display are dropped with it
+                text_cache.invalidate()
                 # Reposition dice if we're in playing state
                 if game.state == 'playing':
-                    positions = get_dice_positions()
-                    for i, die in enumerate(game.dice):
-                        die.x, die.y = positions[i]
-                        die.rect = pygame.Rect(die.x, die.y, die.size, die.size)
+                    for die, (x, y) in zip(game.dice, get_layout().dice_positions):
+                        die.move_to(x, y)
+                game.dirty.invalidate()
+            
+            if event.type in (WINDOWEXPOSED, VIDEOEXPOSE):
+                game.dirty.invalidate()
+        
+        profiler.lap('events')
         
         # Update game state
         game.update()
+        if game.log:
+            game.log.poll()
+        profiler.lap('update')
         
-        # Draw the appropriate screen based on game state
-        if game.state == 'menu':
-            draw_menu(screen)
-        elif game.state == 'playing':
-            draw_game(screen, game)
-        elif game.state == 'game_over':
-            draw_game_over(screen, game)
-        elif game.state == 'help':
-            draw_help(screen)
-        elif game.state == 'scoreboard':
-            draw_scoreboard(screen, game)
-        
-        pygame.display.flip()
+        # Draw only what changed
+        render_dirty(screen, game)
         clock.tick(60)
+        profiler.lap('sleep')
+        profiler.end_frame()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'simulate':
+        # Headless tournament: python -m yacht_game simulate --players 4 --games 1000000
+        from yacht_tournament import main as simulate
+        simulate(sys.argv[2:])
+    else:
+        parser = argparse.ArgumentParser(description="Yacht Dice Game")
+        parser.add_argument('--profile', metavar='PATH',
+                            help="time every frame and write the timings to PATH (.jsonl or .csv) on exit")
+        parser.add_argument('--resume', nargs='?', const='', metavar='LOG',
+                            help="continue a saved game (default: the latest unfinished one in saves/)")
+        parser.add_argument('--no-save', action='store_true', help="do not log games to saves/")
+        args = parser.parse_args()
+        save_games = not args.no_save
+        if args.resume is not None:
+            resume_path = args.resume or yacht_log.latest_unfinished()
+            if resume_path is None:
+                parser.exit(1, "No unfinished game in saves/\n")
+        if args.profile:
+            profile_path = args.profile
+            profiler.enabled = True
+        main()
@@ -0,0 +1,254 @@
+"""Load generator for yacht_server: many bot clients playing complete games.
+
+Each client opens its own TCP connection, joins a table through matchmaking
+and plays whenever a state update says it is its turn. It rolls, sometimes
+locks a random subset of dice and rolls again, and then scores the open
+category worth the most. When a game ends it joins the next one. Every
+request carries an id, and latency is the time from writing a request to
+reading its ok/error reply.
+
+Clients are spread over --processes worker processes so that the generator
+is not the bottleneck. With --spawn the server is started as a subprocess,
+pinned to one core when the platform allows it. Its CPU time is also read
+from /proc, and commands per server CPU-second is reported as well. That is the
+single-core capacity even when the clients share the machine.
+
+    python yacht_loadgen.py --spawn --clients 2000 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from yacht_rules import CATEGORY_NAMES, DICE_COUNT, MAX_ROLLS, score_vector
+from yacht_server import DEFAULT_PORT, encode
+
+# Latencies kept per worker for the percentiles (a uniform sample beyond this)
+LATENCY_SAMPLES = 200000
+
+
+class BotClient:
+    def __init__(self, reader, writer, seats, rng, stats):
+        self.reader = reader
+        self.writer = writer
+        self.seats = seats
+        self.rng = rng
+        self.stats = stats
+        self.next_id = 0
+        self.sent_at = {}
+        self.seat = None
+        self.state = None
+        self.acted_seq = -1
+
+    def request(self, message):
+        self.next_id += 1
+        message['id'] = self.next_id
+        self.sent_at[self.next_id] = time.perf_counter()
+        self.writer.write(encode(message).encode() + b'\n')
+
+    def act(self):
+        """Send the next move if it is our turn and nothing is still in flight"""
+        state = self.state
+        if self.sent_at or state is None or 'current' not in state or state['seq'] <= self.acted_seq:
+            return
+        self.acted_seq = state['seq']
+        if state['game_over']:
+            self.stats['games'] += 1
+            self.seat = self.state = None
+            self.acted_seq = -1
+            self.request({'op': 'join', 'seats': self.seats})
+            return
+        if state['current'] != self.seat:
+            return
+        rolls_left = state['rolls_left']
+        if rolls_left == MAX_ROLLS or rolls_left and self.rng.random() < 0.6:
+            if rolls_left < MAX_ROLLS:
+                keep = [i for i in range(DICE_COUNT) if self.rng.random() < 0.5]
+                self.request({'op': 'lock', 'dice': keep})
+            self.request({'op': 'roll'})
+        else:
+            scores = score_vector(state['dice'])
+            used = state['scores'][self.seat]
+            best = max((i for i in range(len(CATEGORY_NAMES)) if used[i] is None), key=lambda i: scores[i])
+            self.request({'op': 'score', 'category': CATEGORY_NAMES[best]})
+
+    def on_message(self, message):
+        kind = message.get('type')
+        if kind == 'state':
+            self.state = message
+            self.act()
+        elif kind in ('ok', 'error'):
+            # A reply comes before the state update it caused, so moves wait for that state
+            sent = self.sent_at.pop(message.get('id'), None)
+            if sent is not None:
+                self.stats['record'](time.perf_counter() - sent)
+            if kind == 'error':
+                self.stats['errors'] += 1
+                self.acted_seq = -1
+                self.act()
+            elif 'seat' in message:
+                self.seat = message['seat']
+        elif kind == 'closed':
+            self.state = None
+            self.acted_seq = -1
+            self.request({'op': 'join', 'seats': self.seats})
+
+    async def run(self, deadline):
+        self.request({'op': 'join', 'seats': self.seats})
+        reader = self.reader
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                line = await asyncio.wait_for(reader.readline(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                break
+            self.on_message(json.loads(line))
+        self.writer.close()
+
+
+async def run_clients(host, port, clients, seats, duration, seed):
+    latencies = []
+    stats = {'errors': 0, 'games': 0, 'replies': 0}
+    rng = random.Random(seed)
+
+    def record(latency):
+        stats['replies'] += 1
+        if len(latencies) < LATENCY_SAMPLES:
+            latencies.append(latency)
+        else:
+            i = rng.randrange(stats['replies'])
+            if i < LATENCY_SAMPLES:
+                latencies[i] = latency
+    stats['record'] = record
+
+    bots = []
+    for i in range(clients):
+        reader, writer = await asyncio.open_connection(host, port)
+        bots.append(BotClient(reader, writer, seats, random.Random(rng.getrandbits(64)), stats))
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(bot.run(deadline) for bot in bots), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    del stats['record']
+    return {'elapsed': elapsed, 'latencies': latencies, **stats}
+
+
+def worker(args):
+    host, port, clients, seats, duration, seed = args
+    return asyncio.run(run_clients(host, port, clients, seats, duration, seed))
+
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"server did not start on {host}:{port}")
+
+
+def spawn_server(port, cpu=0):
+    process = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                             'yacht_server.py'),
+                                '--port', str(port), '--quiet'])
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(process.pid, {cpu})
+        except OSError:
+            pass
+    return process
+
+
+def process_cpu_seconds(pid):
+    """User plus system CPU time of a process from /proc, or None where that is unavailable"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of stat(5), counted after the ")" that ends the name
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bot clients that load a yacht_server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--clients', type=int, default=1000, help="concurrent connections (one seat each)")
+    parser.add_argument('--seats', type=int, default=2, help="players per table")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of play")
+    parser.add_argument('--processes', type=int, default=min(4, os.cpu_count() or 1),
+                        help="client worker processes")
+    parser.add_argument('--spawn', action='store_true', help="start a server subprocess pinned to one core")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    server = spawn_server(args.port) if args.spawn else None
+    server_cpu = None
+    try:
+        wait_for_port(args.host, args.port)
+        cpu_before = process_cpu_seconds(server.pid) if server else None
+        per_worker = [args.clients // args.processes] * args.processes
+        per_worker[0] += args.clients % args.processes
+        jobs = [(args.host, args.port, count, args.seats, args.duration, args.seed * 1000 + i)
+                for i, count in enumerate(per_worker) if count]
+        with multiprocessing.Pool(len(jobs)) as pool:
+            results = pool.map(worker, jobs)
+        if cpu_before is not None:
+            server_cpu = process_cpu_seconds(server.pid) - cpu_before
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    replies = sum(result['replies'] for result in results)
+    elapsed = max(result['elapsed'] for result in results)
+    summary = {
+        'clients': args.clients,
+        'seats': args.seats,
+        'duration_s': elapsed,
+        'commands': replies,
+        'commands_per_s': replies / elapsed if elapsed else 0.0,
+        'games': sum(result['games'] for result in results),
+        'errors': sum(result['errors'] for result in results),
+        'latency_ms': {f"p{q}": percentile(latencies, q) * 1000 for q in (50, 95, 99)},
+    }
+    summary['latency_ms']['max'] = latencies[-1] * 1000 if latencies else 0.0
+    if server_cpu:
+        summary['server_cpu_s'] = server_cpu
+        summary['commands_per_cpu_s'] = replies / server_cpu
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    latency = summary['latency_ms']
+    print(f"{args.clients} clients, {args.seats} seats per table, {elapsed:.1f}s: "
+          f"{summary['commands_per_s']:,.0f} commands/s, {summary['games']} games, {summary['errors']} errors")
+    print(f"latency p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, "
+          f"p99 {latency['p99']:.2f} ms, max {latency['max']:.2f} ms")
+    if server_cpu:
+        print(f"server CPU {server_cpu:.2f}s: {summary['commands_per_cpu_s']:,.0f} commands per CPU-second")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
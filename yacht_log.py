@@ -0,0 +1,357 @@
+"""Append-only event log for Yacht games: crash-safe saves, resume and exact replay.
+
+A game is one log file (saves/<time>-<pid>.ylog), little-endian:
+
+    header : magic b'YLOG', version (1 byte), players (1 byte), seed (8 bytes)
+    events : roll   tag 1, keep mask (1 byte), dice packed 3 bits each (2 bytes)
+             lock   tag 2, die index (1 byte), locked (1 byte)
+             score  tag 3, category index (1 byte), points (1 byte)
+
+The header is the game start. Every action appends a few bytes to a buffer.
+The buffer is written and fsynced once SYNC_EVENTS events are waiting or
+SYNC_INTERVAL seconds have passed, so a crash loses at most that much play.
+A torn record at the end of the file is dropped when the log is read.
+
+Every SNAPSHOT_EVENTS events the whole game state (scores, turn, dice, locks
+and the number of dice drawn from the seeded RNG) goes to a sidecar file,
+<log>.snap. It is written to a temporary file and renamed into place, so it
+is always complete and never points past the synced part of the log.
+Resuming loads the snapshot and replays only the events after it. A log
+without a usable snapshot is replayed from the start. Roll records hold the
+dice that came up, and replay checks every reroll against them.
+
+    python yacht_log.py saves/<file>.ylog    # replay a game turn by turn
+"""
+import glob
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from collections import namedtuple
+
+from yacht_engine import ALL_DICE, YachtEngine
+from yacht_rules import CATEGORY_COUNT, CATEGORY_INDEX, CATEGORY_NAMES, DICE_COUNT, MAX_ROLLS
+
+MAGIC = b'YLOG'
+SNAPSHOT_MAGIC = b'YSNP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBQ')
+ROLL, LOCK, SCORE = 1, 2, 3
+RECORDS = {
+    ROLL: struct.Struct('<BBH'),
+    LOCK: struct.Struct('<BBB'),
+    SCORE: struct.Struct('<BBB'),
+}
+# magic, version, log size, events, RNG draws, turn, current player, rolls left, game over, dice, locks
+SNAPSHOT = struct.Struct('<4sBQIIBBB?HB')
+UNUSED = 255  # Snapshot score byte of an open category
+
+SYNC_EVENTS = 16
+SYNC_INTERVAL = 2.0
+SNAPSHOT_EVENTS = 64
+SAVE_DIR = 'saves'
+
+Event = namedtuple('Event', ['kind', 'index', 'value'])
+Snapshot = namedtuple('Snapshot', ['log_size', 'events', 'draws', 'engine', 'locks'])
+
+
+def pack_dice(dice):
+    packed = 0
+    for i, value in enumerate(dice):
+        packed |= value << 3 * i
+    return packed
+
+
+def unpack_dice(packed):
+    return [packed >> 3 * i & 7 for i in range(DICE_COUNT)]
+
+
+def rerolled(keep_mask):
+    """Number of dice a roll draws from the RNG"""
+    return DICE_COUNT - bin(keep_mask & ALL_DICE).count('1')
+
+
+def new_log_path(directory=SAVE_DIR):
+    return os.path.join(directory, time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}.ylog')
+
+
+def seeded_engine(player_count, seed, draws=DICE_COUNT):
+    """Engine for a logged game whose RNG has already produced `draws` dice.
+
+    YachtEngine draws one rng.random() per die, the opening dice included,
+    so skipping that many values puts the RNG exactly where the game left it.
+    """
+    rng = random.Random(seed)
+    engine = YachtEngine(player_count, rng)
+    for _ in range(draws - DICE_COUNT):
+        rng.random()
+    return engine
+
+
+def apply_event(engine, locks, event):
+    """Apply one logged event to engine and return the new lock mask"""
+    if event.kind == ROLL:
+        dice = unpack_dice(event.value)
+        if engine.roll(event.index) != dice:
+            raise ValueError(f"logged roll {dice} does not follow from the seed")
+    elif event.kind == LOCK:
+        if event.value:
+            locks |= 1 << event.index
+        else:
+            locks &= ~(1 << event.index)
+    else:
+        category = CATEGORY_NAMES[event.index]
+        if engine.score(category) != event.value:
+            raise ValueError(f"logged {category} score {event.value} does not match the dice")
+        locks = 0
+    return locks
+
+
+def read_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError(f"not a yacht log (too short): {path}")
+    magic, version, player_count, seed = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a yacht log: {path}")
+    return player_count, seed
+
+
+def parse_events(data, offset):
+    """Decode records from offset; returns (events, end of the last whole record)"""
+    events = []
+    size = len(data)
+    while offset < size:
+        record = RECORDS.get(data[offset])
+        if record is None or offset + record.size > size:
+            # A torn or garbled tail from a crash: everything before it is intact
+            break
+        kind, index, value = record.unpack_from(data, offset)
+        if kind == LOCK and index >= DICE_COUNT or kind == SCORE and index >= CATEGORY_COUNT:
+            break
+        events.append(Event(kind, index, value))
+        offset += record.size
+    return events, offset
+
+
+def read_log(path):
+    """Return (player_count, seed, events, valid size) of a log file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    player_count, seed = read_header(data, path)
+    events, end = parse_events(data, HEADER.size)
+    return player_count, seed, events, end
+
+
+def encode_snapshot(log_size, events, draws, engine, locks):
+    body = SNAPSHOT.pack(SNAPSHOT_MAGIC, VERSION, log_size, events, draws, engine.turn, engine.current_player,
+                         engine.rolls_left, engine.game_over, pack_dice(engine.dice), locks)
+    scores = bytes(UNUSED if card.scores[category] is None else card.scores[category]
+                   for card in engine.scorecards for category in CATEGORY_NAMES)
+    body += scores
+    return body + struct.pack('<I', zlib.crc32(body))
+
+
+def read_snapshot(path, player_count, seed):
+    """Load <log>.snap, or return None if it is missing or damaged"""
+    try:
+        with open(path + '.snap', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    expected = SNAPSHOT.size + player_count * CATEGORY_COUNT + 4
+    if len(data) != expected or zlib.crc32(data[:-4]) != struct.unpack_from('<I', data, expected - 4)[0]:
+        return None
+    (magic, version, log_size, events, draws, turn, current, rolls_left, game_over,
+     dice, locks) = SNAPSHOT.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != VERSION:
+        return None
+    engine = seeded_engine(player_count, seed, draws)
+    engine.turn = turn
+    engine.current_player = current
+    engine.rolls_left = rolls_left
+    engine.game_over = game_over
+    engine.dice[:] = unpack_dice(dice)
+    scores = data[SNAPSHOT.size:expected - 4]
+    for p, card in enumerate(engine.scorecards):
+        for c, category in enumerate(CATEGORY_NAMES):
+            points = scores[p * CATEGORY_COUNT + c]
+            card.scores[category] = None if points == UNUSED else points
+    return Snapshot(log_size, events, draws, engine, locks)
+
+
+class GameLog:
+    """Writer side of a log: records the actions taken on one engine.
+
+    The caller applies each action to the engine first and then logs it, so a
+    rejected move is never written.
+    """
+
+    def __init__(self, path, engine, seed, locks=0, draws=DICE_COUNT, events=0,
+                 sync_events=SYNC_EVENTS, sync_interval=SYNC_INTERVAL, snapshot_events=SNAPSHOT_EVENTS):
+        self.path = path
+        self.engine = engine
+        self.seed = seed
+        self.locks = locks
+        self.draws = draws
+        self.events = events
+        self.sync_events = sync_events
+        self.sync_interval = sync_interval
+        self.snapshot_events = snapshot_events
+        self.buffer = bytearray()
+        self.pending = 0
+        self.since_snapshot = 0
+        self.last_sync = time.monotonic()
+        self.file = None
+
+    @classmethod
+    def create(cls, engine, seed, path=None, **options):
+        path = path or new_log_path()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        log = cls(path, engine, seed, **options)
+        log.file = open(path, 'wb', buffering=0)
+        log.buffer += HEADER.pack(MAGIC, VERSION, engine.player_count, seed)
+        log.sync()
+        return log
+
+    @property
+    def size(self):
+        """Bytes in the log once the buffer is written"""
+        return self.file.tell() + len(self.buffer)
+
+    def roll(self, keep_mask, dice):
+        self.draws += rerolled(keep_mask)
+        self._append(RECORDS[ROLL].pack(ROLL, keep_mask & ALL_DICE, pack_dice(dice)))
+
+    def lock(self, die, locked):
+        if locked:
+            self.locks |= 1 << die
+        else:
+            self.locks &= ~(1 << die)
+        self._append(RECORDS[LOCK].pack(LOCK, die, bool(locked)))
+
+    def score(self, category, points):
+        self.locks = 0
+        self._append(RECORDS[SCORE].pack(SCORE, CATEGORY_INDEX[category], points))
+        if self.engine.game_over:
+            self.snapshot()
+
+    def _append(self, record):
+        self.buffer += record
+        self.events += 1
+        self.pending += 1
+        self.since_snapshot += 1
+        if self.since_snapshot >= self.snapshot_events:
+            self.snapshot()
+        elif self.pending >= self.sync_events:
+            self.sync()
+        else:
+            self.poll()
+
+    def poll(self):
+        """Sync buffered events that have waited SYNC_INTERVAL; call this once a frame while idle"""
+        if self.buffer and time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Write the buffer and make it durable with one fsync"""
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+            os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def snapshot(self):
+        # The snapshot may only describe events that are already on disk
+        self.sync()
+        temporary = self.path + '.snap.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(encode_snapshot(self.file.tell(), self.events, self.draws, self.engine, self.locks))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path + '.snap')
+        self.since_snapshot = 0
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def resume(path, **options):
+    """Rebuild a game from its log and reopen the log for appending.
+
+    Returns (engine, locks, log). Only the events after the latest snapshot
+    are replayed, and a torn tail left by a crash is cut off first.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    player_count, seed = read_header(data, path)
+    snapshot = read_snapshot(path, player_count, seed)
+    if snapshot is not None and HEADER.size <= snapshot.log_size <= len(data):
+        engine, locks, draws, count = snapshot.engine, snapshot.locks, snapshot.draws, snapshot.events
+        events, end = parse_events(data, snapshot.log_size)
+    else:
+        engine, locks, draws, count = seeded_engine(player_count, seed), 0, DICE_COUNT, 0
+        events, end = parse_events(data, HEADER.size)
+    for event in events:
+        locks = apply_event(engine, locks, event)
+        if event.kind == ROLL:
+            draws += rerolled(event.index)
+    log = GameLog(path, engine, seed, locks, draws, count + len(events), **options)
+    log.file = open(path, 'r+b', buffering=0)
+    log.file.truncate(end)
+    log.file.seek(end)
+    return engine, locks, log
+
+
+def replay(path):
+    """Yield (event, engine, locks) after each event of a logged game, from the first roll"""
+    player_count, seed, events, _ = read_log(path)
+    engine = seeded_engine(player_count, seed)
+    locks = 0
+    for event in events:
+        locks = apply_event(engine, locks, event)
+        yield event, engine, locks
+
+
+def latest_unfinished(directory=SAVE_DIR):
+    """Path of the most recent log whose game is not over, or None"""
+    paths = sorted(glob.glob(os.path.join(directory, '*.ylog')), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        try:
+            player_count, seed, events, _ = read_log(path)
+        except (OSError, ValueError):
+            continue
+        scored = sum(1 for event in events if event.kind == SCORE)
+        if scored < player_count * CATEGORY_COUNT:
+            return path
+    return None
+
+
+def describe(event):
+    if event.kind == ROLL:
+        kept = [i for i in range(DICE_COUNT) if event.index >> i & 1]
+        return f"roll {unpack_dice(event.value)}" + (f" keeping dice {kept}" if kept else "")
+    if event.kind == LOCK:
+        return f"{'lock' if event.value else 'unlock'} die {event.index}"
+    return f"score {CATEGORY_NAMES[event.index]} for {event.value}"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python yacht_log.py <log>")
+        sys.exit(2)
+    engine = None
+    scored = 0
+    for event, engine, locks in replay(sys.argv[1]):
+        player_count = engine.player_count
+        print(f"turn {scored // player_count + 1:2d} player {scored % player_count + 1}: {describe(event)}")
+        scored += event.kind == SCORE
+    if engine is not None:
+        state = "final" if engine.game_over else f"in progress, {MAX_ROLLS - engine.rolls_left} rolls this turn"
+        print(f"totals ({state}): {engine.total_scores()}")
@@ -0,0 +1,57 @@
+"""Exact odds of every category for the rest of the current turn.
+
+For each category on its own, a small dynamic program over the 252 dice
+multisets gives the best chance of ending the turn with a non-zero score
+there and the best expected score there. The player chases only that
+category, and each keep is chosen greedily for it. The program reuses the
+solver's reroll transition matrices, so a whole table is a few matrix
+products:
+
+    value[0][m]  = 1 if SCORES[m] > 0 (or SCORES[m] itself)
+    value[r][m]  = max over keeps k of m of TRANSITIONS[k] @ value[r-1]
+
+Keeping all five dice is one of the keeps, so stopping early is covered
+from the second roll on. For the current dice a category takes the better of
+scoring now and rolling again with exactly the locked dice kept. Results are
+memoized per (multiset, locked dice, rolls left).
+"""
+import numpy as np
+
+from yacht_rules import CATEGORY_COUNT, MAX_ROLLS, MULTISET_INDEX
+from yacht_solver import KEEP_INDEX, KEEP_OPTIONS, SCORES, TRANSITIONS
+
+
+class TurnOdds:
+    def __init__(self):
+        # One row per multiset: the hit probability of every category, then its expected score
+        final = np.hstack([SCORES > 0, SCORES]).astype(np.float64)
+        self.values = [final]
+        for _ in range(1, MAX_ROLLS):
+            after_reroll = TRANSITIONS @ self.values[-1]
+            self.values.append(after_reroll[KEEP_OPTIONS].max(axis=1))
+        self.memo = {}
+
+    def odds(self, dice, locked, rolls_left):
+        """Return (probabilities, expected scores), one entry per category in CATEGORIES order.
+
+        Each category takes the better of scoring the dice on the table now
+        and rolling again with the locked dice kept. Before a turn's first
+        roll the dice on the table cannot be scored, so only the locked ones
+        count. With no rolls left the dice are final.
+        """
+        kept = tuple(sorted(value for value, lock in zip(dice, locked) if lock))
+        if rolls_left == MAX_ROLLS:
+            key = (None, KEEP_INDEX[kept], rolls_left)
+        else:
+            key = (MULTISET_INDEX[tuple(sorted(dice))], KEEP_INDEX[kept] if rolls_left else None, rolls_left)
+        result = self.memo.get(key)
+        if result is None:
+            if rolls_left:
+                row = TRANSITIONS[KEEP_INDEX[kept]] @ self.values[rolls_left - 1]
+                if rolls_left < MAX_ROLLS:
+                    row = np.maximum(row, self.values[0][key[0]])
+            else:
+                row = self.values[0][key[0]].copy()
+            row.setflags(write=False)
+            result = self.memo[key] = (row[:CATEGORY_COUNT], row[CATEGORY_COUNT:])
+        return result
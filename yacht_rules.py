@@ -0,0 +1,219 @@
+"""Yacht scoring rules, kept free of pygame so they can be used headlessly."""
+from array import array
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+# Game constants
+DICE_COUNT = 5
+MAX_ROLLS = 3
+
+# Scoring categories
+CATEGORIES = {
+    'Aces': 'Sum of all 1s',
+    'Twos': 'Sum of all 2s',
+    'Threes': 'Sum of all 3s',
+    'Fours': 'Sum of all 4s',
+    'Fives': 'Sum of all 5s',
+    'Sixes': 'Sum of all 6s',
+    'Choice': 'Sum of all dice',
+    'Four of a Kind': 'Four dice showing the same face',
+    'Full House': 'Three of a kind and a pair',
+    'Small Straight': 'Four sequential dice',
+    'Large Straight': 'Five sequential dice',
+    'Yacht': 'Five dice showing the same face'
+}
+
+CATEGORY_NAMES = tuple(CATEGORIES)
+CATEGORY_INDEX = {category: i for i, category in enumerate(CATEGORY_NAMES)}
+CATEGORY_COUNT = len(CATEGORY_NAMES)
+
+
+def _reference_score(category, dice_values):
+    """Score one category by evaluating the rules directly (used to build the table)"""
+
+    if category == 'Aces':
+        return sum(d for d in dice_values if d == 1)
+    elif category == 'Twos':
+        return sum(d for d in dice_values if d == 2)
+    elif category == 'Threes':
+        return sum(d for d in dice_values if d == 3)
+    elif category == 'Fours':
+        return sum(d for d in dice_values if d == 4)
+    elif category == 'Fives':
+        return sum(d for d in dice_values if d == 5)
+    elif category == 'Sixes':
+        return sum(d for d in dice_values if d == 6)
+    elif category == 'Choice':
+        return sum(dice_values)
+    elif category == 'Four of a Kind':
+        for value in range(1, 7):
+            if dice_values.count(value) >= 4:
+                return value * 4
+        return 0
+    elif category == 'Full House':
+        has_three = False
+        has_two = False
+        for value in range(1, 7):
+            if dice_values.count(value) == 3:
+                has_three = True
+            elif dice_values.count(value) == 2:
+                has_two = True
+        if has_three and has_two:
+            return sum(dice_values)
+        return 0
+    elif category == 'Small Straight':
+        # Check for 1-2-3-4 or 2-3-4-5 or 3-4-5-6
+        sorted_dice = sorted(dice_values)
+        unique_sorted = sorted(set(sorted_dice))
+
+        if len(unique_sorted) >= 4:
+            for i in range(len(unique_sorted) - 3):
+                if unique_sorted[i] + 1 == unique_sorted[i+1] and \
+                   unique_sorted[i+1] + 1 == unique_sorted[i+2] and \
+                   unique_sorted[i+2] + 1 == unique_sorted[i+3]:
+                    return 15
+        return 0
+    elif category == 'Large Straight':
+        # Check for 1-2-3-4-5 or 2-3-4-5-6
+        sorted_dice = sorted(dice_values)
+        if sorted_dice == [1, 2, 3, 4, 5] or sorted_dice == [2, 3, 4, 5, 6]:
+            return 30
+        return 0
+    elif category == 'Yacht':
+        if all(d == dice_values[0] for d in dice_values):
+            return 50
+        return 0
+    return 0
+
+
+# All 252 distinct dice multisets, as sorted tuples, and their index in the table
+MULTISETS = tuple(combinations_with_replacement(range(1, 7), DICE_COUNT))
+MULTISET_INDEX = {dice: i for i, dice in enumerate(MULTISETS)}
+
+
+def _build_score_table():
+    """Build the flat 252 x 12 score table (every score fits in a byte)"""
+    table = array('B')
+    for dice in MULTISETS:
+        dice_values = list(dice)
+        for category in CATEGORY_NAMES:
+            table.append(_reference_score(category, dice_values))
+    return table
+
+
+SCORE_TABLE = _build_score_table()
+
+
+def multiset_index(dice_values):
+    """Return the table row for a roll, or None if it is not a full set of dice"""
+    return MULTISET_INDEX.get(tuple(sorted(dice_values)))
+
+
+def score_vector(dice_values):
+    """Return the scores of all categories for a roll, in CATEGORIES order"""
+    row = multiset_index(dice_values)
+    if row is None:
+        return [_reference_score(category, list(dice_values)) for category in CATEGORY_NAMES]
+    start = row * CATEGORY_COUNT
+    return SCORE_TABLE[start:start + CATEGORY_COUNT].tolist()
+
+
+# Rows scored per pass in score_batch, to bound the size of temporaries
+BATCH_CHUNK = 1 << 20
+
+# Each die adds one to a 3-bit field for its face, so a roll packs its
+# face-count histogram into 18 bits (a count never exceeds 5)
+_FACE_BITS = np.array([0] + [1 << (3 * face) for face in range(6)], dtype=np.int32)
+
+
+def _face_counts(block):
+    """Return the face-count histogram of a block of rolls as six count columns"""
+    packed = _FACE_BITS[block[:, 0]]
+    for die in range(1, DICE_COUNT):
+        packed += _FACE_BITS[block[:, die]]
+    return [((packed >> (3 * face)) & 7).astype(np.int16) for face in range(6)]
+
+
+def _score_counts(counts, out):
+    """Score six face-count columns into out ([n, 12])"""
+    present = [count > 0 for count in counts]
+    choice = np.zeros(len(out), dtype=np.int16)
+    four_kind = np.zeros(len(out), dtype=np.int16)
+    has_three = np.zeros(len(out), dtype=bool)
+    has_two = np.zeros(len(out), dtype=bool)
+    yacht = np.zeros(len(out), dtype=bool)
+
+    for face, count in enumerate(counts):
+        value = face + 1
+        face_total = count * value
+        out[:, face] = face_total
+        choice += face_total
+        four_kind += (count >= 4) * (value * 4)
+        has_three |= count == 3
+        has_two |= count == 2
+        yacht |= count == DICE_COUNT
+
+    out[:, CATEGORY_INDEX['Choice']] = choice
+    out[:, CATEGORY_INDEX['Four of a Kind']] = four_kind
+    out[:, CATEGORY_INDEX['Full House']] = choice * (has_three & has_two)
+
+    middle = present[2] & present[3]
+    small = middle & ((present[0] & present[1]) | (present[1] & present[4])
+                      | (present[4] & present[5]))
+    out[:, CATEGORY_INDEX['Small Straight']] = small * 15
+
+    large = present[1] & middle & present[4] & (present[0] | present[5])
+    out[:, CATEGORY_INDEX['Large Straight']] = large * 30
+
+    out[:, CATEGORY_INDEX['Yacht']] = yacht * 50
+
+
+def score_batch(rolls):
+    """Score many rolls at once.
+
+    rolls is an integer array of shape (N, 5) holding faces 1-6. Returns an
+    int16 array of shape (N, 12) with one column per category, in CATEGORIES
+    order, matching ScoreCard.calculate_possible_score exactly. Any other
+    dtype, shape or face raises ValueError.
+    """
+    rolls = np.asarray(rolls)
+    if not np.issubdtype(rolls.dtype, np.integer):
+        raise ValueError(f"rolls must be an integer array, got {rolls.dtype}")
+    if rolls.ndim != 2 or rolls.shape[1] != DICE_COUNT:
+        raise ValueError(f"rolls must have shape (N, {DICE_COUNT}), got {rolls.shape}")
+    scores = np.empty((rolls.shape[0], CATEGORY_COUNT), dtype=np.int16)
+    if rolls.size == 0:
+        return scores
+    if rolls.min() < 1 or rolls.max() > 6:
+        raise ValueError("dice values must be between 1 and 6")
+
+    for start in range(0, rolls.shape[0], BATCH_CHUNK):
+        block = rolls[start:start + BATCH_CHUNK]
+        _score_counts(_face_counts(block), scores[start:start + BATCH_CHUNK])
+    return scores
+
+
+# Class to handle scoring
+class ScoreCard:
+    def __init__(self):
+        self.scores = {category: None for category in CATEGORIES}
+
+    def calculate_possible_score(self, category, dice_values):
+        """Calculate possible score for a given category with current dice"""
+        column = CATEGORY_INDEX.get(category)
+        if column is None:
+            return 0
+        row = multiset_index(dice_values)
+        if row is None:
+            return _reference_score(category, list(dice_values))
+        return SCORE_TABLE[row * CATEGORY_COUNT + column]
+
+    def record_score(self, category, score):
+        self.scores[category] = score
+
+    def is_category_used(self, category):
+        return self.scores[category] is not None
+
+    def get_total_score(self):
+        return sum(score for score in self.scores.values() if score is not None)
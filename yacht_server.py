@@ -0,0 +1,349 @@
+"""Asyncio server hosting many Yacht tables in one process.
+
+Clients speak newline-delimited JSON over TCP. Every request is one object
+with an "op" and an optional "id" that is echoed in the reply:
+
+    {"op": "join", "seats": 2}                   sit at the next table with a free seat
+    {"op": "join", "table": 17}                  sit at a specific waiting table
+    {"op": "lock", "dice": [0, 3]}               keep these dice on the next roll (after the first)
+    {"op": "roll"}                               reroll every die that is not locked
+    {"op": "score", "category": "Full House"}    score the dice and pass the turn
+    {"op": "leave"}
+
+Each request gets {"type": "ok", "id": ...} or {"type": "error", "id": ...,
+"error": ...}. Whenever a table changes, every seated client receives a
+{"type": "state", ...} snapshot. A table becomes dirty when it changes and is
+encoded once per event-loop tick, however many commands hit it in that tick.
+Each connection's replies are joined into a single write at the same point.
+
+The server is authoritative. Turn order, MAX_ROLLS and category rules are
+enforced by YachtEngine, and an illegal move comes back as an error.
+
+    python yacht_server.py --port 7878
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from yacht_engine import YachtEngine
+from yacht_rules import CATEGORY_NAMES, DICE_COUNT
+
+DEFAULT_PORT = 7878
+MAX_SEATS = 8
+MAX_LINE = 4096
+# Stop reading from a client while this much output is queued for it
+HIGH_WATER = 256 * 1024
+STATS_INTERVAL = 5.0
+
+# json.dumps builds a new encoder on every call when given separators
+encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Table:
+    def __init__(self, table_id, seats, rng):
+        self.id = table_id
+        self.seats = [None] * seats
+        self.engine = None  # Created once every seat is taken
+        self.rng = rng
+        self.locked = 0
+        self.seq = 0
+
+    @property
+    def full(self):
+        return all(self.seats)
+
+    def start(self):
+        self.engine = YachtEngine(len(self.seats), self.rng)
+
+    def state(self):
+        engine = self.engine
+        message = {'type': 'state', 'table': self.id, 'seq': self.seq, 'seats': len(self.seats)}
+        if engine is None:
+            message['waiting'] = sum(1 for client in self.seats if client is None)
+            return message
+        message.update({
+            'turn': engine.turn,
+            'current': engine.current_player,
+            'rolls_left': engine.rolls_left,
+            'dice': engine.dice,
+            'locked': self.locked,
+            'scores': [[card.scores[category] for category in CATEGORY_NAMES] for card in engine.scorecards],
+            'totals': engine.total_scores(),
+            'game_over': engine.game_over,
+        })
+        return message
+
+
+class Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.table = None
+        self.seat = None
+        self.out = []
+
+
+class YachtServer:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.tables = {}
+        self.waiting = {}  # seats -> table still filling up
+        self.next_table = 1
+        self.clients = set()
+        self.dirty_tables = set()
+        self.dirty_clients = set()
+        self.flush_scheduled = False
+        self.commands = 0
+        self.errors = 0
+        self.games_finished = 0
+
+    # Output batching
+
+    def send(self, client, message):
+        client.out.append(encode(message).encode() + b'\n')
+        self.dirty_clients.add(client)
+        self.schedule_flush()
+
+    def touch(self, table):
+        table.seq += 1
+        self.dirty_tables.add(table)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        """Encode each dirty table once and write every client's queued lines in one call"""
+        self.flush_scheduled = False
+        for table in self.dirty_tables:
+            line = encode(table.state()).encode() + b'\n'
+            for client in table.seats:
+                if client is not None:
+                    client.out.append(line)
+                    self.dirty_clients.add(client)
+            if table.engine is not None and table.engine.game_over:
+                self.close_table(table)
+        self.dirty_tables.clear()
+        for client in self.dirty_clients:
+            if client.out and not client.writer.is_closing():
+                client.writer.write(b''.join(client.out))
+            client.out.clear()
+        self.dirty_clients.clear()
+
+    # Tables
+
+    def close_table(self, table):
+        self.tables.pop(table.id, None)
+        if self.waiting.get(len(table.seats)) is table:
+            del self.waiting[len(table.seats)]
+        for client in table.seats:
+            if client is not None and client.table is table:
+                client.table = client.seat = None
+        if table.engine is not None and table.engine.game_over:
+            self.games_finished += 1
+
+    def join(self, client, message):
+        if client.table is not None:
+            raise ProtocolError("already seated")
+        table_id = message.get('table')
+        if table_id is not None:
+            if not isinstance(table_id, int):
+                raise ProtocolError("table must be an integer")
+            table = self.tables.get(table_id)
+            if table is None or table.engine is not None:
+                raise ProtocolError(f"table {table_id} is not open")
+        else:
+            seats = message.get('seats', 2)
+            if not isinstance(seats, int) or not 1 <= seats <= MAX_SEATS:
+                raise ProtocolError(f"seats must be 1-{MAX_SEATS}")
+            table = self.waiting.get(seats)
+            if table is None:
+                table = Table(self.next_table, seats, random.Random(self.rng.getrandbits(64)))
+                self.next_table += 1
+                self.tables[table.id] = table
+                self.waiting[seats] = table
+        seat = table.seats.index(None)
+        table.seats[seat] = client
+        client.table = table
+        client.seat = seat
+        if table.full:
+            if self.waiting.get(len(table.seats)) is table:
+                del self.waiting[len(table.seats)]
+            table.start()
+        self.touch(table)
+        return {'table': table.id, 'seat': seat}
+
+    def leave(self, client):
+        table = client.table
+        if table is None:
+            return
+        if table.engine is None:
+            # Nobody has played yet: just free the seat
+            table.seats[client.seat] = None
+            client.table = client.seat = None
+            if not any(table.seats):
+                self.close_table(table)
+            else:
+                self.touch(table)
+            return
+        # A game in progress cannot continue without the player
+        for other in table.seats:
+            if other is not None and other is not client:
+                self.send(other, {'type': 'closed', 'table': table.id, 'reason': "a player left"})
+        self.dirty_tables.discard(table)
+        self.close_table(table)
+
+    # Commands
+
+    def my_turn(self, client):
+        table = client.table
+        if table is None:
+            raise ProtocolError("not seated")
+        if table.engine is None:
+            raise ProtocolError("waiting for players")
+        if table.engine.current_player != client.seat:
+            raise ProtocolError("not your turn")
+        return table
+
+    def lock(self, client, message):
+        table = self.my_turn(client)
+        dice = message.get('dice', [])
+        if not isinstance(dice, list) or not all(isinstance(i, int) and 0 <= i < DICE_COUNT for i in dice):
+            raise ProtocolError(f"dice must be a list of indices 0-{DICE_COUNT - 1}")
+        if dice and not table.engine.can_lock():
+            raise ProtocolError("roll before locking dice")
+        table.locked = sum(1 << i for i in set(dice))
+        self.touch(table)
+        return {'locked': table.locked}
+
+    def roll(self, client, message):
+        table = self.my_turn(client)
+        try:
+            dice = table.engine.roll(table.locked)
+        except ValueError as e:
+            raise ProtocolError(str(e))
+        self.touch(table)
+        return {'dice': dice}
+
+    def score(self, client, message):
+        table = self.my_turn(client)
+        category = message.get('category')
+        if not isinstance(category, str):
+            raise ProtocolError("category must be a string")
+        try:
+            points = table.engine.score(category)
+        except ValueError as e:
+            raise ProtocolError(str(e))
+        table.locked = 0
+        self.touch(table)
+        return {'points': points}
+
+    def dispatch(self, client, message):
+        op = message.get('op')
+        if op == 'join':
+            return self.join(client, message)
+        if op == 'lock':
+            return self.lock(client, message)
+        if op == 'roll':
+            return self.roll(client, message)
+        if op == 'score':
+            return self.score(client, message)
+        if op == 'leave':
+            self.leave(client)
+            return {}
+        raise ProtocolError(f"unknown op: {op}")
+
+    def handle_line(self, client, line):
+        self.commands += 1
+        request_id = None
+        try:
+            try:
+                message = json.loads(line)
+            except RecursionError:
+                raise ProtocolError("request is nested too deeply")
+            if not isinstance(message, dict):
+                raise ProtocolError("a request must be a JSON object")
+            request_id = message.get('id')
+            reply = self.dispatch(client, message)
+        except (ProtocolError, ValueError) as e:
+            self.errors += 1
+            self.send(client, {'type': 'error', 'id': request_id, 'error': str(e)})
+            return
+        reply['type'] = 'ok'
+        reply['id'] = request_id
+        self.send(client, reply)
+
+    async def handle_client(self, reader, writer):
+        client = Client(writer)
+        self.clients.add(client)
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    self.send(client, {'type': 'error', 'id': None, 'error': "line too long"})
+                    break
+                self.handle_line(client, line)
+                if writer.transport.get_write_buffer_size() > HIGH_WATER:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(client)
+            self.clients.discard(client)
+            writer.close()
+
+    def stats(self):
+        return {
+            'clients': len(self.clients),
+            'tables': len(self.tables),
+            'commands': self.commands,
+            'errors': self.errors,
+            'games_finished': self.games_finished,
+        }
+
+    async def report(self, interval):
+        last = self.commands
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            rate = (stats['commands'] - last) / interval
+            last = stats['commands']
+            print(f"{time.strftime('%H:%M:%S')} {stats['clients']} clients, {stats['tables']} tables, "
+                  f"{rate:,.0f} commands/s, {stats['games_finished']} games finished", flush=True)
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, seed=None, quiet=False):
+    server = YachtServer(seed)
+    listener = await asyncio.start_server(server.handle_client, host, port, limit=MAX_LINE)
+    if not quiet:
+        print(f"Yacht server listening on {host}:{port}", flush=True)
+        asyncio.get_running_loop().create_task(server.report(STATS_INTERVAL))
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-table Yacht server (newline-delimited JSON over TCP)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--seed', type=int, help="seed for every table's dice (reproducible runs)")
+    parser.add_argument('--quiet', action='store_true', help="no periodic stats line")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.seed, args.quiet))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
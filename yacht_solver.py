@@ -0,0 +1,221 @@
+"""Optimal single-player Yacht strategy.
+
+The solver works backwards over scorecard states: a state is the bitmask of
+used categories (bit i is CATEGORY_NAMES[i]), and within a turn the dice are
+one of the 252 multisets in yacht_rules.MULTISETS. For every state it stores
+the expected final score, the value of each dice multiset with 0..MAX_ROLLS-1
+rolls left, the best dice to keep and the best category to score.
+
+The table is built once and saved as a single .npy file that later runs open
+memory-mapped, so queries never recompute anything.
+"""
+import hashlib
+import math
+import os
+import sys
+import time
+from collections import Counter
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+from yacht_rules import (CATEGORY_COUNT, CATEGORY_NAMES, DICE_COUNT, MAX_ROLLS,
+                         MULTISET_INDEX, MULTISETS, SCORE_TABLE)
+
+STATE_COUNT = 1 << CATEGORY_COUNT
+FULL_MASK = STATE_COUNT - 1
+MULTISET_COUNT = len(MULTISETS)
+
+# Every multiset of 0..DICE_COUNT dice that can be kept before a reroll
+KEEPS = tuple(keep for size in range(DICE_COUNT + 1)
+              for keep in combinations_with_replacement(range(1, 7), size))
+KEEP_INDEX = {keep: i for i, keep in enumerate(KEEPS)}
+
+# Five distinct dice have 2^5 sub-multisets, the most any roll can have
+MAX_KEEP_OPTIONS = 1 << DICE_COUNT
+
+TABLE_DIR = 'solver'
+
+
+def _sub_multisets(dice):
+    """Return the distinct sorted sub-multisets of a sorted roll"""
+    subsets = set()
+    for bits in range(1 << len(dice)):
+        subsets.add(tuple(d for i, d in enumerate(dice) if bits >> i & 1))
+    return sorted(subsets, key=lambda keep: (len(keep), keep))
+
+
+def _build_keep_options():
+    """Return a (252, 32) array of keep indices per multiset, padded by repetition"""
+    options = np.empty((MULTISET_COUNT, MAX_KEEP_OPTIONS), dtype=np.int16)
+    for row, dice in enumerate(MULTISETS):
+        keeps = [KEEP_INDEX[keep] for keep in _sub_multisets(dice)]
+        keeps += [keeps[-1]] * (MAX_KEEP_OPTIONS - len(keeps))
+        options[row] = keeps
+    return options
+
+
+def _build_transitions():
+    """Return the (keeps, 252) matrix of probabilities of each roll after a reroll"""
+    transitions = np.zeros((len(KEEPS), MULTISET_COUNT))
+    for k, keep in enumerate(KEEPS):
+        rolled = DICE_COUNT - len(keep)
+        for outcome in combinations_with_replacement(range(1, 7), rolled):
+            ways = math.factorial(rolled)
+            for count in Counter(outcome).values():
+                ways //= math.factorial(count)
+            dice = tuple(sorted(keep + outcome))
+            transitions[k, MULTISET_INDEX[dice]] += ways / 6 ** rolled
+    return transitions
+
+
+KEEP_OPTIONS = _build_keep_options()
+TRANSITIONS = _build_transitions()
+FIRST_ROLL = TRANSITIONS[KEEP_INDEX[()]]
+SCORES = np.frombuffer(SCORE_TABLE, dtype=np.uint8).reshape(MULTISET_COUNT, CATEGORY_COUNT)
+
+TABLE_DTYPE = np.dtype([
+    ('expected', np.float64),
+    ('values', np.float32, (MAX_ROLLS, MULTISET_COUNT)),
+    ('keep', np.uint8, (MAX_ROLLS, MULTISET_COUNT)),
+    ('category', np.int8, (MULTISET_COUNT,)),
+])
+
+
+def table_fingerprint():
+    """Identify the rules a table was built for, so a stale file is never used"""
+    digest = hashlib.sha1(SCORE_TABLE.tobytes())
+    digest.update(f"{DICE_COUNT}:{MAX_ROLLS}:{','.join(CATEGORY_NAMES)}".encode())
+    return digest.hexdigest()[:12]
+
+
+def default_table_path():
+    return os.path.join(TABLE_DIR, f"yacht_policy_{table_fingerprint()}.npy")
+
+
+def build_table():
+    """Compute the full policy table by retrograde dynamic programming"""
+    table = np.zeros(STATE_COUNT, dtype=TABLE_DTYPE)
+    table['category'] = -1
+    expected = np.zeros(STATE_COUNT)
+    bits = 1 << np.arange(CATEGORY_COUNT)
+    popcounts = np.array([bin(mask).count('1') for mask in range(STATE_COUNT)])
+
+    # Masks with more used categories are solved first; each layer only
+    # depends on the layer above it
+    for used in range(CATEGORY_COUNT - 1, -1, -1):
+        masks = np.flatnonzero(popcounts == used)
+        is_used = (masks[:, None] & bits) != 0
+        next_expected = expected[masks[:, None] | bits]
+
+        # No rolls left: score the best open category
+        totals = SCORES[None, :, :] + next_expected[:, None, :]
+        totals[np.broadcast_to(is_used[:, None, :], totals.shape)] = -np.inf
+        category = totals.argmax(axis=2)
+        value = np.take_along_axis(totals, category[:, :, None], axis=2)[:, :, 0]
+        table['category'][masks] = category
+        table['values'][masks, 0] = value
+
+        # Rolls left: keep the sub-multiset whose reroll has the best expectation
+        for rolls_left in range(1, MAX_ROLLS):
+            keep_values = value @ TRANSITIONS.T
+            options = keep_values[:, KEEP_OPTIONS]
+            keep = options.argmax(axis=2)
+            value = np.take_along_axis(options, keep[:, :, None], axis=2)[:, :, 0]
+            table['keep'][masks, rolls_left] = keep
+            table['values'][masks, rolls_left] = value
+
+        expected[masks] = value @ FIRST_ROLL
+
+    table['expected'] = expected
+    return table
+
+
+def save_table(table, path):
+    """Write the table atomically so a crash never leaves a truncated file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    np.save(temp_path, table, allow_pickle=False)
+    # np.save appends .npy when the name does not already end with it
+    os.replace(temp_path + '.npy', path)
+
+
+def load_table(path=None, build=True):
+    """Open the policy table memory-mapped, building and saving it if missing"""
+    path = path or default_table_path()
+    if not os.path.exists(path):
+        if not build:
+            raise FileNotFoundError(path)
+        save_table(build_table(), path)
+    return np.load(path, mmap_mode='r', allow_pickle=False)
+
+
+def used_mask(scorecard):
+    """Return the used-category bitmask of a ScoreCard"""
+    mask = 0
+    for i, category in enumerate(CATEGORY_NAMES):
+        if scorecard.scores[category] is not None:
+            mask |= 1 << i
+    return mask
+
+
+def keep_flags(dice_values, keep):
+    """Map a kept multiset back onto dice positions as a list of lock flags"""
+    remaining = Counter(keep)
+    flags = []
+    for value in dice_values:
+        if remaining[value] > 0:
+            remaining[value] -= 1
+            flags.append(True)
+        else:
+            flags.append(False)
+    return flags
+
+
+class YachtSolver:
+    """Query the optimal policy for a single player's scorecard"""
+
+    def __init__(self, table):
+        self.table = table
+        # Field views are taken once; indexing a structured field per query is slow
+        self.expected = table['expected']
+        self.keep = table['keep']
+        self.category = table['category']
+
+    @classmethod
+    def load(cls, path=None, build=True):
+        return cls(load_table(path, build))
+
+    def expected_score(self, mask):
+        """Expected remaining score from the start of a turn"""
+        return float(self.expected[mask])
+
+    def best_category(self, mask, dice_values):
+        """Best category to score the current dice in"""
+        row = MULTISET_INDEX[tuple(sorted(dice_values))]
+        return CATEGORY_NAMES[self.category[mask, row]]
+
+    def best_keep(self, mask, dice_values, rolls_left):
+        """Lock flags per die for the next roll (all True means score now)"""
+        row = MULTISET_INDEX[tuple(sorted(dice_values))]
+        option = self.keep[mask, rolls_left, row]
+        return keep_flags(dice_values, KEEPS[KEEP_OPTIONS[row, option]])
+
+    def decide(self, mask, dice_values, rolls_left):
+        """Return ('roll', lock_flags) or ('score', category) for a rolled turn"""
+        if rolls_left > 0:
+            flags = self.best_keep(mask, dice_values, rolls_left)
+            if not all(flags):
+                return 'roll', flags
+        return 'score', self.best_category(mask, dice_values)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else default_table_path()
+    start = time.time()
+    table = build_table()
+    save_table(table, path)
+    print(f"Built {path} in {time.time() - start:.1f}s, "
+          f"expected score {table['expected'][0]:.2f}")
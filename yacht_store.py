@@ -0,0 +1,306 @@
+"""Columnar store of Yacht turns for analytics over simulated and played games.
+
+A store is a directory with one row per turn (one player's rolls and the
+category they scored) split into chunks. Each chunk keeps every column in its
+own .npy file, <chunk>.<column>.npy:
+
+    game      uint32          game number inside the chunk (games never span chunks)
+    player    uint8           seat
+    turn      uint8           round, 0-11
+    rolls     uint8           rolls taken, 1-3
+    dice      uint16 (3,)     dice after each roll, 3 bits per die (yacht_log.pack_dice), 0 if not rolled
+    keep      uint8 (3,)      keep mask each roll was made with (bit i keeps die i)
+    category  uint8           index into CATEGORY_NAMES
+    score     uint8           points scored
+
+manifest.json lists the chunks that are complete, with their row and game
+counts and where they came from (tournament policies and seed, or a log
+file). Chunk files are written before the manifest names them, so a store
+interrupted mid-run still reads cleanly. Queries open the columns with
+mmap_mode='r' and reduce one chunk at a time, so memory use is bounded by
+the chunk size rather than the store size.
+
+    python -m yacht_game simulate --games 1000000 --store runs/optimal
+    python yacht_store.py runs/optimal --import-logs saves/*.ylog
+    python yacht_store.py runs/optimal                # summary report
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from yacht_log import ROLL, SCORE, pack_dice, replay
+from yacht_rules import CATEGORY_COUNT, CATEGORY_INDEX, CATEGORY_NAMES, DICE_COUNT, MAX_ROLLS
+
+MANIFEST = 'manifest.json'
+VERSION = 1
+COLUMNS = {
+    'game': (np.uint32, ()),
+    'player': (np.uint8, ()),
+    'turn': (np.uint8, ()),
+    'rolls': (np.uint8, ()),
+    'dice': (np.uint16, (MAX_ROLLS,)),
+    'keep': (np.uint8, (MAX_ROLLS,)),
+    'category': (np.uint8, ()),
+    'score': (np.uint8, ()),
+}
+YACHT = CATEGORY_INDEX['Yacht']
+DIE_SHIFTS = np.arange(DICE_COUNT, dtype=np.uint16) * 3
+# Packed dice of the six Yachts, so five of a kind is found without unpacking
+YACHT_DICE = np.array([pack_dice([face] * DICE_COUNT) for face in range(1, 7)], dtype=np.uint16)
+
+
+def unpack_dice(packed):
+    """Vectorized inverse of pack_dice: (...) uint16 -> (..., DICE_COUNT) uint8"""
+    return (packed[..., None] >> DIE_SHIFTS & 7).astype(np.uint8)
+
+
+class TurnRecorder:
+    """Collects turns as plain lists while games are played; arrays() converts them once.
+
+    A turn becomes a row when it is scored, so a turn cut off mid-way is dropped.
+    """
+
+    def __init__(self):
+        self.game = 0
+        self.columns = {name: [] for name in COLUMNS}
+        self.player = self.turn = 0
+        self.turn_dice = []
+        self.turn_keep = []
+
+    def start_turn(self, player, turn):
+        self.player = player
+        self.turn = turn
+        self.turn_dice = []
+        self.turn_keep = []
+
+    def roll(self, keep_mask, dice):
+        self.turn_dice.append(pack_dice(dice))
+        self.turn_keep.append(keep_mask)
+
+    def score(self, category, points):
+        columns = self.columns
+        rolls = len(self.turn_dice)
+        padding = [0] * (MAX_ROLLS - rolls)
+        columns['game'].append(self.game)
+        columns['player'].append(self.player)
+        columns['turn'].append(self.turn)
+        columns['rolls'].append(rolls)
+        columns['dice'].append(self.turn_dice + padding)
+        columns['keep'].append(self.turn_keep + padding)
+        columns['category'].append(CATEGORY_INDEX[category])
+        columns['score'].append(points)
+
+    def end_game(self):
+        self.game += 1
+
+    def __len__(self):
+        return len(self.columns['score'])
+
+    def arrays(self):
+        rows = len(self)
+        return {name: np.array(values, dtype=COLUMNS[name][0]).reshape((rows,) + COLUMNS[name][1])
+                for name, values in self.columns.items()}
+
+
+def write_chunk(directory, name, arrays, games, source):
+    """Save one chunk's columns and return its manifest entry"""
+    for column, array in arrays.items():
+        np.save(os.path.join(directory, f'{name}.{column}.npy'), array)
+    return {'name': name, 'rows': len(arrays['score']), 'games': games, 'source': source}
+
+
+class StoreWriter:
+    """Adds chunks to a store directory, new or existing"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            self.manifest = read_manifest(directory)
+        else:
+            self.manifest = {
+                'version': VERSION,
+                'columns': {name: [np.dtype(dtype).str, list(shape)] for name, (dtype, shape) in COLUMNS.items()},
+                'chunks': [],
+            }
+        self.next_chunk = len(self.manifest['chunks'])
+
+    def reserve(self, count=1):
+        """Names for chunks that will be written, possibly by other processes"""
+        names = [f'{self.next_chunk + i:06d}' for i in range(count)]
+        self.next_chunk += count
+        return names
+
+    def add(self, entry):
+        self.manifest['chunks'].append(entry)
+
+    def write(self, arrays, games, source):
+        name, = self.reserve()
+        self.add(write_chunk(self.directory, name, arrays, games, source))
+
+    def commit(self):
+        """Atomically replace the manifest so readers see only finished chunks"""
+        self.manifest['chunks'].sort(key=lambda entry: entry['name'])
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != VERSION:
+        raise ValueError(f"unsupported store version in {directory}")
+    return manifest
+
+
+def import_logs(writer, paths):
+    """Add the completed turns of yacht_log game logs to a store, one chunk for all of them"""
+    recorder = TurnRecorder()
+    sources = []
+    for path in paths:
+        scored = 0
+        rolling = False
+        for event, engine, locks in replay(path):
+            if event.kind == ROLL:
+                if not rolling:
+                    recorder.start_turn(scored % engine.player_count, scored // engine.player_count)
+                    rolling = True
+                recorder.roll(event.index, engine.dice)
+            elif event.kind == SCORE:
+                recorder.score(CATEGORY_NAMES[event.index], event.value)
+                scored += 1
+                rolling = False
+        recorder.end_game()
+        sources.append(os.path.basename(path))
+    if len(recorder):
+        writer.write(recorder.arrays(), recorder.game, {'logs': sources})
+    return len(recorder)
+
+
+class TurnStore:
+    """Read side: memory-mapped columns and aggregates computed chunk by chunk"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.chunks = self.manifest['chunks']
+
+    @property
+    def rows(self):
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    @property
+    def games(self):
+        return sum(chunk['games'] for chunk in self.chunks)
+
+    def column(self, chunk, name):
+        return np.load(os.path.join(self.directory, f"{chunk['name']}.{name}.npy"), mmap_mode='r')
+
+    def scan(self, *columns, where=None, policy=None):
+        """Yield {column: array} per chunk, optionally filtered.
+
+        where(chunk) returns a boolean row mask for the loaded columns, and
+        policy keeps only the seats that a tournament policy of that name played.
+        """
+        needed = set(columns)
+        if policy is not None:
+            needed.add('player')
+        for chunk in self.chunks:
+            mask = None
+            if policy is not None:
+                seats = [seat for seat, name in enumerate(chunk['source'].get('policies', ())) if name == policy]
+                if not seats:
+                    continue
+            data = {name: self.column(chunk, name) for name in needed}
+            if policy is not None:
+                mask = np.isin(data['player'], seats)
+            if where is not None:
+                selected = where(data)
+                mask = selected if mask is None else mask & selected
+            if mask is not None:
+                data = {name: array[mask] for name, array in data.items()}
+            yield {name: data[name] for name in columns}
+
+    def category_totals(self, **filters):
+        """Per category: (times scored, points scored)"""
+        counts = np.zeros(CATEGORY_COUNT, dtype=np.int64)
+        points = np.zeros(CATEGORY_COUNT, dtype=np.int64)
+        for data in self.scan('category', 'score', **filters):
+            counts += np.bincount(data['category'], minlength=CATEGORY_COUNT)
+            points += np.bincount(data['category'], weights=data['score'], minlength=CATEGORY_COUNT).astype(np.int64)
+        return counts, points
+
+    def category_means(self, **filters):
+        """Average score of each category when it is filled"""
+        counts, points = self.category_totals(**filters)
+        return {category: points[i] / counts[i] if counts[i] else 0.0 for i, category in enumerate(CATEGORY_NAMES)}
+
+    def fill_order(self, **filters):
+        """int64 (categories, turns) matrix: how often each category was filled in each round"""
+        counts = np.zeros(CATEGORY_COUNT * CATEGORY_COUNT, dtype=np.int64)
+        for data in self.scan('category', 'turn', **filters):
+            counts += np.bincount(data['category'].astype(np.intp) * CATEGORY_COUNT + data['turn'],
+                                  minlength=CATEGORY_COUNT * CATEGORY_COUNT)
+        return counts.reshape(CATEGORY_COUNT, CATEGORY_COUNT)
+
+    def yacht_frequency(self, **filters):
+        """How often five of a kind shows up.
+
+        rolled: share of turns whose final dice are a Yacht.
+        scored: share of player-games with a selected row that scored 50 in
+        Yacht. Unfinished games and filtered-out rows count as they are, so
+        only the player-games actually present are in the denominator.
+        """
+        turns = rolled = scored = player_games = 0
+        for data in self.scan('dice', 'rolls', 'category', 'score', 'game', 'player', **filters):
+            rows = len(data['rolls'])
+            final = data['dice'][np.arange(rows), data['rolls'].astype(np.intp) - 1]
+            turns += rows
+            rolled += int(np.count_nonzero(np.isin(final, YACHT_DICE)))
+            scored += int(np.count_nonzero((data['category'] == YACHT) & (data['score'] == 50)))
+            # Game numbers are local to a chunk, so distinct (game, seat) pairs add up across chunks
+            seats = data['game'].astype(np.int64) << 8 | data['player']
+            player_games += len(np.unique(seats))
+        return {'turns': turns, 'player_games': player_games, 'rolled': rolled / turns if turns else 0.0,
+                'scored': scored / player_games if player_games else 0.0}
+
+
+def print_report(store, policy=None, out=sys.stdout):
+    filters = {'policy': policy} if policy else {}
+    print(f"{store.rows:,} turns in {len(store.chunks)} chunks, {store.games:,} games", file=out)
+    means = store.category_means(**filters)
+    order = store.fill_order(**filters)
+    filled = order.sum(axis=1)
+    rounds = np.arange(CATEGORY_COUNT)
+    print(f"\n{'category':<16}{'mean':>8}{'round':>8}", file=out)
+    for i, category in enumerate(CATEGORY_NAMES):
+        mean_round = (order[i] @ rounds) / filled[i] + 1 if filled[i] else 0.0
+        print(f"{category:<16}{means[category]:>8.2f}{mean_round:>8.2f}", file=out)
+    yacht = store.yacht_frequency(**filters)
+    print(f"\nYacht rolled on {yacht['rolled']:.2%} of turns, scored in {yacht['scored']:.2%} of games",
+          file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar store of Yacht turns")
+    parser.add_argument('store', help="store directory")
+    parser.add_argument('--import-logs', nargs='+', metavar='LOG', help="add yacht_log game logs to the store")
+    parser.add_argument('--policy', help="report only the seats played by this policy")
+    args = parser.parse_args(argv)
+    if args.import_logs:
+        writer = StoreWriter(args.store)
+        rows = import_logs(writer, args.import_logs)
+        writer.commit()
+        print(f"Imported {rows} turns from {len(args.import_logs)} logs")
+        return
+    print_report(TurnStore(args.store), args.policy)
+
+
+if __name__ == "__main__":
+    main()
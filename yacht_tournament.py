@@ -0,0 +1,303 @@
+"""Monte-Carlo tournaments between Yacht AI policies.
+
+Games are split into fixed-size chunks. Each chunk is played in a worker
+process with its own RNG seeded from (seed, chunk index), so results do not
+depend on the number of workers or on scheduling. A chunk only sends back
+summed counters, never per-game objects, and the parent merges and reports
+them as chunks finish.
+
+With --store DIR every turn is also recorded, and each worker writes its chunk
+as columnar .npy files into that yacht_store directory. The parent adds the
+finished chunks to the store's manifest.
+
+    python -m yacht_game simulate --players 4 --games 1000000 --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from yacht_engine import YachtEngine, keep_mask_from_flags
+from yacht_rules import CATEGORIES, CATEGORY_INDEX, CATEGORY_NAMES, score_vector
+from yacht_store import StoreWriter, TurnRecorder, write_chunk
+
+# Highest possible total is well below this (every category at its maximum)
+SCORE_BINS = 320
+
+
+class RandomPolicy:
+    """Reroll random dice a random number of times, then score a random open category"""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose(self, engine):
+        if engine.rolls_left and self.rng.random() < 0.5:
+            return 'roll', self.rng.getrandbits(len(engine.dice))
+        return 'score', self.rng.choice(engine.open_categories())
+
+
+class GreedyPolicy:
+    """Score the open category worth the most right after the first roll"""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose(self, engine):
+        scores = score_vector(engine.dice)
+        best = max(engine.open_categories(), key=lambda category: scores[CATEGORY_INDEX[category]])
+        return 'score', best
+
+
+class OptimalPolicy:
+    """Follow the solver's expected-score-maximizing table"""
+
+    def __init__(self, rng):
+        from yacht_solver import YachtSolver, used_mask
+        self.solver = YachtSolver.load()
+        self.used_mask = used_mask
+
+    def choose(self, engine):
+        action, choice = self.solver.decide(self.used_mask(engine.scorecard), engine.dice, engine.rolls_left)
+        if action == 'roll':
+            return action, keep_mask_from_flags(choice)
+        return action, choice
+
+
+POLICIES = {
+    'optimal': OptimalPolicy,
+    'greedy': GreedyPolicy,
+    'random': RandomPolicy,
+}
+
+
+def new_stats(players):
+    """Counters summed over games; every field is an int64 array so chunks add up"""
+    return {
+        'games': np.zeros(1, dtype=np.int64),
+        'wins': np.zeros(players, dtype=np.int64),
+        'ties': np.zeros(players, dtype=np.int64),
+        'score_hist': np.zeros((players, SCORE_BINS), dtype=np.int64),
+        'category_points': np.zeros((players, len(CATEGORIES)), dtype=np.int64),
+        'category_filled': np.zeros((players, len(CATEGORIES)), dtype=np.int64),
+        'yachts': np.zeros(players, dtype=np.int64),
+    }
+
+
+def merge_stats(total, stats):
+    for key, value in stats.items():
+        total[key] += value
+
+
+def play_game(engine, policies, recorder=None):
+    """Play one game to the end, every turn starting with a full roll"""
+    if recorder is not None:
+        return play_recorded_game(engine, policies, recorder)
+    while not engine.game_over:
+        policy = policies[engine.current_player]
+        engine.roll()
+        while True:
+            action, choice = policy.choose(engine)
+            if action == 'roll':
+                engine.roll(choice)
+            else:
+                engine.score(choice)
+                break
+
+
+def play_recorded_game(engine, policies, recorder):
+    """play_game that also hands every roll and score to a yacht_store.TurnRecorder"""
+    while not engine.game_over:
+        policy = policies[engine.current_player]
+        recorder.start_turn(engine.current_player, engine.turn)
+        recorder.roll(0, engine.roll())
+        while True:
+            action, choice = policy.choose(engine)
+            if action == 'roll':
+                recorder.roll(choice, engine.roll(choice))
+            else:
+                recorder.score(choice, engine.score(choice))
+                break
+    recorder.end_game()
+
+
+_worker_policies = {}
+
+
+def _get_policy(name, rng):
+    # Policies such as the solver table are loaded once per worker process
+    policy = _worker_policies.get(name)
+    if policy is None:
+        policy = _worker_policies[name] = POLICIES[name](rng)
+    policy.rng = rng
+    return policy
+
+
+def run_chunk(args):
+    """Play one chunk of games; returns its summed counters and its store entry (or None)"""
+    seed, chunk, games, policy_names, store = args
+    rng = random.Random(seed * 1000003 + chunk)
+    players = len(policy_names)
+    policies = [_get_policy(name, rng) for name in policy_names]
+    stats = new_stats(players)
+    recorder = TurnRecorder() if store else None
+
+    for _ in range(games):
+        engine = YachtEngine(players, rng)
+        play_game(engine, policies, recorder)
+
+        totals = engine.total_scores()
+        best = max(totals)
+        winners = [seat for seat, total in enumerate(totals) if total == best]
+        for seat in winners:
+            stats['wins' if len(winners) == 1 else 'ties'][seat] += 1
+        for seat, scorecard in enumerate(engine.scorecards):
+            stats['score_hist'][seat, min(totals[seat], SCORE_BINS - 1)] += 1
+            for i, category in enumerate(CATEGORY_NAMES):
+                points = scorecard.scores[category]
+                stats['category_points'][seat, i] += points
+                if points:
+                    stats['category_filled'][seat, i] += 1
+            if scorecard.scores['Yacht']:
+                stats['yachts'][seat] += 1
+    stats['games'][0] = games
+    entry = None
+    if store:
+        directory, name = store
+        source = {'policies': list(policy_names), 'seed': seed, 'chunk': chunk}
+        entry = write_chunk(directory, name, recorder.arrays(), games, source)
+    return stats, entry
+
+
+def summarize(stats, policy_names):
+    """Reduce counters to per-seat rates and score percentiles"""
+    games = int(stats['games'][0])
+    bins = np.arange(SCORE_BINS)
+    seats = []
+    for seat, name in enumerate(policy_names):
+        hist = stats['score_hist'][seat]
+        cumulative = np.cumsum(hist)
+
+        def percentile(q):
+            return int(np.searchsorted(cumulative, q * games))
+
+        seats.append({
+            'seat': seat + 1,
+            'policy': name,
+            'win_rate': stats['wins'][seat] / games,
+            'tie_rate': stats['ties'][seat] / games,
+            'mean_score': float(hist @ bins) / games,
+            'p10': percentile(0.1),
+            'median': percentile(0.5),
+            'p90': percentile(0.9),
+            'yacht_rate': stats['yachts'][seat] / games,
+            'category_fill_rate': {category: stats['category_filled'][seat, i] / games
+                                   for i, category in enumerate(CATEGORY_NAMES)},
+            'category_mean': {category: stats['category_points'][seat, i] / games
+                              for i, category in enumerate(CATEGORY_NAMES)},
+        })
+    return {'games': games, 'seats': seats}
+
+
+def print_summary(summary, out=sys.stdout):
+    print(f"\n{summary['games']} games", file=out)
+    print(f"{'seat':<5}{'policy':<9}{'win':>8}{'tie':>8}{'mean':>8}{'p10':>6}{'p50':>6}{'p90':>6}{'yacht':>8}",
+          file=out)
+    for seat in summary['seats']:
+        print(f"{seat['seat']:<5}{seat['policy']:<9}{seat['win_rate']:>8.2%}{seat['tie_rate']:>8.2%}"
+              f"{seat['mean_score']:>8.1f}{seat['p10']:>6}{seat['median']:>6}{seat['p90']:>6}"
+              f"{seat['yacht_rate']:>8.2%}", file=out)
+    print("\nCategory fill rate (non-zero score) per seat", file=out)
+    for category in CATEGORY_NAMES:
+        rates = "".join(f"{seat['category_fill_rate'][category]:>9.1%}" for seat in summary['seats'])
+        print(f"  {category:<16}{rates}", file=out)
+
+
+def run_tournament(policy_names, games, workers=None, seed=0, chunk_size=2000, progress=None, store=None):
+    """Play games across a process pool and return the merged counters"""
+    if 'optimal' in policy_names:
+        # Build the solver table once here instead of racing to build it in every worker
+        from yacht_solver import load_table
+        load_table()
+
+    starts = range(0, games, chunk_size)
+    writer = StoreWriter(store) if store else None
+    names = writer.reserve(len(starts)) if writer else [None] * len(starts)
+    chunks = []
+    for chunk, (start, name) in enumerate(zip(starts, names)):
+        chunks.append((seed, chunk, min(chunk_size, games - start), tuple(policy_names),
+                       (store, name) if writer else None))
+
+    total = new_stats(len(policy_names))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(run_chunk, chunks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(run_chunk, chunks)
+    try:
+        for stats, entry in results:
+            merge_stats(total, stats)
+            if entry:
+                writer.add(entry)
+            if progress:
+                progress(total)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if writer:
+            # Chunks finished before an interruption are kept
+            writer.commit()
+    return total
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='yacht_game simulate', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--players', type=positive_int, default=2)
+    parser.add_argument('--games', type=positive_int, default=10000)
+    parser.add_argument('--workers', type=positive_int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policies', default='optimal,greedy,random',
+                        help='comma-separated policies, cycled over the seats')
+    parser.add_argument('--chunk-size', type=positive_int, default=2000)
+    parser.add_argument('--store', metavar='DIR', help="record every turn into this yacht_store directory")
+    args = parser.parse_args(argv)
+
+    names = args.policies.split(',')
+    for name in names:
+        if name not in POLICIES:
+            parser.error(f"unknown policy {name!r}, choose from {', '.join(POLICIES)}")
+    policy_names = [names[seat % len(names)] for seat in range(args.players)]
+
+    start = time.time()
+    last_report = [start]
+
+    def progress(total):
+        now = time.time()
+        if now - last_report[0] >= 2:
+            last_report[0] = now
+            played = int(total['games'][0])
+            win_rates = " ".join(f"{name}:{wins / played:.1%}" for name, wins in zip(policy_names, total['wins']))
+            print(f"{played}/{args.games} games, {played / (now - start):.0f}/s  {win_rates}", flush=True)
+
+    total = run_tournament(policy_names, args.games, args.workers, args.seed, args.chunk_size, progress,
+                           args.store)
+    print_summary(summarize(total, policy_names))
+    print(f"\n{args.games / (time.time() - start):.0f} games/s")
+
+
+if __name__ == "__main__":
+    main()